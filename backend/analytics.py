@@ -0,0 +1,229 @@
+"""Сводные таблицы для дашбордов: выручка, новые и истёкшие абонементы по
+дням, число клиентов по группам, тренерам и статусам.
+
+В SQLite сводки поддерживаются триггерами на clients, поэтому их обновляет
+любая запись — API, импорт, прямой SQL. Клиенты из архива (archive.py)
+остаются в выручке и истёкших абонементах, но не в числе клиентов: триггеры
+на clients_archive возвращают в дневную сводку то, что вычел перенос.
+Пересчёт с нуля и сверка:
+
+    python analytics.py rebuild
+    python analytics.py verify
+"""
+import sys
+from decimal import Decimal
+
+from sqlalchemy import Integer, String, case, cast, func, literal, or_, select, text, union_all
+
+import models
+
+ACTIVE = "Активен"
+FROZEN = "Заморожен"
+
+clients = models.Client.__table__
+archive = models.ClientArchive.__table__
+daily = models.DailySummary.__table__
+members = models.MemberSummary.__table__
+
+# Поля clients, от которых зависят сводки; остальные UPDATE триггер не трогают
+TRACKED_COLUMNS = ("start_date", "end_date", "payment_amount", "paid", "group", "trainer", "status", "deleted")
+
+
+# --- Триггеры ---
+def _daily_upsert(row, sign, date_column, counter):
+    # Выручка в копейках: целые суммы сходятся с полным пересчётом без погрешности
+    revenue = (
+        f"{sign} * CASE WHEN {row}.paid THEN CAST(round(coalesce({row}.payment_amount, 0) * 100) AS INTEGER) ELSE 0 END"
+        if counter == "started" else "0"
+    )
+    return (
+        f'INSERT INTO {daily.name} (day, "group", trainer, started, revenue_cents, expired) '
+        f'SELECT {row}.{date_column}, coalesce({row}."group", \'\'), coalesce({row}.trainer, \'\'), '
+        f"{sign if counter == 'started' else 0}, {revenue}, {sign if counter == 'expired' else 0} "
+        f"WHERE {row}.{date_column} IS NOT NULL AND coalesce({row}.deleted, 0) = 0 "
+        f'ON CONFLICT (day, "group", trainer) DO UPDATE SET '
+        f"started = started + excluded.started, revenue_cents = revenue_cents + excluded.revenue_cents, "
+        f"expired = expired + excluded.expired"
+    )
+
+
+def _members_upsert(row, sign):
+    return (
+        f'INSERT INTO {members.name} ("group", trainer, status, members) '
+        f'SELECT coalesce({row}."group", \'\'), coalesce({row}.trainer, \'\'), coalesce({row}.status, \'\'), {sign} '
+        f"WHERE coalesce({row}.deleted, 0) = 0 "
+        f'ON CONFLICT ("group", trainer, status) DO UPDATE SET members = members + excluded.members'
+    )
+
+
+def _apply(row, sign, members=True):
+    statements = [
+        _daily_upsert(row, sign, "start_date", "started"),
+        _daily_upsert(row, sign, "end_date", "expired"),
+    ]
+    if members:
+        statements.append(_members_upsert(row, sign))
+    return "; ".join(statements)
+
+
+def setup_analytics(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    tracked = ", ".join(f'"{column}"' for column in TRACKED_COLUMNS)
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_analytics_ai AFTER INSERT ON clients BEGIN {_apply('new', 1)}; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_analytics_ad AFTER DELETE ON clients BEGIN {_apply('old', -1)}; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_analytics_au AFTER UPDATE OF {tracked} ON clients BEGIN "
+            f"{_apply('old', -1)}; {_apply('new', 1)}; END"
+        ))
+        # Строки архива не правятся: перенос — вставка, восстановление — удаление
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_archive_analytics_ai AFTER INSERT ON clients_archive BEGIN "
+            f"{_apply('new', 1, members=False)}; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_archive_analytics_ad AFTER DELETE ON clients_archive BEGIN "
+            f"{_apply('old', -1, members=False)}; END"
+        ))
+        counted = conn.execute(select(func.coalesce(func.sum(members.c.members), 0))).scalar()
+        total = conn.execute(select(func.count()).where(_not_deleted())).scalar()
+        if counted != total:
+            rebuild_analytics(conn)
+
+
+# --- Полный пересчёт ---
+def _not_deleted(table=clients):
+    return or_(table.c.deleted.is_(None), table.c.deleted == False)  # noqa: E712
+
+
+def _keys(table=clients):
+    return func.coalesce(table.c.group, "").label("group"), func.coalesce(table.c.trainer, "").label("trainer")
+
+
+def _daily_rows(table):
+    revenue = case(
+        (table.c.paid == True, cast(func.round(func.coalesce(table.c.payment_amount, 0) * 100), Integer)),  # noqa: E712
+        else_=0,
+    )
+    started = select(
+        table.c.start_date.label("day"), *_keys(table),
+        literal(1).label("started"), revenue.label("revenue_cents"), literal(0).label("expired"),
+    ).where(_not_deleted(table), table.c.start_date.isnot(None))
+    expired = select(
+        table.c.end_date.label("day"), *_keys(table),
+        literal(0).label("started"), literal(0).label("revenue_cents"), literal(1).label("expired"),
+    ).where(_not_deleted(table), table.c.end_date.isnot(None))
+    return started, expired
+
+
+def daily_statement():
+    rows = union_all(*_daily_rows(clients), *_daily_rows(archive)).subquery()
+    return select(
+        rows.c.day, rows.c.group, rows.c.trainer,
+        func.sum(rows.c.started).label("started"),
+        func.sum(rows.c.revenue_cents).label("revenue_cents"),
+        func.sum(rows.c.expired).label("expired"),
+    ).group_by(rows.c.day, rows.c.group, rows.c.trainer)
+
+
+def members_statement():
+    return select(
+        *_keys(), func.coalesce(clients.c.status, "").label("status"), func.count().label("members"),
+    ).where(_not_deleted()).group_by(clients.c.group, clients.c.trainer, clients.c.status)
+
+
+def rebuild_analytics(conn):
+    conn.execute(daily.delete())
+    conn.execute(members.delete())
+    conn.execute(daily.insert().from_select(
+        ["day", "group", "trainer", "started", "revenue_cents", "expired"], daily_statement(),
+    ))
+    conn.execute(members.insert().from_select(["group", "trainer", "status", "members"], members_statement()))
+
+
+def _nonzero(rows, keys):
+    # После вычитаний в сводке остаются строки с нулями — при сверке они не важны
+    return {tuple(row[:keys]): tuple(row[keys:]) for row in rows if any(row[keys:])}
+
+
+def verify_analytics(conn):
+    # Сравнивает сводки с пересчётом по clients; пустой список — всё сходится
+    mismatches = []
+    for table, statement, keys in ((daily, daily_statement(), 3), (members, members_statement(), 3)):
+        stored = _nonzero(conn.execute(select(*table.c)).all(), keys)
+        expected = _nonzero(conn.execute(statement).all(), keys)
+        for key in sorted(set(stored) | set(expected), key=str):
+            if stored.get(key) != expected.get(key):
+                mismatches.append({"table": table.name, "key": key, "stored": stored.get(key), "expected": expected.get(key)})
+    return mismatches
+
+
+# --- Дашборды ---
+def _source(db):
+    # Без триггеров (не SQLite) сводка считается на лету
+    if db.get_bind().dialect.name == "sqlite":
+        return daily, members
+    return daily_statement().subquery(), members_statement().subquery()
+
+
+def revenue_report(db, period="month", date_from=None, date_to=None, group=None, trainer=None):
+    source = _source(db)[0]
+    key = cast(source.c.day, String)
+    if period == "month":
+        key = func.substr(key, 1, 7)
+    stmt = select(
+        key.label("period"),
+        func.sum(source.c.started), func.sum(source.c.revenue_cents), func.sum(source.c.expired),
+    ).group_by(key).order_by(key)
+    if date_from is not None:
+        stmt = stmt.where(source.c.day >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(source.c.day <= date_to)
+    if group is not None:
+        stmt = stmt.where(source.c.group == group)
+    if trainer is not None:
+        stmt = stmt.where(source.c.trainer == trainer)
+    return [
+        {"period": period_key, "started": started, "revenue": Decimal(revenue_cents).scaleb(-2), "expired": expired}
+        for period_key, started, revenue_cents, expired in db.execute(stmt)
+        if started or expired
+    ]
+
+
+def members_report(db, by="group"):
+    source = _source(db)[1]
+    key = source.c[by]
+    stmt = select(
+        key,
+        func.sum(case((source.c.status == ACTIVE, source.c.members), else_=0)),
+        func.sum(case((source.c.status == FROZEN, source.c.members), else_=0)),
+        func.sum(source.c.members),
+    ).group_by(key).order_by(key)
+    return [
+        {"name": name or None, "active": active, "frozen": frozen, "total": total}
+        for name, active, frozen, total in db.execute(stmt)
+        if total
+    ]
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    with engine.begin() as conn:
+        if command == "rebuild":
+            rebuild_analytics(conn)
+            print("Сводки пересчитаны")
+        elif command == "verify":
+            mismatches = verify_analytics(conn)
+            for mismatch in mismatches:
+                print(mismatch)
+            print(f"Расхождений: {len(mismatches)}")
+            sys.exit(1 if mismatches else 0)
+        else:
+            sys.exit(f"Unknown command: {command} (rebuild | verify)")
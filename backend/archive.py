@@ -0,0 +1,167 @@
+import os
+from calendar import monthrange
+
+from sqlalchemy import DateTime, String, and_, delete, insert, literal, select
+
+import models
+
+# Клиенты со статусом «Завершён», у которых абонемент кончился раньше, чем
+# столько месяцев назад, уходят в архив фоновым проходом планировщика
+ARCHIVE_AFTER_MONTHS = int(os.getenv("ARCHIVE_AFTER_MONTHS", "12"))
+
+FINISHED = "Завершён"
+
+DELETED = "deleted"
+EXPIRED = "expired"
+
+clients = models.Client.__table__
+archive = models.ClientArchive.__table__
+trainers = models.Trainer.__table__
+groups = models.Group.__table__
+
+# Посещения и история статусов переезжают вместе с клиентом. Свои id они не
+# сохраняют: в каждой таблице строки получают новые, конфликтов нет
+HISTORY = (
+    (models.Visit.__table__, models.VisitArchive.__table__, ("client_id", "visit_date", "checked_in_at")),
+    (models.StatusTransition.__table__, models.StatusTransitionArchive.__table__,
+     ("client_id", "from_status", "to_status", "reason", "changed_at")),
+)
+
+
+def months_before(day, months):
+    year, month = divmod(day.year * 12 + day.month - 1 - months, 12)
+    return day.replace(year=year, month=month + 1, day=min(day.day, monthrange(year, month + 1)[1]))
+
+
+def _copy(source, target, fields, where):
+    return insert(target).from_select(fields, select(*(source.c[field] for field in fields)).where(where))
+
+
+# --- Перенос в архив ---
+def _due(reason, now, months):
+    # Индексы (deleted, status, end_date) и (status, end_date)
+    if reason == DELETED:
+        return clients.c.deleted.is_(True)
+    return and_(
+        clients.c.status == FINISHED,
+        clients.c.end_date < months_before(now.date(), months),
+        clients.c.deleted.isnot(True),
+    )
+
+
+def _archive_statement(where, reason, now, limit=None, mark_deleted=False):
+    # Первая команда переноса — сразу запись: в SQLite чтение перед ней
+    # в той же транзакции могло бы не получить блокировку записи
+    columns = [literal(True).label("deleted") if mark_deleted and column.name == "deleted" else column
+               for column in clients.c]
+    source = select(
+        *columns, literal(now, DateTime).label("archived_at"), literal(reason, String).label("archive_reason"),
+    ).where(where)
+    if limit is not None:
+        source = source.limit(limit)
+    return insert(archive).from_select([*clients.c.keys(), "archived_at", "archive_reason"], source).returning(archive.c.id)
+
+
+def _move_statements(ids):
+    for source, target, fields in HISTORY:
+        yield _copy(source, target, fields, source.c.client_id.in_(ids))
+        yield delete(source).where(source.c.client_id.in_(ids))
+    yield delete(clients).where(clients.c.id.in_(ids))
+
+
+def archive_batch(db, reason, now, chunk_size, months=ARCHIVE_AFTER_MONTHS):
+    # Пачка — одна транзакция; проход продолжается, пока пачки полные
+    archived = 0
+    while True:
+        ids = db.execute(_archive_statement(_due(reason, now, months), reason, now, chunk_size)).scalars().all()
+        if ids:
+            for stmt in _move_statements(ids):
+                db.execute(stmt)
+        db.commit()
+        archived += len(ids)
+        if len(ids) < chunk_size:
+            return archived
+
+
+def run_archive(db, now, chunk_size):
+    return {reason: archive_batch(db, reason, now, chunk_size) for reason in (DELETED, EXPIRED)}
+
+
+def archive_client(db, client_id, now):
+    # DELETE /clients/{id}: клиент уходит в архив сразу, помеченный удалённым
+    ids = db.execute(_archive_statement(clients.c.id == client_id, DELETED, now, mark_deleted=True)).scalars().all()
+    if not ids:
+        db.rollback()
+        return False
+    for stmt in _move_statements(ids):
+        db.execute(stmt)
+    db.commit()
+    return True
+
+
+async def archive_client_async(db, client_id, now):
+    ids = (await db.execute(_archive_statement(clients.c.id == client_id, DELETED, now, mark_deleted=True))).scalars().all()
+    if not ids:
+        await db.rollback()
+        return False
+    for stmt in _move_statements(ids):
+        await db.execute(stmt)
+    await db.commit()
+    return True
+
+
+# --- Восстановление ---
+def _restored(column):
+    # Удалённый клиент возвращается неудалённым; тренер и группа, которых
+    # за это время не стало, сбрасываются, как при их удалении
+    if column.name == "deleted":
+        return literal(False).label("deleted")
+    if column.name == "version":
+        return (archive.c.version + 1).label("version")
+    if column.name == "trainer_id":
+        return select(trainers.c.id).where(trainers.c.id == archive.c.trainer_id).scalar_subquery()
+    if column.name == "group_id":
+        return select(groups.c.id).where(groups.c.id == archive.c.group_id).scalar_subquery()
+    return archive.c[column.name]
+
+
+def _restore_statement(client_id):
+    source = select(*(_restored(column) for column in clients.c)).where(archive.c.id == client_id)
+    return insert(clients).from_select(clients.c.keys(), source).returning(*clients.c)
+
+
+def _restore_statements(client_id):
+    for source, target, fields in HISTORY:
+        yield _copy(target, source, fields, target.c.client_id == client_id)
+        yield delete(target).where(target.c.client_id == client_id)
+    yield delete(archive).where(archive.c.id == client_id)
+
+
+def restore_client(db, client_id):
+    row = db.execute(_restore_statement(client_id)).one_or_none()
+    if row is None:
+        db.rollback()
+        return None
+    for stmt in _restore_statements(client_id):
+        db.execute(stmt)
+    db.commit()
+    return row
+
+
+async def restore_client_async(db, client_id):
+    row = (await db.execute(_restore_statement(client_id))).one_or_none()
+    if row is None:
+        await db.rollback()
+        return None
+    for stmt in _restore_statements(client_id):
+        await db.execute(stmt)
+    await db.commit()
+    return row
+
+
+# --- Список архива ---
+def archive_list_statement(reason=None, limit=50):
+    stmt = select(archive).order_by(archive.c.archived_at.desc(), archive.c.id.desc()).limit(limit)
+    if reason is not None:
+        stmt = stmt.where(archive.c.archive_reason == reason)
+    return stmt
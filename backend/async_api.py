@@ -0,0 +1,213 @@
+import asyncio
+import json
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from archive import archive_client_async, archive_list_statement, restore_client_async
+from batch import update_clients_async, update_filtered_async
+from database import AsyncSessionLocal
+import models
+from pagination import keyset_page_async
+from queries import CLIENT_SORT_FIELDS, client_list_statement
+from schemas import (
+    ClientCreate, ClientUpdate, ClientOut, ClientArchiveOut, ClientPage, ClientBatch, ClientBatchOut,
+    TrainerOut, GroupOut, PeriodOut,
+    VisitCreate, VisitOut, CheckInOut, GroupCheckIn, GroupCheckInOut,
+)
+from refcache import reference_cache, reference_response
+from rosters import check_links
+from search import search_archive_async, search_clients_async
+from visits import check_in_async, check_in_group_async, remove_visit_async
+from serialization import CLIENT_COLUMNS, fast_media_type, rows_response
+from startup import startup
+from writes import row_statement
+from handlers import (
+    check_batch, check_group_check_in, check_in_date, check_in_response, client_created, client_deleted,
+    client_insert, client_response, client_restored, client_update_values, create_error, updated_row_async,
+    visit_removed, with_etag,
+)
+
+router = APIRouter()
+
+
+async def get_async_db():
+    if not startup.ready:
+        await asyncio.to_thread(startup.prepare)
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def cached_reference(request, key, load):
+    entry = reference_cache.get(key)
+    if entry is None:
+        version = reference_cache.version(key)
+        body = json.dumps([item.dict() for item in await load()], ensure_ascii=False).encode("utf-8")
+        entry = reference_cache.put(key, body, version)
+    return reference_response(request, entry)
+
+
+def install(app):
+    # Заменяет синхронные обработчики на месте, чтобы сохранить порядок
+    # маршрутов (catch-all для SPA объявлен последним)
+    replacements = {(route.path, frozenset(route.methods)): route for route in router.routes}
+    for index, route in enumerate(app.router.routes):
+        if isinstance(route, APIRoute):
+            replacement = replacements.pop((route.path, frozenset(route.methods)), None)
+            if replacement is not None:
+                app.router.routes[index] = replacement
+    app.router.routes.extend(replacements.values())
+
+
+# --- Клиенты ---
+@router.get("/clients", response_model=List[ClientOut])
+async def get_clients(request: Request, db: AsyncSession = Depends(get_async_db)):
+    media_type = fast_media_type(request)
+    if media_type:
+        return rows_response((await db.execute(client_list_statement(columns=CLIENT_COLUMNS))).all(), media_type)
+    return (await db.scalars(select(models.Client))).all()
+
+@router.get("/clients/page", response_model=ClientPage)
+async def get_clients_page(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    trainer: Optional[str] = None,
+    group: Optional[str] = None,
+    deleted: Optional[bool] = None,
+    paid: Optional[bool] = None,
+    sort: str = "id",
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if sort not in CLIENT_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field: {sort}")
+    media_type = fast_media_type(request)
+    stmt = client_list_statement(status, trainer, group, deleted, paid, columns=CLIENT_COLUMNS if media_type else None)
+    try:
+        items, next_cursor = await keyset_page_async(
+            db, stmt, CLIENT_SORT_FIELDS[sort], models.Client.id,
+            descending=order == "desc", cursor=cursor, limit=limit, tuples=media_type is not None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if media_type:
+        return rows_response(items, media_type, next_cursor=next_cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/clients/search", response_model=List[ClientOut])
+async def search_clients_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    include_deleted: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await search_clients_async(db, q, limit=limit, include_deleted=include_deleted)
+
+@router.post("/clients/batch", response_model=ClientBatchOut)
+async def update_clients_batch(batch: ClientBatch, db: AsyncSession = Depends(get_async_db)):
+    check_batch(batch)
+    try:
+        if batch.items is not None:
+            return await update_clients_async(db, batch.items)
+        return await update_filtered_async(db, batch.filter, batch.patch)
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/clients/archive", response_model=List[ClientArchiveOut])
+async def get_archive(
+    q: Optional[str] = Query(None, min_length=1),
+    reason: Optional[str] = Query(None, pattern="^(deleted|expired)$"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if q is None:
+        return (await db.execute(archive_list_statement(reason, limit))).all()
+    return await search_archive_async(db, q, limit=limit, reason=reason)
+
+@router.get("/clients/{client_id}", response_model=ClientOut)
+async def get_client(client_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    row = (await db.execute(row_statement(models.Client.__table__, client_id))).one_or_none()
+    return client_response(request, response, row)
+
+@router.post("/clients", response_model=ClientOut)
+async def create_client(client: ClientCreate, response: Response, db: AsyncSession = Depends(get_async_db)):
+    values, stmt = client_insert(client)
+    try:
+        row = (await db.execute(stmt)).one()
+        check_links(values, row)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise create_error(e)
+    return client_created(response, row)
+
+@router.put("/clients/{client_id}", response_model=ClientOut)
+async def update_client(
+    client_id: int,
+    client: ClientUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    values, linked = client_update_values(client)
+    row = await updated_row_async(db, models.Client.__table__, client_id, linked, if_match, "Client not found")
+    try:
+        check_links(values, row)
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    await db.commit()
+    return with_etag(response, row)
+
+@router.delete("/clients/{client_id}")
+async def delete_client(client_id: int, db: AsyncSession = Depends(get_async_db)):
+    return client_deleted(await archive_client_async(db, client_id, datetime.now()))
+
+@router.post("/clients/{client_id}/restore", response_model=ClientOut)
+async def restore_client_endpoint(client_id: int, response: Response, db: AsyncSession = Depends(get_async_db)):
+    return client_restored(response, await restore_client_async(db, client_id))
+
+# --- Посещения ---
+@router.get("/clients/{client_id}/visits", response_model=List[VisitOut])
+async def get_visits(client_id: int, db: AsyncSession = Depends(get_async_db)):
+    stmt = select(models.Visit).where(models.Visit.client_id == client_id).order_by(models.Visit.visit_date)
+    return (await db.scalars(stmt)).all()
+
+@router.post("/clients/{client_id}/visits", response_model=CheckInOut)
+async def check_in_client(client_id: int, visit: Optional[VisitCreate] = None, db: AsyncSession = Depends(get_async_db)):
+    return check_in_response(await check_in_async(db, client_id, check_in_date(visit)))
+
+@router.delete("/clients/{client_id}/visits/{visit_date}")
+async def delete_visit(client_id: int, visit_date: date, db: AsyncSession = Depends(get_async_db)):
+    return visit_removed(await remove_visit_async(db, client_id, visit_date))
+
+@router.post("/visits/batch", response_model=GroupCheckInOut)
+async def check_in_batch(batch: GroupCheckIn, db: AsyncSession = Depends(get_async_db)):
+    visit_date = check_group_check_in(batch)
+    return await check_in_group_async(db, visit_date, group=batch.group, client_ids=batch.client_ids)
+
+# --- Справочники ---
+@router.get("/trainers", response_model=List[TrainerOut])
+async def get_trainers(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return [TrainerOut.model_validate(item) for item in await db.scalars(select(models.Trainer))]
+    return await cached_reference(request, "trainers", load)
+
+@router.get("/groups", response_model=List[GroupOut])
+async def get_groups(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return [GroupOut.model_validate(item) for item in await db.scalars(select(models.Group))]
+    return await cached_reference(request, "groups", load)
+
+@router.get("/periods", response_model=List[PeriodOut])
+async def get_periods(request: Request, db: AsyncSession = Depends(get_async_db)):
+    async def load():
+        return [PeriodOut.model_validate(item) for item in await db.scalars(select(models.Period))]
+    return await cached_reference(request, "periods", load)
@@ -0,0 +1,242 @@
+"""Резервные копии SQLite на ходу, без остановки приложения.
+
+Копию снимает backup API SQLite по BACKUP_PAGES страниц за шаг с паузой
+между шагами. В режиме WAL (профиль production) копия держит транзакцию
+чтения — снимок базы: запись идёт параллельно и копию не перезапускает.
+С журналом отката (профиль default) запись проходит в паузах между
+шагами, но начинает копирование заново; после BACKUP_MAX_RESTARTS
+перезапусков остаток копируется одним шагом. Копия проверяется quick_check
+и только потом получает своё имя. Планировщик делает копии, только если
+задан BACKUP_INTERVAL_HOURS, и оставляет BACKUP_KEEP последних.
+
+    python backup.py create            # копия базы (с TENANT_DATABASE_URL — каждого клуба)
+    python backup.py list
+    python backup.py verify FILE       # восстановление во временную базу и сверка
+    python backup.py restore FILE      # приложение должно быть остановлено
+"""
+import logging
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from analytics import verify_analytics
+from database import SQLALCHEMY_DATABASE_URL, make_engine
+from migrations import MIGRATIONS
+from search import ARCHIVE_FTS_TABLE, FTS_TABLE
+from tenancy import registry
+
+# Каталог копий; по умолчанию backups рядом с файлом базы
+BACKUP_DIR = os.getenv("BACKUP_DIR", "")
+# Раз в сколько часов планировщик делает копию; по умолчанию 0 — не делает
+# (python backup.py create работает всегда)
+BACKUP_INTERVAL_HOURS = float(os.getenv("BACKUP_INTERVAL_HOURS", "0"))
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "7"))
+# Страниц за шаг (по 4 КиБ) и пауза между шагами
+BACKUP_PAGES = int(os.getenv("BACKUP_PAGES", "256"))
+BACKUP_PAUSE_MS = float(os.getenv("BACKUP_PAUSE_MS", "5"))
+BACKUP_MAX_RESTARTS = int(os.getenv("BACKUP_MAX_RESTARTS", "3"))
+
+STAMP = "%Y%m%d-%H%M%S"
+
+logger = logging.getLogger(__name__)
+
+
+class BackupRestarted(Exception):
+    pass
+
+
+def database_path(url):
+    # Путь к файлу SQLite; у PostgreSQL и базы в памяти — None
+    url = make_url(url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return None
+    return url.database
+
+
+def backup_dir(path):
+    return BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(path)), "backups")
+
+
+def _prefix(path):
+    # crm.db → crm, tenants/club1.db → club1: копии клубов не смешиваются
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def list_backups(path, directory=None):
+    # От старых к новым: время в имени сортируется как строка
+    directory = directory or backup_dir(path)
+    pattern = re.compile(re.escape(_prefix(path)) + r"-\d{8}-\d{6}\.db")
+    if not os.path.isdir(directory):
+        return []
+    return [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if pattern.fullmatch(name)]
+
+
+def backup_time(backup):
+    return datetime.strptime("-".join(os.path.basename(backup)[:-3].rsplit("-", 2)[1:]), STAMP)
+
+
+def copy_database(source, target, pages=BACKUP_PAGES, pause=BACKUP_PAUSE_MS / 1000, max_restarts=BACKUP_MAX_RESTARTS):
+    # source и target — соединения sqlite3. Перезапуск виден по тому, что
+    # скопированных страниц стало меньше, чем после прошлого шага
+    progress = {"steps": 0, "restarts": 0, "copied": 0, "single_step": False}
+    snapshot = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def step(status, remaining, total):
+        progress["steps"] += 1
+        copied = total - remaining
+        if copied < progress["copied"]:
+            progress["restarts"] += 1
+            if progress["restarts"] > max_restarts:
+                raise BackupRestarted
+        progress["copied"] = copied
+        if remaining and pause:
+            time.sleep(pause)
+
+    # Транзакция чтения фиксирует снимок WAL: копия видит одну версию базы
+    if snapshot:
+        source.execute("BEGIN")
+        source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+    try:
+        source.backup(target, pages=pages, progress=step)
+    except BackupRestarted:
+        source.backup(target, pages=-1)
+        progress["steps"] += 1
+        progress["single_step"] = True
+    finally:
+        if snapshot:
+            source.rollback()
+    return progress
+
+
+def create_backup(path, directory=None, now=None, **options):
+    directory = directory or backup_dir(path)
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, f"{_prefix(path)}-{(now or datetime.now()).strftime(STAMP)}.db")
+    # Недописанная копия не попадает в список и при ротации не вытесняет готовые
+    partial = target + ".tmp"
+    started = time.perf_counter()
+    try:
+        with closing(sqlite3.connect(path)) as source, closing(sqlite3.connect(partial)) as copy:
+            progress = copy_database(source, copy, **options)
+            # Копия — один файл без -wal рядом
+            copy.execute("PRAGMA journal_mode = DELETE")
+            check = copy.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise RuntimeError(f"Backup check failed: {check}")
+        os.replace(partial, target)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    logger.info("Backup created", extra={
+        "path": target, "size": os.path.getsize(target),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        "steps": progress["steps"], "restarts": progress["restarts"], "single_step": progress["single_step"],
+    })
+    return target
+
+
+def rotate(path, directory=None, keep=BACKUP_KEEP):
+    removed = list_backups(path, directory)[:-keep] if keep > 0 else []
+    for backup in removed:
+        os.remove(backup)
+    return removed
+
+
+def run_backup(db, now, chunk_size):
+    # Задача планировщика: копия, если последней больше BACKUP_INTERVAL_HOURS,
+    # и ротация. Базы не на SQLite копируются своими средствами
+    path = database_path(db.get_bind().url)
+    if path is None or not BACKUP_INTERVAL_HOURS:
+        return {"created": 0, "removed": 0}
+    backups = list_backups(path)
+    if backups and now - backup_time(backups[-1]) < timedelta(hours=BACKUP_INTERVAL_HOURS):
+        return {"created": 0, "removed": 0}
+    create_backup(path, now=now)
+    return {"created": 1, "removed": len(rotate(path))}
+
+
+def verify_backup(backup):
+    # Копия восстанавливается во временную базу тем же backup API и сверяется:
+    # целостность, версия схемы, сводки аналитики и поисковый индекс против clients
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        restored = os.path.join(directory, "restored.db")
+        with closing(sqlite3.connect(backup)) as source, closing(sqlite3.connect(restored)) as copy:
+            source.backup(copy)
+            check = copy.execute("PRAGMA integrity_check").fetchone()[0]
+        if check != "ok":
+            problems.append(f"integrity_check: {check}")
+        engine = make_engine(f"sqlite:///{restored}")
+        try:
+            with engine.connect() as conn:
+                version = conn.execute(text("SELECT max(version) FROM schema_migrations")).scalar()
+                # Копия со старой схемой годится: приложение догонит её миграциями при запуске
+                if version is None or version > MIGRATIONS[-1][0]:
+                    problems.append(f"schema version {version}, code supports up to {MIGRATIONS[-1][0]}")
+                mismatches = verify_analytics(conn)
+                if mismatches:
+                    problems.append(f"analytics mismatches: {len(mismatches)}")
+                counts = {
+                    table: conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+                    for table in ("clients", "clients_archive", "visits", FTS_TABLE, ARCHIVE_FTS_TABLE)
+                }
+                for fts, table in ((FTS_TABLE, "clients"), (ARCHIVE_FTS_TABLE, "clients_archive")):
+                    if counts[fts] != counts[table]:
+                        problems.append(f"{fts}: {counts[fts]} rows, {table}: {counts[table]}")
+        finally:
+            engine.dispose()
+    return {"backup": backup, "schema_version": version, "counts": counts, "problems": problems}
+
+
+def restore_backup(backup, path):
+    # Текущая база сначала сохраняется обычной копией. Восстановление идёт
+    # через backup API в саму базу, поэтому её -wal не остаётся устаревшим
+    previous = create_backup(path) if os.path.exists(path) else None
+    with closing(sqlite3.connect(backup)) as source, closing(sqlite3.connect(path)) as target:
+        source.backup(target)
+    logger.info("Backup restored", extra={"path": path, "backup": backup, "previous": previous})
+    return previous
+
+
+def _databases():
+    if registry is None:
+        path = database_path(SQLALCHEMY_DATABASE_URL)
+        return [path] if path else []
+    return [registry._path(tenant) for tenant in registry.tenants() if registry._path(tenant)]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "create":
+        for path in _databases():
+            print(create_backup(path))
+            for removed in rotate(path):
+                print(f"removed {removed}")
+    elif command == "list":
+        for path in _databases():
+            for backup in list_backups(path):
+                print(f"{backup}  {os.path.getsize(backup) // 1024} КиБ")
+    elif command == "verify" and len(sys.argv) == 3:
+        report = verify_backup(sys.argv[2])
+        print(report["counts"], f"schema {report['schema_version']}")
+        for problem in report["problems"]:
+            print(problem)
+        sys.exit(1 if report["problems"] else 0)
+    elif command == "restore" and len(sys.argv) == 3:
+        if registry is not None:
+            sys.exit("Restore a tenant database with DATABASE_URL pointing to it")
+        report = verify_backup(sys.argv[2])
+        if report["problems"]:
+            sys.exit("\n".join(report["problems"]))
+        previous = restore_backup(sys.argv[2], database_path(SQLALCHEMY_DATABASE_URL))
+        print(f"restored; previous database saved to {previous}")
+    else:
+        sys.exit(f"Unknown command: {command} (create | list | verify FILE | restore FILE)")
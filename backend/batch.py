@@ -0,0 +1,131 @@
+from collections import defaultdict
+
+from sqlalchemy import bindparam, select, update
+
+import models
+from queries import client_list_statement
+from rosters import resolve_links, resolve_links_async, resolve_links_many, resolve_links_many_async
+from visits import chunks
+
+clients = models.Client.__table__
+VERSION = clients.c.version + 1
+
+
+# --- Правки по списку id ---
+def _collect(items):
+    # Повтор id в одной пачке — ошибка: порядок двух правок одного клиента не определён
+    patches, failures = {}, []
+    for item in items:
+        if item.id in patches:
+            failures.append({"id": item.id, "detail": f"Duplicate id: {item.id}"})
+            continue
+        patches[item.id] = item.dict(exclude_unset=True, exclude={"id"})
+    return patches, failures
+
+
+def _drop_failed(patches, link_failures, failures):
+    ids = list(patches)
+    for index, detail in sorted(link_failures.items()):
+        failures.append({"id": ids[index], "detail": detail})
+        del patches[ids[index]]
+
+
+def _item_statements(patches):
+    # Одинаковая правка у нескольких клиентов — один UPDATE ... WHERE id IN (...),
+    # разные правки с одним набором полей — один executemany
+    same = defaultdict(list)
+    for client_id, values in patches.items():
+        if values:
+            same[tuple(sorted(values.items()))].append(client_id)
+    by_fields = defaultdict(list)
+    for key, ids in same.items():
+        values = dict(key)
+        if len(ids) > 1:
+            for chunk in chunks(ids):
+                yield update(clients).where(clients.c.id.in_(chunk)).values({**values, "version": VERSION}), None
+        else:
+            by_fields[tuple(values)].append({"b_id": ids[0], **{f"b_{field}": value for field, value in key}})
+    for fields, params in by_fields.items():
+        stmt = update(clients).where(clients.c.id == bindparam("b_id")).values({
+            **{field: bindparam(f"b_{field}", type_=clients.c[field].type) for field in fields},
+            "version": VERSION,
+        })
+        yield stmt, params
+
+
+def _existing_statements(ids):
+    # Проверка после записи: чтение до неё в SQLite мешало бы взять блокировку записи
+    for chunk in chunks(ids):
+        yield select(clients.c.id).where(clients.c.id.in_(chunk))
+
+
+def _items_result(patches, existing, failures):
+    missing = [client_id for client_id in patches if client_id not in existing]
+    failures.extend({"id": client_id, "detail": "Client not found"} for client_id in missing)
+    return {"updated": sorted(existing), "failed": failures}
+
+
+def update_clients(db, items):
+    patches, failures = _collect(items)
+    _drop_failed(patches, resolve_links_many(db, list(patches.values())), failures)
+    for stmt, params in _item_statements(patches):
+        db.execute(stmt, params)
+    existing = {client_id for stmt in _existing_statements(list(patches)) for client_id in db.execute(stmt).scalars()}
+    db.commit()
+    return _items_result(patches, existing, failures)
+
+
+async def update_clients_async(db, items):
+    patches, failures = _collect(items)
+    _drop_failed(patches, await resolve_links_many_async(db, list(patches.values())), failures)
+    for stmt, params in _item_statements(patches):
+        await db.execute(stmt, params)
+    existing = set()
+    for stmt in _existing_statements(list(patches)):
+        existing.update((await db.execute(stmt)).scalars())
+    await db.commit()
+    return _items_result(patches, existing, failures)
+
+
+# --- Правка по фильтру ---
+def _filter_conditions(client_filter):
+    conditions = client_filter.dict(exclude_none=True, exclude={"client_ids"})
+    if not conditions and client_filter.client_ids is None:
+        raise ValueError("filter must not be empty")
+    return conditions
+
+
+def _patch_values(patch):
+    values = patch.dict(exclude_unset=True)
+    if not values:
+        raise ValueError("patch must not be empty")
+    return values
+
+
+def _filter_statement(conditions, client_ids, values):
+    stmt = update(clients).values({**values, "version": VERSION}).returning(clients.c.id)
+    where = client_list_statement(**conditions).whereclause
+    if where is not None:
+        stmt = stmt.where(where)
+    if "deleted" not in conditions:
+        stmt = stmt.where(clients.c.deleted.isnot(True))
+    if client_ids is not None:
+        stmt = stmt.where(clients.c.id.in_(client_ids))
+    return stmt
+
+
+def update_filtered(db, client_filter, patch):
+    # Один UPDATE на всех подходящих клиентов; ссылки на справочники ищутся один раз
+    conditions, values = _filter_conditions(client_filter), _patch_values(patch)
+    resolve_links(db, values)
+    updated = db.execute(_filter_statement(conditions, client_filter.client_ids, values)).scalars().all()
+    db.commit()
+    return {"updated": sorted(updated), "failed": []}
+
+
+async def update_filtered_async(db, client_filter, patch):
+    conditions, values = _filter_conditions(client_filter), _patch_values(patch)
+    await resolve_links_async(db, values)
+    updated = (await db.execute(_filter_statement(conditions, client_filter.client_ids, values))).scalars().all()
+    await db.commit()
+    return {"updated": sorted(updated), "failed": []}
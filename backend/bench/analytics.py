@@ -0,0 +1,133 @@
+"""Сводки аналитики: время дашбордов и цена триггеров.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.analytics [--sizes 10000 100000]
+
+1. Время /analytics/* при разном числе клиентов — против разбора всех
+   клиентов в Python, как пришлось бы без сводок.
+2. Запись клиентов с триггерами и без них.
+Сверка сводок с полным пересчётом — в tests/test_analytics.py.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+from analytics import rebuild_analytics, setup_analytics  # noqa: E402
+from bench.seed import GROUPS, STATUSES, TRAINERS, client_rows, seed_clients  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+TRIGGERS = ("clients_analytics_ai", "clients_analytics_ad", "clients_analytics_au")
+
+
+def random_client(rnd):
+    start = date.today() - timedelta(days=rnd.randint(0, 400))
+    return {
+        "name": "Аналитика", "surname": f"Тест{rnd.randint(0, 999)}", "phone": "+7 900 000-00-00",
+        "start_date": start.isoformat(),
+        "end_date": rnd.choice([None, (start + timedelta(days=30 * rnd.choice([1, 3, 6]))).isoformat()]),
+        "payment_amount": rnd.choice([None, "3000", "4999.99", "8000.5"]),
+        "paid": rnd.random() < 0.7,
+        "group": rnd.choice(GROUPS + [None]),
+        "trainer": rnd.choice(TRAINERS + [None]),
+        "status": rnd.choice(STATUSES),
+        "deleted": rnd.random() < 0.05,
+    }
+
+
+def python_dashboard(db):
+    # Как считали бы без сводок: все клиенты в память и разбор в Python
+    revenue, active = Counter(), Counter()
+    for client in db.query(models.Client).filter(models.Client.deleted.isnot(True)):
+        if client.paid and client.start_date and client.payment_amount:
+            revenue[client.start_date.strftime("%Y-%m")] += client.payment_amount
+        if client.status == "Активен":
+            active[client.group] += 1
+    return revenue, active
+
+
+def timed_ms(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def measure_dashboards(client, sizes):
+    print(f"\n{'клиентов':>9} {'revenue ms':>11} {'members ms':>11} {'в Python ms':>12}")
+    for size in sizes:
+        with engine.connect() as conn:
+            seeded, start_id = conn.execute(text("SELECT count(*), coalesce(max(id), 0) + 1 FROM clients")).one()
+        seed_clients(DB_PATH, size - seeded, start_id=start_id)
+        engine.dispose()
+        revenue = timed_ms(lambda: client.get("/analytics/revenue"), 50)
+        members = timed_ms(lambda: client.get("/analytics/members"), 50)
+        with SessionLocal() as db:
+            scan = timed_ms(lambda: python_dashboard(db), 3)
+        print(f"{size:>9} {revenue:>11.2f} {members:>11.2f} {scan:>12.1f}")
+
+
+def measure_writes(client, count):
+    # Одни и те же операции с триггерами и без, серии чередуются
+    rows = list(client_rows(count * 10, start_id=10_000_000))
+    columns = "id, contract_number, name, surname, phone, start_date, end_date, payment_amount, \"group\", status, paid, deleted, trainer"
+    insert = text(f"INSERT INTO clients ({columns}) VALUES ({', '.join(':p%d' % i for i in range(13))})")
+    params = [{f"p{i}": value for i, value in enumerate(row)} for row in rows]
+    results = {True: [], False: []}
+    put_results = {True: [], False: []}
+    for series in range(10):
+        for with_triggers in (True, False):
+            with engine.begin() as conn:
+                if not with_triggers:
+                    for name in TRIGGERS:
+                        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+                chunk = params[series * count:(series + 1) * count]
+                started = time.perf_counter()
+                conn.execute(insert, chunk)
+                results[with_triggers].append((time.perf_counter() - started) / len(chunk) * 1_000_000)
+                conn.execute(text("DELETE FROM clients WHERE id >= 10000000"))
+            put_results[with_triggers].append(timed_ms(lambda: client.put("/clients/1", json=random_client(random.Random(series))), 20))
+            if not with_triggers:
+                # PUT без триггеров сводки не обновил
+                setup_analytics(engine)
+                with engine.begin() as conn:
+                    rebuild_analytics(conn)
+    print(f"\n{'':<16} {'вставка, us/строка':>19} {'PUT /clients, ms':>17}")
+    for with_triggers in (False, True):
+        label = "с триггерами" if with_triggers else "без триггеров"
+        print(f"{label:<16} {statistics.median(results[with_triggers]):>19.1f} {statistics.median(put_results[with_triggers]):>17.2f}")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--writes", type=int, default=5000)
+    args = parser.parse_args()
+
+    client = TestClient(main.app)
+    seed_clients(DB_PATH, 1000)
+    engine.dispose()
+    measure_dashboards(client, args.sizes)
+    measure_writes(client, args.writes)
+
+
+if __name__ == "__main__":
+    main_bench()
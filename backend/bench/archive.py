@@ -0,0 +1,145 @@
+"""Архив ушедших клиентов: стоимость списков до и после переноса истории.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.archive [--active 10000] [--history 90000] [--chunk 1000]
+
+База как у клуба с многолетней историей: --active действующих клиентов и
+--history завершивших абонемент 1-6 лет назад (5% из них удалены), у всех
+посещения. Замеряется:
+1. GET /clients, /clients/page и поиск, пока история лежит в горячей таблице.
+2. Проход архивации: общее время и самая долгая пачка (столько держится
+   блокировка записи).
+3. Те же запросы после переноса и поиск по архиву.
+Сохранность выручки, сводок и посещений при переносе и восстановлении
+проверяется в tests/test_archive.py.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+os.environ["SCHEDULER"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import archive  # noqa: E402
+import main  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+
+REPEAT = 5
+VISITS_PER_CLIENT = 4
+
+
+def seed_history(db_path, active, history):
+    # Клиенты после active — история: абонемент кончился 1-6 лет назад
+    conn = sqlite3.connect(db_path)
+    rnd = random.Random(1)
+    today = date.today()
+    with conn:
+        rows = []
+        for client_id in range(active + 1, active + history + 1):
+            end = today - timedelta(days=rnd.randint(400, 2200))
+            rows.append((end - timedelta(days=90), end, rnd.random() < 0.05, client_id))
+        conn.executemany(
+            "UPDATE clients SET status = 'Завершён', start_date = ?, end_date = ?, deleted = ? WHERE id = ?", rows,
+        )
+        conn.executemany(
+            "INSERT INTO visits (client_id, visit_date, checked_in_at) VALUES (?, ?, ?)",
+            (
+                (client_id, day, datetime.combine(day, datetime.min.time()))
+                for client_id in range(1, active + history + 1)
+                for day in {today - timedelta(days=rnd.randint(0, 2000)) for _ in range(VISITS_PER_CLIENT)}
+            ),
+        )
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def measure(client, url):
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, response
+
+
+URLS = (
+    ("GET /clients", "/clients"),
+    ("GET /clients/page, активные", "/clients/page?status=Активен&limit=50"),
+    ("GET /clients/page по фамилии", "/clients/page?sort=surname&limit=50"),
+    ("поиск «ива»", "/clients/search?q=ива"),
+)
+
+
+def measure_lists(client):
+    return {label: measure(client, url) for label, url in URLS}
+
+
+class TransactionTimer:
+    # Самая долгая транзакция — от BEGIN до COMMIT
+    def __init__(self):
+        self.longest = 0.0
+        self._started = None
+        event.listen(engine, "begin", self.begin)
+        event.listen(engine, "commit", self.commit)
+
+    def begin(self, *args):
+        self._started = time.perf_counter()
+
+    def commit(self, *args):
+        if self._started is not None:
+            self.longest = max(self.longest, time.perf_counter() - self._started)
+
+
+def run_archive(chunk):
+    timer = TransactionTimer()
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        totals = archive.run_archive(db, datetime.now(), chunk)
+    return totals, (time.perf_counter() - started) * 1000, timer.longest * 1000
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--active", type=int, default=10_000)
+    parser.add_argument("--history", type=int, default=90_000)
+    parser.add_argument("--chunk", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed_clients(DB_PATH, args.active + args.history)
+    seed_history(DB_PATH, args.active, args.history)
+    engine.dispose()
+    client = TestClient(main.app)
+
+    before = measure_lists(client)
+    totals, total_ms, longest_ms = run_archive(args.chunk)
+    after = measure_lists(client)
+
+    print(f"{args.active} действующих, {args.history} в истории, пачка {args.chunk}")
+    print(f"\nархивация: {totals}, {total_ms:.0f} мс, самая долгая пачка {longest_ms:.0f} мс")
+    print(f"\n{'запрос':<30} {'до, мс':>8} {'после, мс':>10} {'строк до':>9} {'после':>7}")
+    for label, _ in URLS:
+        (before_ms, before_response), (after_ms, after_response) = before[label], after[label]
+        rows = [len(r.json()["items"] if "items" in r.json() else r.json()) for r in (before_response, after_response)]
+        print(f"{label:<30} {before_ms:>8.1f} {after_ms:>10.1f} {rows[0]:>9} {rows[1]:>7}")
+
+    archived_ms, response = measure(client, "/clients/archive?q=ива&limit=20")
+    print(f"{'поиск по архиву «ива»':<30} {'':>8} {archived_ms:>10.1f} {'':>9} {len(response.json()):>7}")
+
+
+if __name__ == "__main__":
+    main_bench()
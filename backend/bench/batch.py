@@ -0,0 +1,124 @@
+"""Пакетные правки клиентов: 1000 отдельных PUT против одного POST /clients/batch.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.batch [--clients 50000] [--batch 1000]
+    DB_PROFILE=production python -m bench.batch   # WAL, synchronous=NORMAL
+
+Сценарии, как их делает администратор:
+1. Отметить оплату у всех — одинаковая правка (один UPDATE ... WHERE id IN).
+2. Продлить абонементы — у каждого своя дата окончания (один executemany).
+3. Перевести группу к другому тренеру — фильтр и правка.
+
+Для каждого: время, число SQL-запросов, коммитов (каждый — fsync журнала
+в профиле default) и байт в запросах. Прежний путь — фронтенд шлёт клиента
+целиком в PUT /clients/{id}. Результат правок проверяется в tests/test_batch.py.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+os.environ["SCHEDULER"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import DB_PROFILE, engine  # noqa: E402
+
+
+class Counter:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "after_cursor_execute", self.statement)
+        event.listen(engine, "commit", self.commit)
+
+    def statement(self, *args):
+        self.statements += 1
+
+    def commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = self.commits = 0
+
+
+def measure(counter, requests):
+    # requests — список (метод вызова, url, тело)
+    counter.reset()
+    sent = 0
+    started = time.perf_counter()
+    for call, url, body in requests:
+        response = call(url, json=body)
+        response.raise_for_status()
+        sent += len(response.request.content)
+    return (time.perf_counter() - started) * 1000, counter.statements, counter.commits, sent, response
+
+
+def full_clients(client, ids):
+    wanted = set(ids)
+    return {row["id"]: row for row in client.get("/clients").json() if row["id"] in wanted}
+
+
+def scenarios(client, ids):
+    half = len(ids) // 2
+    single_ids, batch_ids = ids[:half], ids[half:]
+    rows = full_clients(client, ids)
+    today = date.today()
+
+    def extended(client_id):
+        return (today + timedelta(days=30 + client_id % 335)).isoformat()
+
+    yield (
+        "оплата",
+        [(client.put, f"/clients/{i}", {**rows[i], "paid": True}) for i in single_ids],
+        [(client.post, "/clients/batch", {"items": [{"id": i, "paid": True} for i in batch_ids]})],
+    )
+    yield (
+        "продление",
+        [(client.put, f"/clients/{i}", {**rows[i], "paid": True, "end_date": extended(i)}) for i in single_ids],
+        [(client.post, "/clients/batch", {"items": [{"id": i, "end_date": extended(i)} for i in batch_ids]})],
+    )
+    yield (
+        "смена тренера",
+        [(client.put, f"/clients/{i}", {**rows[i], "paid": True, "end_date": extended(i), "trainer": "Новый тренер"})
+         for i in single_ids],
+        [(client.post, "/clients/batch", {"filter": {"client_ids": batch_ids}, "patch": {"trainer": "Новый тренер"}})],
+    )
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed_clients(DB_PATH, args.clients)
+    engine.dispose()
+    client = TestClient(main.app)
+    counter = Counter()
+    # Правки разбросаны по таблице, как у группы, собранной за несколько сезонов
+    step = args.clients // (args.batch * 2)
+    ids = list(range(1, args.clients + 1, step))[:args.batch * 2]
+
+    print(f"{args.clients} клиентов, профиль {DB_PROFILE}, по {args.batch} правок каждым путём")
+    print(f"\n{'сценарий':<15} {'путь':<10} {'мс':>8} {'SQL':>6} {'коммитов':>9} {'тело, КиБ':>10} {'ускорение':>10}")
+    for label, singles, batch in scenarios(client, ids):
+        single_ms, single_sql, single_commits, single_sent, _ = measure(counter, singles)
+        batch_ms, batch_sql, batch_commits, batch_sent, _ = measure(counter, batch)
+        print(f"{label:<15} {'PUT':<10} {single_ms:>8.0f} {single_sql:>6} {single_commits:>9} {single_sent / 1024:>10.0f}")
+        print(f"{'':<15} {'batch':<10} {batch_ms:>8.0f} {batch_sql:>6} {batch_commits:>9} {batch_sent / 1024:>10.0f} "
+              f"{single_ms / batch_ms:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
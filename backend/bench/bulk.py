@@ -0,0 +1,92 @@
+"""Массовый импорт и потоковый экспорт клиентов против поштучных запросов.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.bulk --rows 100000
+"""
+import argparse
+import csv
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from bench.seed import client_rows  # noqa: E402
+
+COLUMNS = [
+    "contract_number", "name", "surname", "phone", "start_date", "end_date",
+    "payment_amount", "group", "status", "paid", "deleted", "trainer",
+]
+SINGLE_POSTS = 1000
+
+
+def build_csv(count, invalid_every=100):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(COLUMNS)
+    for index, row in enumerate(client_rows(count)):
+        row = list(row[1:])
+        if invalid_every and index % invalid_every == 0:
+            row[4] = "31.02.2024"
+        writer.writerow(row)
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--xlsx", action="store_true", help="также выгрузить в XLSX")
+    args = parser.parse_args()
+
+    client = TestClient(main.app)
+    payload = build_csv(args.rows)
+    print(f"CSV: {args.rows} строк, {len(payload) / 1024 / 1024:.1f} МБ, RSS до импорта {rss_mb():.0f} МБ")
+
+    started = time.perf_counter()
+    response = client.post("/clients/import", files={"file": ("clients.csv", payload, "text/csv")})
+    elapsed = time.perf_counter() - started
+    report = response.json()
+    print(f"import:  {elapsed:6.2f} s  {report['inserted'] / elapsed:8.0f} строк/с  "
+          f"вставлено {report['inserted']}, ошибок {report['failed']}, RSS {rss_mb():.0f} МБ")
+
+    rows = list(csv.DictReader(io.StringIO(build_csv(SINGLE_POSTS, 0).decode("utf-8-sig")), delimiter=";"))
+    started = time.perf_counter()
+    for row in rows:
+        client.post("/clients", json=row)
+    per_row = (time.perf_counter() - started) / len(rows)
+    print(f"POST:    {per_row * 1000:6.2f} ms/строка, {args.rows} строк заняли бы ~{per_row * args.rows:.0f} s")
+
+    started = time.perf_counter()
+    size = 0
+    with client.stream("GET", "/clients/export") as stream:
+        for block in stream.iter_bytes():
+            size += len(block)
+    elapsed = time.perf_counter() - started
+    print(f"export:  {elapsed:6.2f} s  {size / 1024 / 1024:.1f} МБ CSV, RSS {rss_mb():.0f} МБ")
+
+    started = time.perf_counter()
+    response = client.get("/clients")
+    elapsed = time.perf_counter() - started
+    print(f"/clients:{elapsed:6.2f} s  {len(response.content) / 1024 / 1024:.1f} МБ JSON, RSS {rss_mb():.0f} МБ")
+
+    if args.xlsx:
+        started = time.perf_counter()
+        response = client.get("/clients/export", params={"format": "xlsx"})
+        elapsed = time.perf_counter() - started
+        print(f"xlsx:    {elapsed:6.2f} s  {len(response.content) / 1024 / 1024:.1f} МБ, RSS {rss_mb():.0f} МБ")
+
+
+if __name__ == "__main__":
+    main_bench()
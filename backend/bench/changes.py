@@ -0,0 +1,192 @@
+"""Журнал изменений: сколько байт получает открытая вкладка на одну правку.
+
+Запуск из каталога backend (нужны uvicorn и httpx):
+    python -m bench.changes [--tabs 5] [--edits 200] [--burst 300] [--idle-tabs 100]
+
+Вкладки берут курсор GET /changes, загружают /clients и подписываются на
+/changes/stream, применяя пачки к своей копии списка. Редактор делает правки
+клиентов и справочников по одной, затем пачкой без пауз. Для сравнения —
+сколько весит перезагрузка списков, которую раньше делал фронтенд после
+каждого сохранения, и память сервера при сотне подключённых, но молчащих
+вкладок. Совпадение копии вкладки со списками проверяется в tests/test_changes.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+
+import httpx
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from bench.concurrency import prepare_database, start_server  # noqa: E402
+
+REFRESHED_LISTS = ["/clients", "/trainers", "/groups", "/periods", "/payments"]
+
+
+class Tab:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.clients = {}
+        self.trainers = {}
+        self.cursor = None
+        self.bytes = 0
+        self.events = 0
+        self.ready = asyncio.Event()
+
+    async def load(self, http):
+        # Курсор до списка: правки между ними просто придут повторно
+        self.cursor = (await http.get("/changes")).json()["cursor"]
+        response = await http.get("/clients")
+        self.clients = {row["id"]: row for row in response.json()}
+        self.trainers = {row["id"]: row for row in (await http.get("/trainers")).json()}
+        return response.num_bytes_downloaded
+
+    def apply(self, batch):
+        for entity, replica in (("clients", self.clients), ("trainers", self.trainers)):
+            for row in batch["upserts"].get(entity, []):
+                replica[row["id"]] = row
+            for entity_id in batch["deletes"].get(entity, []):
+                replica.pop(entity_id, None)
+
+    async def listen(self, http):
+        async with http.stream("GET", f"/changes/stream?since={self.cursor}", timeout=None) as response:
+            self.ready.set()
+            data = None
+            async for line in response.aiter_lines():
+                self.bytes = response.num_bytes_downloaded
+                if line.startswith("data: "):
+                    data = line[6:]
+                elif line == "" and data is not None:
+                    batch = json.loads(data)
+                    self.apply(batch)
+                    self.cursor = batch["cursor"]
+                    self.events += 1
+                    data = None
+
+
+def random_edit(rnd, client_ids, trainer_ids):
+    roll = rnd.random()
+    if roll < 0.7:
+        client_id = rnd.choice(client_ids)
+        return "PUT", f"/clients/{client_id}", {
+            "name": "Правка", "surname": f"Клиент{rnd.randint(0, 9999)}", "phone": "+7 900 000-00-00",
+            "status": rnd.choice(["Активен", "Заморожен"]), "group": "Взрослые", "paid": True,
+        }
+    if roll < 0.85:
+        return "POST", "/clients", {"name": "Новый", "surname": f"Клиент{rnd.randint(0, 9999)}", "phone": "+7 900 111-11-11"}
+    if roll < 0.9:
+        return "DELETE", f"/clients/{client_ids.pop(rnd.randrange(len(client_ids)))}", None
+    trainer_id = rnd.choice(trainer_ids)
+    return "PUT", f"/trainers/{trainer_id}", {"name": f"Тренер {rnd.randint(0, 99)}", "phone": "+7 900 222-22-22"}
+
+
+async def edit(http, rnd, client_ids, trainer_ids, count, pause):
+    sent = 0
+    for _ in range(count):
+        method, url, body = random_edit(rnd, client_ids, trainer_ids)
+        response = await http.request(method, url, json=body)
+        response.raise_for_status()
+        if method == "POST":
+            client_ids.append(response.json()["id"])
+        sent += len(response.request.content or b"")
+        if pause:
+            await asyncio.sleep(pause)
+    return sent
+
+
+async def wait_synced(tabs, http, timeout=30):
+    target = (await http.get("/changes")).json()["cursor"]
+    deadline = time.perf_counter() + timeout
+    while any(tab.cursor < target for tab in tabs):
+        if time.perf_counter() > deadline:
+            raise TimeoutError("вкладки не догнали журнал")
+        await asyncio.sleep(0.05)
+
+
+def server_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def run(base_url, args, server_pid):
+    rnd = random.Random(0)
+    limits = httpx.Limits(max_connections=args.tabs + args.idle_tabs + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as http:
+        for index in range(5):
+            await http.post("/trainers", json={"name": f"Тренер {index}"})
+        trainer_ids = [row["id"] for row in (await http.get("/trainers")).json()]
+        # Память подписчиков — до загрузки полных списков, которые раздувают RSS сильнее.
+        # Первый прогон прогревает пул потоков и соединений
+        for count in (10, args.idle_tabs):
+            cursor = (await http.get("/changes")).json()["cursor"]
+            rss_before = server_rss_mb(server_pid)
+            idle = [Tab(base_url) for _ in range(count)]
+            for tab in idle:
+                tab.cursor = cursor
+            idle_listeners = [asyncio.create_task(tab.listen(http)) for tab in idle]
+            for tab in idle:
+                await tab.ready.wait()
+            await edit(http, rnd, list(range(1, 1001)), trainer_ids, 50, 0)
+            await wait_synced(idle, http)
+            rss_after = server_rss_mb(server_pid)
+            for task in idle_listeners:
+                task.cancel()
+            await asyncio.gather(*idle_listeners, return_exceptions=True)
+        print(f"{args.idle_tabs} подписчиков: RSS сервера {rss_before:.0f} -> {rss_after:.0f} МиБ "
+              f"({(rss_after - rss_before) * 1024 / args.idle_tabs:.0f} КиБ на вкладку)")
+
+        refetch = 0
+        for url in REFRESHED_LISTS:
+            refetch += (await http.get(url)).num_bytes_downloaded
+
+        tabs = [Tab(base_url) for _ in range(args.tabs)]
+        initial = [await tab.load(http) for tab in tabs]
+        listeners = [asyncio.create_task(tab.listen(http)) for tab in tabs]
+        for tab in tabs:
+            await tab.ready.wait()
+        client_ids = list(tabs[0].clients)
+
+        print(f"Перезагрузка списков после сохранения: {refetch / 1024:.0f} КиБ (gzip), первая загрузка вкладки: {initial[0] / 1024:.0f} КиБ")
+        print(f"\n{'сценарий':<22} {'правок':>7} {'тело правок, Б':>15} {'событий':>8} {'вкладке, Б/правку':>18} {'против перезагрузки':>20}")
+        for label, count, pause in (("по одной", args.edits, 0.05), ("пачкой без пауз", args.burst, 0)):
+            before = [(tab.bytes, tab.events) for tab in tabs]
+            sent = await edit(http, rnd, client_ids, trainer_ids, count, pause)
+            await wait_synced(tabs, http)
+            received = sum(tab.bytes - start for tab, (start, _) in zip(tabs, before)) / len(tabs)
+            events = sum(tab.events - start for tab, (_, start) in zip(tabs, before)) / len(tabs)
+            print(f"{label:<22} {count:>7} {sent / count:>15.0f} {events:>8.0f} {received / count:>18.0f} "
+                  f"{refetch / (received / count):>19.0f}x")
+
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tabs", type=int, default=5)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=300)
+    parser.add_argument("--idle-tabs", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    prepare_database(db_path)
+    proc, base_url = start_server(db_path, "production", args.port)
+    try:
+        asyncio.run(run(base_url, args, proc.pid))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,128 @@
+"""Нагрузка на отметку посещений: конкурентные check-in и отметка группы.
+
+Запуск из каталога backend (нужны uvicorn и httpx):
+    python -m bench.checkin [--configs sync async] [--writers 8] [--seconds 15]
+
+Согласованность sessions_used с visits проверяется в tests/test_checkin.py.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+import httpx
+
+from bench.concurrency import CLIENTS, percentile, prepare_database, start_server
+
+DAYS = 30
+
+
+def run_checkins(base_url, client_ids, writers, seconds):
+    timings, errors, inserted = [], 0, 0
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    today = date.today()
+
+    def writer(seed):
+        nonlocal errors, inserted
+        rnd = random.Random(seed)
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            while time.perf_counter() < deadline:
+                client_id = rnd.choice(client_ids)
+                visit_date = today - timedelta(days=rnd.randrange(DAYS))
+                started = time.perf_counter()
+                try:
+                    response = http.post(f"/clients/{client_id}/visits", json={"visit_date": visit_date.isoformat()})
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if ok:
+                        timings.append(elapsed)
+                        inserted += response.json()["checked_in"]
+                    else:
+                        errors += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return timings, errors, inserted
+
+
+def time_group(base_url, group, repeats=5, sample=500):
+    # Отметка всей группы пакетом за разные даты, затем на выборке из sample
+    # клиентов — один пакетный запрос против запроса на каждого
+    with httpx.Client(base_url=base_url, timeout=120) as http:
+        batch = []
+        for day in range(repeats):
+            visit_date = (date.today() + timedelta(days=day + 1)).isoformat()
+            started = time.perf_counter()
+            result = http.post("/visits/batch", json={"group": group, "visit_date": visit_date}).json()
+            batch.append(time.perf_counter() - started)
+        members = result["checked_in"]
+        client_ids = members[:sample]
+        visit_date = (date.today() + timedelta(days=repeats + 1)).isoformat()
+        started = time.perf_counter()
+        http.post("/visits/batch", json={"client_ids": client_ids, "visit_date": visit_date})
+        sample_batch = time.perf_counter() - started
+        visit_date = (date.today() + timedelta(days=repeats + 2)).isoformat()
+        started = time.perf_counter()
+        for client_id in client_ids:
+            http.post(f"/clients/{client_id}/visits", json={"visit_date": visit_date})
+        single = time.perf_counter() - started
+    return len(members), percentile(batch, 0.5), len(client_ids), sample_batch * 1000, single * 1000
+
+
+def active_client_ids(db_path):
+    # Удалённых клиентов отметить нельзя (404). Узкий диапазон — часть
+    # отметок повторные и конфликтуют по (client_id, visit_date)
+    conn = sqlite3.connect(db_path)
+    ids = [row[0] for row in conn.execute("SELECT id FROM clients WHERE deleted = 0 AND id <= ?", (CLIENTS // 10,))]
+    conn.close()
+    return ids
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--configs", nargs="+", default=["sync", "async"], choices=["default", "production", "sync", "async"])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--group", default="Взрослые")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    template = os.path.join(workdir, "template.db")
+    prepare_database(template)
+    client_ids = active_client_ids(template)
+
+    print(f"{'config':<12} {'count':>7} {'req/s':>8} {'errors':>7} {'новых':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    groups = []
+    for index, config in enumerate(args.configs):
+        db_path = os.path.join(workdir, f"{config}.db")
+        shutil.copy(template, db_path)
+        proc, base_url = start_server(db_path, config, 8750 + index, args.workers)
+        try:
+            timings, errors, inserted = run_checkins(base_url, client_ids, args.writers, args.seconds)
+            groups.append((config, *time_group(base_url, args.group)))
+        finally:
+            proc.terminate()
+            proc.wait()
+        print(f"{config:<12} {len(timings):>7} {len(timings) / args.seconds:>8.1f} {errors:>7} {inserted:>7} "
+              f"{percentile(timings, 0.5):>9.2f} {percentile(timings, 0.99):>9.2f}")
+
+    print(f"\n{'config':<12} {'группа':>7} {'batch p50 ms':>13} {'выборка':>8} {'batch ms':>9} {'по одному ms':>13}")
+    for config, members, batch_ms, sample, sample_ms, single_ms in groups:
+        print(f"{config:<12} {members:>7} {batch_ms:>13.1f} {sample:>8} {sample_ms:>9.1f} {single_ms:>13.1f}")
+
+
+if __name__ == "__main__":
+    main_bench()
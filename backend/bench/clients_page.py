@@ -0,0 +1,66 @@
+"""Время ответа и размер /clients и /clients/page при росте таблицы клиентов.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.clients_page
+"""
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from database import engine  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from pagination import encode_cursor  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 500_000]
+FULL_LIST_LIMIT = 100_000
+REPEAT = 20
+
+
+def measure(client, url, repeat=REPEAT):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - started)
+        response.raise_for_status()
+    timings.sort()
+    return timings[len(timings) // 2] * 1000, len(response.content), response
+
+
+def main_bench():
+    client = TestClient(main.app)
+    seeded = 0
+    print(f"{'rows':>8} {'endpoint':<44} {'p50 ms':>9} {'bytes':>11}")
+    for size in SIZES:
+        seed_clients(DB_PATH, size - seeded, start_id=seeded + 1)
+        seeded = size
+        # Открытые соединения не видят статистику ANALYZE из seed_clients
+        engine.dispose()
+
+        urls = [
+            "/clients/page?limit=50",
+            "/clients/page?limit=50&status=Активен&deleted=false&sort=end_date",
+            "/clients/page?limit=50&trainer=Олег Смирнов&paid=true&sort=surname&order=desc",
+        ]
+        middle = size // 2
+        urls.append(f"/clients/page?limit=50&cursor={encode_cursor(middle, middle)}")
+        if size <= FULL_LIST_LIMIT:
+            urls.append("/clients")
+
+        for url in urls:
+            repeat = 3 if url == "/clients" else REPEAT
+            p50, size_bytes, _ = measure(client, url, repeat)
+            label = url if len(url) <= 44 else url[:41] + "..."
+            print(f"{size:>8} {label:<44} {p50:>9.2f} {size_bytes:>11}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,160 @@
+"""Конкурентная нагрузка чтение/запись на реальный uvicorn для разных настроек БД.
+
+Запуск из каталога backend (нужны uvicorn и httpx):
+    python -m bench.concurrency [--configs default production] [--seconds 15]
+    python -m bench.concurrency --configs sync async --slow-readers 4
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from bench.seed import seed_clients  # noqa: E402
+
+CLIENTS = 50_000
+
+CONFIGS = {
+    "default": {"DB_PROFILE": "default"},
+    "production": {"DB_PROFILE": "production"},
+    "sync": {"DB_PROFILE": "production", "DB_MODE": "sync"},
+    "async": {"DB_PROFILE": "production", "DB_MODE": "async"},
+}
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else float("nan")
+
+
+def prepare_database(path):
+    # Схема создаётся самим приложением при первом запуске
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}")
+    subprocess.run([sys.executable, "-c", "import main"], cwd=BACKEND_DIR, env=env, check=True,
+                   stdout=subprocess.DEVNULL)
+    seed_clients(path, CLIENTS)
+
+
+def start_server(db_path, config, port, workers=1):
+    # Первый проход планировщика на свежем seed меняет статусы десяткам тысяч клиентов
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", SCHEDULER="0", **CONFIGS[config])
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(base_url + "/trainers", timeout=1)
+            return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def run_load(base_url, readers, writers, seconds, slow_readers=0):
+    results = {"read": [], "write": [], "slow": []}
+    errors = {"read": 0, "write": 0, "slow": 0}
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def reader(seed):
+        rnd = random.Random(seed)
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            while time.perf_counter() < deadline:
+                url = rnd.choice([
+                    "/clients/page?limit=50",
+                    "/clients/page?limit=50&status=Активен&sort=end_date",
+                    "/clients/search?q=Иван",
+                    "/groups",
+                ])
+                record("read", http.get, url)
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            while time.perf_counter() < deadline:
+                if rnd.random() < 0.5:
+                    record("write", http.post, "/clients", json={
+                        "name": "Нагрузка", "surname": f"Тест{rnd.randint(0, 999)}", "phone": "+7 900 000-00-00",
+                    })
+                else:
+                    client_id = rnd.randint(1, CLIENTS)
+                    record("write", http.put, f"/clients/{client_id}", json={
+                        "name": "Изменён", "surname": "Клиент", "phone": "+7 900 000-00-01", "paid": True,
+                    })
+
+    def slow_reader():
+        # Полная выгрузка /clients — медленный запрос, который занимает воркеры
+        with httpx.Client(base_url=base_url, timeout=120) as http:
+            while time.perf_counter() < deadline:
+                record("slow", http.get, "/clients")
+
+    def record(kind, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            ok = method(url, **kwargs).status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                results[kind].append(elapsed)
+            else:
+                errors[kind] += 1
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(1000 + i,)) for i in range(writers)]
+    threads += [threading.Thread(target=slow_reader) for _ in range(slow_readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--configs", nargs="+", default=["default", "production"], choices=sorted(CONFIGS))
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--slow-readers", type=int, default=0)
+    parser.add_argument("--seconds", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    template = os.path.join(workdir, "template.db")
+    prepare_database(template)
+
+    print(f"{'config':<12} {'op':<6} {'count':>7} {'req/s':>8} {'errors':>7} {'p50 ms':>9} {'p99 ms':>9}")
+    for index, config in enumerate(args.configs):
+        db_path = os.path.join(workdir, f"{config}.db")
+        shutil.copy(template, db_path)
+        proc, base_url = start_server(db_path, config, 8700 + index, args.workers)
+        try:
+            results, errors = run_load(base_url, args.readers, args.writers, args.seconds, args.slow_readers)
+        finally:
+            proc.terminate()
+            proc.wait()
+        for kind in ("read", "write", "slow"):
+            timings = results[kind]
+            if not timings and not errors[kind]:
+                continue
+            print(f"{config:<12} {kind:<6} {len(timings):>7} {len(timings) / args.seconds:>8.1f} {errors[kind]:>7} "
+                  f"{percentile(timings, 0.5):>9.2f} {percentile(timings, 0.99):>9.2f}")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,87 @@
+"""Размеры передачи статики и ответов API со сжатием и без.
+
+Копирует собранную статику во временный каталог, готовит сжатые копии
+и сравнивает байты по сети с несжатыми ответами. Заголовки кэширования и
+сжатия проверяет tests/test_delivery.py.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.delivery
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(WORK_DIR, "bench.db")
+STATIC_DIR = os.path.join(WORK_DIR, "static")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["STATIC_DIR"] = STATIC_DIR
+os.environ["LOG_LEVEL"] = "WARNING"
+sys.path.insert(0, BACKEND)
+
+shutil.copytree(os.path.join(BACKEND, "static"), STATIC_DIR)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import engine  # noqa: E402
+from precompress import brotli, precompress  # noqa: E402
+
+CLIENTS = 10_000
+
+
+def fetch(client, url, encoding, headers=None):
+    response = client.get(url, headers={"Accept-Encoding": encoding, **(headers or {})})
+    return response, response.num_bytes_downloaded
+
+
+def asset_sizes(client, url):
+    row = [url, fetch(client, url, "identity")[1]]
+    for encoding in ("gzip", "br"):
+        response, size = fetch(client, url, f"{encoding}, identity")
+        row.append(size if response.headers.get("content-encoding") == encoding else None)
+    return row
+
+
+def api_sizes(client):
+    rows = []
+    for url, headers in (
+        ("/clients", {}),
+        ("/clients", {"Accept": "application/vnd.crm.columnar+json"}),
+        ("/clients/page?limit=50", {}),
+    ):
+        _, plain_bytes = fetch(client, url, "identity", headers)
+        _, gzip_bytes = fetch(client, url, "gzip", headers)
+        rows.append([f"{url} {headers.get('Accept', '')}".strip(), plain_bytes, gzip_bytes, None])
+    return rows
+
+
+def main_bench():
+    written = precompress(STATIC_DIR)
+    print(f"Сжатых копий: {len(written)}{'' if brotli else ' (brotli не установлен, только .gz)'}")
+    seed_clients(DB_PATH, CLIENTS)
+    engine.dispose()
+
+    with TestClient(main.app) as client:
+        report(client)
+
+
+def report(client):
+    with open(os.path.join(STATIC_DIR, "index.html")) as f:
+        index = f.read()
+    assets = [part.split('"')[0] for part in index.split('="')[1:] if part.startswith("/assets/")]
+
+    rows = [asset_sizes(client, url) for url in assets]
+    rows += api_sizes(client)
+
+    print(f"{'ресурс':<55} {'identity':>10} {'gzip':>10} {'br':>10}")
+    for url, plain, gzipped, br in rows:
+        print(f"{url:<55} {plain:>10} {gzipped:>10} {br if br is not None else '-':>10}  "
+              f"{(1 - min(filter(None, (gzipped, br))) / plain) * 100:4.0f}% экономии")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,196 @@
+"""Синтетическая база клуба для замеров: тренеры, группы с расписанием,
+периоды, способы оплаты, клиенты со ссылками на них и посещения. Один и тот
+же seed даёт одну и ту же базу.
+
+Запуск из каталога backend:
+    python -m bench.generate --size 50k --out /tmp/crm-50k.db [--seed 0]
+
+Размеры: 1k, 50k, 500k или число клиентов. Схема создаётся миграциями
+приложения, поэтому база годится и как crm.db для ручной проверки.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.seed import NAMES, SURNAME_ROOTS, SURNAME_SUFFIXES  # noqa: E402
+from database import make_engine  # noqa: E402
+from rosters import parse_days  # noqa: E402
+from tenancy import prepare_database  # noqa: E402
+
+SIZES = {"1k": 1_000, "50k": 50_000, "500k": 500_000}
+
+FEMALE_NAMES = {"Мария", "Анна", "Елена", "Ольга", "Дарья", "Айгуль", "Жылдыз", "Асель"}
+EXTRA_NAMES = ["Айгуль", "Жылдыз", "Асель", "Бакыт", "Нурлан", "Эрлан", "Азамат", "Тимофей", "Глеб", "Святослав"]
+STREETS = ["ул. Ленина", "пр. Чуй", "ул. Советская", "ул. Пушкина", "мкр. Восток-5", "ул. Абдрахманова"]
+DAY_SETS = ["Пн,Ср,Пт", "Вт,Чт", "Сб,Вс", "Пн,Чт", "Вт,Пт,Сб", "Ср"]
+GROUP_KINDS = ["Дети 7-10", "Подростки", "Взрослые", "Профи", "Женский бокс", "Кроссфит"]
+PERIODS = [
+    # label, value, months, price, trainings
+    ("1 месяц", "1m", 1, 3000, 12), ("3 месяца", "3m", 3, 8000, 36),
+    ("6 месяцев", "6m", 6, 15000, 72), ("12 месяцев", "12m", 12, 27000, 144),
+]
+PAYMENTS = [
+    ("Наличные", "cash", "cash", []), ("Карта", "card", "card", ["Оптима", "Демир", "KICB"]),
+    ("Перевод", "transfer", "transfer", ["MBank", "Элсом", "О!Деньги"]),
+]
+VISITS_PER_CLIENT = 3
+
+
+def client_count(size):
+    return SIZES[size] if size in SIZES else int(size)
+
+
+def phone(rnd):
+    # Клуб в Бишкеке: в основном местные номера, часть российских, записанных как придётся
+    kind = rnd.random()
+    if kind < 0.6:
+        return f"+996 {rnd.choice([555, 700, 707, 770, 777, 990])} {rnd.randint(0, 999):03d} {rnd.randint(0, 999):03d}"
+    if kind < 0.8:
+        return f"0{rnd.choice([555, 700, 770])}{rnd.randint(0, 999999):06d}"
+    return f"+7 9{rnd.randint(0, 99):02d} {rnd.randint(0, 999):03d}-{rnd.randint(0, 99):02d}-{rnd.randint(0, 99):02d}"
+
+
+def surname(rnd, first_name):
+    value = rnd.choice(SURNAME_ROOTS) + rnd.choice(SURNAME_SUFFIXES)
+    if first_name in FEMALE_NAMES and value.endswith(("ов", "ев", "ин")):
+        value += "а"
+    return value
+
+
+def reference_rows(count, rnd):
+    trainers = [
+        (index, f"{rnd.choice(NAMES[:15])} {rnd.choice(SURNAME_ROOTS)}ов", phone(rnd))
+        for index in range(1, max(3, count // 2500) + 1)
+    ]
+    groups = []
+    for index in range(1, max(4, count // 250) + 1):
+        hour = 8 + index % 13
+        groups.append((
+            index, f"{GROUP_KINDS[index % len(GROUP_KINDS)]} {index:03d}", rnd.choice(DAY_SETS),
+            f"{hour:02d}:00", f"{hour + 1:02d}:30", trainers[index % len(trainers)][0], rnd.choice([20, 30, 300]),
+        ))
+    return trainers, groups
+
+
+def visit_days(rnd, start, end):
+    # Посещения за последние 120 дней абонемента
+    first = max(start, end - timedelta(days=120))
+    span = (end - first).days
+    return sorted({first + timedelta(days=rnd.randint(0, span)) for _ in range(rnd.randint(0, VISITS_PER_CLIENT * 2))})
+
+
+def client_rows(count, trainers, groups, rnd, visits):
+    # Посещения копятся в visits; счётчики в карточке клиента сходятся с ними
+    today = date.today()
+    trainer_names = {trainer_id: name for trainer_id, name, _ in trainers}
+    for client_id in range(1, count + 1):
+        first_name = rnd.choice(NAMES + EXTRA_NAMES)
+        group_id, group_name, _, _, _, trainer_id, _ = rnd.choice(groups)
+        label, value, months, price, trainings = rnd.choice(PERIODS)
+        # Большинство абонементов действуют, часть кончилась за последние два месяца
+        start = today - timedelta(days=rnd.randint(0, 30 * months + 60))
+        end = start + timedelta(days=30 * months)
+        status = "Завершён" if end < today else rnd.choice(["Активен"] * 9 + ["Заморожен"])
+        freeze = (today - timedelta(days=rnd.randint(1, 20)), today + timedelta(days=rnd.randint(1, 30))) \
+            if status == "Заморожен" else (None, None)
+        discount = rnd.random() < 0.1
+        days = visit_days(rnd, start, min(end, today))
+        visits.extend(
+            (client_id, day.isoformat(), str(datetime.combine(day, datetime.min.time()) + timedelta(hours=18)))
+            for day in days
+        )
+        yield {
+            "id": client_id, "contract_number": f"Д-{client_id:06d}", "name": first_name,
+            "surname": surname(rnd, first_name), "phone": phone(rnd),
+            "address": f"{rnd.choice(STREETS)}, {rnd.randint(1, 200)}" if rnd.random() < 0.6 else None,
+            "birth_date": (today - timedelta(days=rnd.randint(7 * 365, 50 * 365))).isoformat(),
+            "start_date": start.isoformat(), "end_date": end.isoformat(), "subscription_period": value,
+            "payment_amount": str(price * (0.9 if discount else 1)), "payment_method": rnd.choice(PAYMENTS)[1],
+            "group": group_name, "group_id": group_id, "trainer": trainer_names[trainer_id], "trainer_id": trainer_id,
+            "status": status, "paid": rnd.random() < 0.85, "total_sessions": trainings,
+            "has_discount": discount, "discount_reason": "Семейная" if discount else None,
+            "deleted": rnd.random() < 0.03, "freeze_start": freeze[0] and freeze[0].isoformat(),
+            "freeze_end": freeze[1] and freeze[1].isoformat(), "sessions_used": len(days),
+            "last_visit_date": days[-1].isoformat() if days else None,
+        }
+
+
+def insert_clients(conn, rows):
+    columns = list(rows[0])
+    names = ", ".join(f'"{column}"' for column in columns)
+    conn.executemany(
+        f"INSERT INTO clients ({names}) VALUES ({', '.join('?' * len(columns))})",
+        (tuple(row[column] for column in columns) for row in rows),
+    )
+
+
+def generate(db_path, size, seed=0):
+    count = client_count(size)
+    engine = make_engine(f"sqlite:///{db_path}")
+    prepare_database(engine)
+    engine.dispose()
+
+    rnd = random.Random(seed)
+    trainers, groups = reference_rows(count, rnd)
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany("INSERT INTO trainers (id, name, phone) VALUES (?, ?, ?)", trainers)
+        conn.executemany(
+            "INSERT INTO groups (id, name, days, time_start, time_end, trainer_id, capacity) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            groups,
+        )
+        conn.executemany(
+            "INSERT INTO group_days (group_id, weekday) VALUES (?, ?)",
+            [(group[0], weekday) for group in groups for weekday in parse_days(group[2])],
+        )
+        conn.executemany(
+            "INSERT INTO periods (label, value, months, price, trainings) VALUES (?, ?, ?, ?, ?)", PERIODS,
+        )
+        conn.executemany(
+            "INSERT INTO payments (label, value, type, banks) VALUES (?, ?, ?, ?)",
+            [(label, value, kind, json.dumps(banks, ensure_ascii=False)) for label, value, kind, banks in PAYMENTS],
+        )
+        conn.execute(
+            "INSERT INTO freeze_settings (maxDays, reasons, requireConfirm) VALUES (30, ?, 0)",
+            (json.dumps(["Болезнь", "Отпуск", "Командировка"], ensure_ascii=False),),
+        )
+    # Клиенты пачками: триггеры поиска, аналитики и журнала срабатывают как при импорте
+    visits = []
+    total_visits = 0
+    rows = client_rows(count, trainers, groups, rnd, visits)
+    while True:
+        chunk = [row for _, row in zip(range(10_000), rows)]
+        if not chunk:
+            break
+        with conn:
+            insert_clients(conn, chunk)
+            conn.executemany("INSERT INTO visits (client_id, visit_date, checked_in_at) VALUES (?, ?, ?)", visits)
+        total_visits += len(visits)
+        visits.clear()
+    conn.execute("ANALYZE")
+    conn.close()
+    return {"clients": count, "trainers": len(trainers), "groups": len(groups), "visits": total_visits}
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="50k", help="1k, 50k, 500k или число клиентов")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if os.path.exists(args.out):
+        sys.exit(f"{args.out} already exists")
+    started = time.perf_counter()
+    totals = generate(args.out, args.size, args.seed)
+    print(f"{args.out}: {totals}, {time.perf_counter() - started:.1f} с")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,127 @@
+"""Накладные расходы инструментирования: хуки SQLAlchemy и middleware.
+
+Запуск из каталога backend:
+    python -m bench.instrumentation
+
+Приложение вызывается напрямую как ASGI (без TestClient и его потока), стек
+с InstrumentationMiddleware и без него чередуется на каждом запросе,
+сравниваются медианы. Хуки SQLAlchemy меряются так же, пачками по 1000 запросов.
+
+Метрики и поиск N+1 проверяются в tests/test_instrumentation.py.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "1"
+# Повторы SELECT 1 в замере хуков не должны сыпать предупреждениями о N+1
+os.environ["N_PLUS_ONE_THRESHOLD"] = str(10 ** 9)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+
+import main  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import engine  # noqa: E402
+from instrumentation import (  # noqa: E402
+    InstrumentationMiddleware, RequestStats, _current, instrument_engine, uninstrument_engine,
+)
+
+ENDPOINTS = ["/clients/page?limit=20", "/groups", "/clients/search?q=Иван", "/api/cache"]
+
+
+async def asgi_get(app, url):
+    path, _, query = url.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    status = None
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"{url}: HTTP {status}")
+
+
+async def timed_us(app, url):
+    started = time.perf_counter()
+    await asgi_get(app, url)
+    return (time.perf_counter() - started) * 1_000_000
+
+
+async def measure_requests(requests):
+    # Варианты чередуются на каждом запросе, чтобы дрейф машины делился поровну
+    instrumented = main.app.build_middleware_stack()
+    main.app.user_middleware = [m for m in main.app.user_middleware if m.cls is not InstrumentationMiddleware]
+    bare = main.app.build_middleware_stack()
+    print(f"\n{'endpoint':<26} {'выкл, us':>9} {'вкл, us':>9} {'разница':>9}")
+    for url in ENDPOINTS:
+        for _ in range(50):
+            await asgi_get(instrumented, url)
+        off, on = [], []
+        for _ in range(requests):
+            uninstrument_engine(engine)
+            off.append(await timed_us(bare, url))
+            instrument_engine(engine)
+            on.append(await timed_us(instrumented, url))
+        off, on = statistics.median(off), statistics.median(on)
+        print(f"{url:<26} {off:>9.0f} {on:>9.0f} {on - off:>+8.0f}  ({(on - off) / off * 100:+.1f}%)")
+
+
+def measure_hooks(queries):
+    bench_engine = create_engine("sqlite://")
+    statement = text("SELECT 1")
+
+    def run(batch=1000):
+        with bench_engine.connect() as conn:
+            started = time.perf_counter()
+            for _ in range(batch):
+                conn.execute(statement)
+            return (time.perf_counter() - started) / batch * 1_000_000
+
+    bare, outside, inside = [], [], []
+    for _ in range(queries // 1000):
+        bare.append(run())
+        instrument_engine(bench_engine)
+        outside.append(run())
+        token = _current.set(RequestStats({"path": "/bench"}))
+        inside.append(run())
+        _current.reset(token)
+        uninstrument_engine(bench_engine)
+    bare, outside, inside = statistics.median(bare), statistics.median(outside), statistics.median(inside)
+    print(f"SELECT 1 без хуков           {bare:6.1f} us")
+    print(f"с хуками вне запроса         {outside:6.1f} us  (+{outside - bare:.1f})")
+    print(f"с хуками внутри запроса      {inside:6.1f} us  (+{inside - bare:.1f})")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=20_000)
+    args = parser.parse_args()
+
+    seed_clients(DB_PATH, args.clients)
+    engine.dispose()
+    measure_hooks(args.queries)
+    asyncio.run(measure_requests(args.requests))
+
+
+if __name__ == "__main__":
+    main_bench()
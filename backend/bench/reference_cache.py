@@ -0,0 +1,77 @@
+"""Стоимость запроса к справочникам без кэша, с кэшем и с If-None-Match.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.reference_cache
+"""
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from refcache import reference_cache  # noqa: E402
+
+ENDPOINTS = ["/groups", "/periods", "/payments", "/freezeSettings", "/trainers"]
+REPEAT = 500
+
+
+def seed_reference_data():
+    conn = sqlite3.connect(DB_PATH)
+    with conn:
+        conn.executemany(
+            "INSERT INTO groups (name, days, time_start, time_end) VALUES (?, ?, ?, ?)",
+            [(f"Группа {i}", "Пн,Ср,Пт", "18:00", "19:30") for i in range(200)],
+        )
+        conn.executemany(
+            "INSERT INTO periods (label, value, months, price, trainings) VALUES (?, ?, ?, ?, ?)",
+            [(f"{i} мес", f"p{i}", i, 3000 * i, 12 * i) for i in range(1, 13)],
+        )
+        conn.executemany(
+            "INSERT INTO payments (label, value, type, banks) VALUES (?, ?, ?, ?)",
+            [(f"Способ {i}", f"pay{i}", "transfer", json.dumps(["Сбербанк", "Тинькофф", "ВТБ"], ensure_ascii=False))
+             for i in range(30)],
+        )
+        conn.execute(
+            'INSERT INTO freeze_settings ("maxDays", reasons, "requireConfirm") VALUES (?, ?, ?)',
+            (30, json.dumps(["Болезнь", "Командировка", "Отпуск"], ensure_ascii=False), True),
+        )
+        conn.executemany(
+            "INSERT INTO trainers (name, phone) VALUES (?, ?)",
+            [(f"Тренер {i}", "+7 900 000-00-00") for i in range(20)],
+        )
+    conn.close()
+
+
+def measure(client, url, headers=None):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        response = client.get(url, headers=headers or {})
+    return (time.perf_counter() - started) / REPEAT * 1_000_000, response
+
+
+def main_bench():
+    seed_reference_data()
+    client = TestClient(main.app)
+    print(f"{'endpoint':<16} {'no cache us':>12} {'cached us':>10} {'304 us':>8} {'bytes':>7}")
+    for url in ENDPOINTS:
+        reference_cache.ttl = 0
+        cold, response = measure(client, url)
+        reference_cache.ttl = 60
+        client.get(url)
+        warm, _ = measure(client, url)
+        etag = response.headers["etag"]
+        not_modified, _ = measure(client, url, {"If-None-Match": etag})
+        print(f"{url:<16} {cold:>12.0f} {warm:>10.0f} {not_modified:>8.0f} {len(response.content):>7}")
+    print(json.dumps(reference_cache.stats(), ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,176 @@
+"""Составы и расписание по ссылкам вместо сравнения строк: клуб на 200 групп и 50k клиентов.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.rosters [--clients 50000] [--groups 200] [--trainers 20]
+
+1. Привязка клиентов, записанных строками, как в миграции 5.
+2. Состав группы и тренера: время ответа и число SQL-запросов против
+   прежнего пути фронтенда — весь /clients и фильтр по имени.
+3. Недельное расписание с загрузкой против разбора всех клиентов в Python.
+4. Переименование тренера: время обновления имени у всех его клиентов.
+
+Проверки согласованности — в tests/test_rosters.py.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+os.environ["SCHEDULER"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event, text  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from rosters import ACTIVE, fill_group_days, link_clients, parse_days  # noqa: E402
+
+DAY_SETS = ["Пн,Ср,Пт", "Вт,Чт", "Сб,Вс", "Пн,Чт", "Вт,Пт,Сб", "Ср"]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "after_cursor_execute", self)
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def seed_club(clients, group_count, trainer_count):
+    seed_clients(DB_PATH, clients)
+    rnd = random.Random(1)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO trainers (id, name) VALUES (:id, :name)"), [
+            {"id": index, "name": f"Тренер {index:02d}"} for index in range(1, trainer_count + 1)
+        ])
+        conn.execute(text(
+            "INSERT INTO groups (id, name, days, time_start, time_end, trainer_id, capacity) "
+            "VALUES (:id, :name, :days, :start, :end, :trainer_id, :capacity)"
+        ), [
+            {
+                "id": index, "name": f"Группа {index:03d}", "days": rnd.choice(DAY_SETS),
+                "start": f"{8 + index % 13:02d}:00", "end": f"{9 + index % 13:02d}:30",
+                "trainer_id": 1 + index % trainer_count, "capacity": rnd.choice([200, 300, 400]),
+            }
+            for index in range(1, group_count + 1)
+        ])
+        # Как в старой базе: группа и тренер только строкой, тренер — тот, что ведёт группу
+        conn.execute(text(
+            "UPDATE clients SET \"group\" = printf('Группа %03d', id % :groups + 1), "
+            "trainer = printf('Тренер %02d', (id % :groups + 1) % :trainers + 1)"
+        ), {"groups": group_count, "trainers": trainer_count})
+        conn.execute(text("DELETE FROM group_days"))
+    engine.dispose()
+
+
+def timed(func, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def browser_roster(client, name, field):
+    # Прежний путь: весь список клиентов и отбор по имени на стороне браузера
+    response = client.get("/clients")
+    return [row for row in response.json() if row[field] == name and not row["deleted"]], len(response.content)
+
+
+def python_schedule(db):
+    members = Counter(
+        client.group for client in db.query(models.Client).filter(models.Client.deleted.isnot(True))
+        if client.status == ACTIVE
+    )
+    week = [[] for _ in range(7)]
+    for group in db.query(models.Group):
+        for weekday in parse_days(group.days):
+            week[weekday].append((group.time_start, group.name, members[group.name]))
+    return [sorted(day) for day in week]
+
+
+def measure_link(clients):
+    with engine.begin() as conn:
+        started = time.perf_counter()
+        linked = link_clients(conn)
+        days = fill_group_days(conn)
+        elapsed = time.perf_counter() - started
+        unresolved = conn.execute(text("SELECT count(*) FROM clients WHERE group_id IS NULL OR trainer_id IS NULL")).scalar()
+    print(f"Привязка {clients} клиентов: {linked} ссылок, {days} дней групп за {elapsed:.2f} с, без ссылки: {unresolved}")
+
+
+def measure_rosters(client, counter, repeats):
+    print(f"\n{'состав':<16} {'клиентов':>9} {'мс':>8} {'SQL':>4} {'КиБ':>8}   {'через /clients: мс':>18} {'КиБ':>8}")
+    for label, url, name, field in (
+        ("группы", "/groups/7/clients", "Группа 007", "group"),
+        ("тренера", "/trainers/3/clients", "Тренер 03", "trainer"),
+    ):
+        counter.count = 0
+        client.get(url)
+        statements = counter.count
+        elapsed, response = timed(lambda: client.get(url), repeats)
+        body = response.json()
+        old_elapsed, (_, old_bytes) = timed(lambda: browser_roster(client, name, field), 3)
+        print(f"{label:<16} {body['total']:>9} {elapsed:>8.1f} {statements:>4} {len(response.content) / 1024:>8.0f}   "
+              f"{old_elapsed:>18.1f} {old_bytes / 1024:>8.0f}")
+
+
+def measure_schedule(client, counter, repeats):
+    counter.count = 0
+    client.get("/schedule")
+    statements = counter.count
+    elapsed, response = timed(lambda: client.get("/schedule"), repeats)
+    week = response.json()
+    with SessionLocal() as db:
+        scan_elapsed, _ = timed(lambda: python_schedule(db), 3)
+    sessions = sum(len(day["sessions"]) for day in week)
+    busiest = max(week, key=lambda day: day["members"])
+    print(f"\nРасписание: {sessions} занятий за неделю, {elapsed:.1f} мс, SQL: {statements}; "
+          f"разбор всех клиентов в Python: {scan_elapsed:.0f} мс")
+    print(f"Самый загруженный день — {busiest['day']}: {busiest['members']} активных, "
+          f"максимальная загрузка занятия {max(s['occupancy'] for s in busiest['sessions']):.0%}")
+
+
+def measure_rename(client):
+    started = time.perf_counter()
+    client.put("/trainers/3", json={"name": "Тренер 03 (старший)"}).raise_for_status()
+    elapsed = (time.perf_counter() - started) * 1000
+    roster = client.get("/trainers/3/clients").json()
+    with engine.connect() as conn:
+        orphans = conn.execute(text("SELECT count(*) FROM clients WHERE trainer = 'Тренер 03'")).scalar()
+    print(f"\nПереименование тренера с {roster['total']} клиентами: {elapsed:.0f} мс, "
+          f"клиентов со старым именем: {orphans}")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50_000)
+    parser.add_argument("--groups", type=int, default=200)
+    parser.add_argument("--trainers", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    seed_club(args.clients, args.groups, args.trainers)
+    measure_link(args.clients)
+    client = TestClient(main.app)
+    counter = StatementCounter()
+    measure_rosters(client, counter, args.repeats)
+    measure_schedule(client, counter, args.repeats)
+    measure_rename(client)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,130 @@
+"""Планировщик смены статусов: время проходов на 100k клиентов.
+
+Запуск из каталога backend:
+    python -m bench.scheduler [--clients 100000] [--workers 4]
+
+Часы двигаются вперёд по шагам; на каждом шаге несколько планировщиков
+(как воркеры uvicorn) стартуют одновременно — время прохода и повторного
+(пустого) прохода. В конце — время первого прохода при разных размерах пачки.
+Корректность переходов и аренды проверяется в tests/test_scheduler.py.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+WORK_DIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(WORK_DIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+import main  # noqa: E402, F401
+from bench.seed import seed_clients  # noqa: E402
+from database import SessionLocal, engine, make_engine  # noqa: E402
+from scheduler import FROZEN, Scheduler, run_transitions  # noqa: E402
+
+STEPS_DAYS = [0, 7, 30, 90, 400]
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, days):
+        self.now += timedelta(days=days)
+
+
+def make_scheduler(clock, session_factory=SessionLocal, chunk_size=1000):
+    scheduler = Scheduler(session_factory=session_factory, clock=clock, lease_seconds=60, chunk_size=chunk_size)
+    scheduler.add_job("status_transitions", run_transitions)
+    return scheduler
+
+
+def add_freeze_windows(conn):
+    # В seed заморозок нет: окна до 90 дней от начала абонемента
+    conn.execute(text(
+        "UPDATE clients SET freeze_start = start_date, freeze_end = date(start_date, '+' || (id % 90) || ' days') "
+        "WHERE status = :frozen"
+    ), {"frozen": FROZEN})
+
+
+def run_concurrently(schedulers):
+    results = [None] * len(schedulers)
+
+    def run(index):
+        results[index] = schedulers[index].run_once()["status_transitions"]
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(schedulers))]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, time.perf_counter() - started
+
+
+def measure_steps(workers):
+    clock = FakeClock(datetime.now())
+    print(f"{'день':>5} {'разморожено':>12} {'завершено':>10} {'проход, с':>10} {'повтор, мс':>11}")
+    previous = 0
+    for day in STEPS_DAYS:
+        clock.advance(day - previous)
+        previous = day
+        # Новые владельцы на каждом шаге: прежняя аренда истекла по подменённым часам
+        schedulers = [make_scheduler(clock) for _ in range(workers)]
+        results, elapsed = run_concurrently(schedulers)
+        ran = next(result for result in results if result is not None)
+        winner = schedulers[results.index(ran)]
+        started = time.perf_counter()
+        winner.run_once()
+        repeat_ms = (time.perf_counter() - started) * 1000
+        print(f"{day:>5} {ran['thawed']:>12} {ran['expired']:>10} {elapsed:>10.2f} {repeat_ms:>11.1f}")
+
+
+def measure_chunk_sizes(template, chunk_sizes):
+    print(f"\n{'пачка':>6} {'переходов':>10} {'проход, с':>10}")
+    clock = FakeClock(datetime.now() + timedelta(days=400))
+    for chunk_size in chunk_sizes:
+        path = os.path.join(WORK_DIR, f"chunk{chunk_size}.db")
+        shutil.copy(template, path)
+        bench_engine = make_engine(f"sqlite:///{path}")
+        scheduler = make_scheduler(clock, sessionmaker(bind=bench_engine), chunk_size)
+        started = time.perf_counter()
+        result = scheduler.run_once()["status_transitions"]
+        elapsed = time.perf_counter() - started
+        bench_engine.dispose()
+        print(f"{chunk_size:>6} {sum(result.values()):>10} {elapsed:>10.2f}")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    seed_clients(DB_PATH, args.clients)
+    with engine.begin() as conn:
+        add_freeze_windows(conn)
+    engine.dispose()
+    template = os.path.join(WORK_DIR, "template.db")
+    shutil.copy(DB_PATH, template)
+
+    measure_steps(args.workers)
+    measure_chunk_sizes(template, args.chunk_sizes)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,72 @@
+"""Время поиска /clients/search на 500k клиентов.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.search
+"""
+import os
+import sys
+import tempfile
+import time
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from search import search_clients  # noqa: E402
+
+SIZE = 500_000
+REPEAT = 50
+
+
+def sample_queries(db):
+    client = db.query(models.Client).filter(
+        models.Client.id >= SIZE // 2, models.Client.deleted == False  # noqa: E712
+    ).first()
+    digits = "".join(ch for ch in client.phone if ch.isdigit())
+    return [
+        client.contract_number,
+        client.contract_number[2:],
+        client.phone,
+        "8" + digits[1:7],
+        digits[1:],
+        f"{client.surname} {client.name}",
+        client.surname[:4].lower(),
+        client.surname.upper(),
+        "Сокол Ольг",
+    ]
+
+
+def main_bench():
+    seed_clients(DB_PATH, SIZE)
+    engine.dispose()
+    client = TestClient(main.app)
+    db = SessionLocal()
+    print(f"{'query':<22} {'hits':>5} {'search ms':>10} {'http ms':>9}")
+    for q in sample_queries(db):
+        timings = []
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            hits = search_clients(db, q, limit=20)
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        search_ms = timings[len(timings) // 2] * 1000
+
+        timings = []
+        for _ in range(REPEAT):
+            started = time.perf_counter()
+            client.get("/clients/search", params={"q": q}).raise_for_status()
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        http_ms = timings[len(timings) // 2] * 1000
+        print(f"{q:<22} {len(hits):>5} {search_ms:>10.2f} {http_ms:>9.2f}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,53 @@
+import random
+import sqlite3
+from datetime import date, timedelta
+
+NAMES = [
+    "Иван", "Пётр", "Алексей", "Дмитрий", "Сергей", "Артём", "Максим", "Никита", "Егор", "Михаил",
+    "Кирилл", "Андрей", "Роман", "Тимур", "Руслан", "Мария", "Анна", "Елена", "Ольга", "Дарья",
+]
+SURNAME_ROOTS = [
+    "Иван", "Петр", "Сидор", "Смирн", "Кузнец", "Поп", "Волк", "Сокол", "Лебед", "Козл",
+    "Новик", "Мороз", "Павл", "Семён", "Голуб", "Виноград", "Богдан", "Воробь", "Фёдор", "Михайл",
+    "Беляк", "Тарас", "Белоус", "Комар", "Орл", "Кисел", "Макар", "Андре", "Ковал", "Ильин",
+    "Гусь", "Титов", "Кузьмин", "Кудрявц", "Баран", "Куликов", "Алексе", "Степан", "Яковл", "Сорокин",
+]
+SURNAME_SUFFIXES = ["ов", "ев", "ин", "енко", "ский", "ович", "ук", "ых"]
+GROUPS = ["Дети 7-10", "Подростки", "Взрослые", "Профи"]
+TRAINERS = ["Андрей Петров", "Олег Смирнов", "Виктор Иванов"]
+STATUSES = ["Активен", "Активен", "Активен", "Заморожен"]
+
+
+def client_rows(count, start_id=1, seed=0):
+    rnd = random.Random(seed + start_id)
+    today = date.today()
+    for client_id in range(start_id, start_id + count):
+        start = today - timedelta(days=rnd.randint(0, 720))
+        yield (
+            client_id,
+            f"Д-{client_id:06d}",
+            rnd.choice(NAMES),
+            rnd.choice(SURNAME_ROOTS) + rnd.choice(SURNAME_SUFFIXES),
+            f"+7 9{rnd.randint(0, 99):02d} {rnd.randint(0, 999):03d}-{rnd.randint(0, 99):02d}-{rnd.randint(0, 99):02d}",
+            start.isoformat(),
+            (start + timedelta(days=30 * rnd.choice([1, 3, 6, 12]))).isoformat(),
+            str(rnd.choice([3000, 5000, 8000, 15000])),
+            rnd.choice(GROUPS),
+            rnd.choice(STATUSES),
+            rnd.random() < 0.8,
+            rnd.random() < 0.05,
+            rnd.choice(TRAINERS),
+        )
+
+
+def seed_clients(db_path, count, start_id=1, seed=0):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO clients (id, contract_number, name, surname, phone, start_date, end_date, '
+            'payment_amount, "group", status, paid, deleted, trainer) '
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            client_rows(count, start_id, seed),
+        )
+    conn.execute("ANALYZE")
+    conn.close()
@@ -0,0 +1,79 @@
+"""Сериализация списка клиентов: ORM + Pydantic против кортежей + orjson.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.serialization --sizes 10000 100000
+
+Совпадение быстрых форматов с ответом Pydantic проверяется в tests/test_serialization.py.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from typing import List
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from queries import client_list_statement  # noqa: E402
+from schemas import ClientOut  # noqa: E402
+from serialization import CLIENT_COLUMNS, COLUMNAR_JSON, FAST_JSON, encode_rows  # noqa: E402
+
+REPEAT = 3
+
+
+def best_of(func):
+    best, result = None, None
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def breakdown(size):
+    adapter = TypeAdapter(List[ClientOut])
+    with SessionLocal() as db:
+        orm_ms, objects = best_of(lambda: db.query(models.Client).all())
+        pydantic_ms, body = best_of(lambda: adapter.dump_json(adapter.validate_python(objects, from_attributes=True)))
+        db.expunge_all()
+        tuples_ms, rows = best_of(lambda: db.execute(client_list_statement(columns=CLIENT_COLUMNS)).all())
+        fast_ms, fast = best_of(lambda: encode_rows(rows, FAST_JSON))
+        columnar_ms, columnar = best_of(lambda: encode_rows(rows, COLUMNAR_JSON))
+    print(f"{size:>7} {'ORM + Pydantic':<18} запрос {orm_ms:7.1f} ms  кодирование {pydantic_ms:7.1f} ms  {len(body):>10} B")
+    print(f"{size:>7} {'кортежи + orjson':<18} запрос {tuples_ms:7.1f} ms  кодирование {fast_ms:7.1f} ms  {len(fast):>10} B")
+    print(f"{size:>7} {'колоночный':<18} запрос {tuples_ms:7.1f} ms  кодирование {columnar_ms:7.1f} ms  {len(columnar):>10} B")
+
+
+def end_to_end(client, size):
+    for label, accept in (("application/json", "application/json"), ("fast", FAST_JSON), ("columnar", COLUMNAR_JSON)):
+        total_ms, response = best_of(lambda: client.get("/clients", headers={"Accept": accept}))
+        print(f"{size:>7} GET /clients {label:<17} {total_ms:8.1f} ms  {len(response.content):>10} B")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    client = TestClient(main.app)
+    seeded = 0
+    for size in sorted(args.sizes):
+        seed_clients(DB_PATH, size - seeded, start_id=seeded + 1)
+        seeded = size
+        engine.dispose()
+        breakdown(size)
+        end_to_end(client, size)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,182 @@
+"""Холодный запуск и резервная копия под нагрузкой записи (startup.py, backup.py).
+
+Запуск из каталога backend (нужен httpx):
+    python -m bench.startup [--size 50k | --db FILE] [--runs 5] [--seconds 3]
+
+1. Холодный запуск uvicorn --runs раз на существующей базе: когда открылся
+   порт, первый ответ на / (index.html, без БД), первый запрос к клиентам
+   (ждёт фоновую проверку схемы) и фазы из GET /api/startup. Кэш страниц ОС
+   между запусками не сбрасывается — это пробуждение инстанса, а не первая
+   загрузка машины.
+2. Копия базы, пока поток пишет в неё по строке каждые 10 мс: задержки записи
+   без копии, с копией шагами по BACKUP_PAGES страниц и одним шагом — в WAL и
+   с журналом отката (профиль default). Время копии, шаги, перезапуски.
+3. Время проверки копии восстановлением во временную базу
+   (backup.verify_backup) и восстановления в рабочую базу.
+Ротация, проверка и восстановление копий проверяются в tests/test_backup.py.
+"""
+import argparse
+import os
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import closing
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/unused.db"
+os.environ["LOG_LEVEL"] = "WARNING"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx  # noqa: E402
+
+from backup import BACKUP_PAGES, copy_database, create_backup, restore_backup, verify_backup  # noqa: E402
+from bench.concurrency import percentile  # noqa: E402
+from startup import STARTUP_BUDGET_MS  # noqa: E402
+
+PORT = 8795
+
+
+def cold_start(db_path):
+    # Клиент создаётся заранее: его настройка SSL не должна попасть в замер
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=30) as http:
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(PORT), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+                    break
+                except OSError:
+                    if proc.poll() is not None:
+                        raise RuntimeError("server exited")
+                    time.sleep(0.005)
+            port = time.perf_counter()
+            http.get("/").raise_for_status()
+            index = time.perf_counter()
+            http.get("/clients/page?limit=50").raise_for_status()
+            clients = time.perf_counter()
+            stats = http.get("/api/startup").json()
+        finally:
+            proc.terminate()
+            proc.wait()
+    return {
+        "port": (port - started) * 1000, "index": (index - port) * 1000, "clients": (clients - index) * 1000,
+        "server": stats,
+    }
+
+
+def report_cold(runs):
+    print(f"{'запуск':<8} {'порт':>8} {'первый /':>9} {'клиенты':>8} {'импорт':>8} {'схема':>8} {'1-й ответ':>10}")
+    for index, run in enumerate(runs, 1):
+        phases = run["server"]["phases"]
+        print(f"{index:<8} {run['port']:>8.0f} {run['index']:>9.1f} {run['clients']:>8.1f} "
+              f"{phases.get('imported', 0):>8.0f} {phases.get('schema_ready', 0):>8.0f} "
+              f"{run['server']['first_response']['ms']:>10.0f}")
+    first = [run["server"]["first_response"]["ms"] for run in runs]
+    print(f"время до первого ответа (мс от запуска процесса): медиана {sorted(first)[len(first) // 2]:.0f}, "
+          f"худшее {max(first):.0f}, бюджет {STARTUP_BUDGET_MS:.0f}")
+
+
+class Writer:
+    # Запись по одной строке, как ручные правки карточек; задержки копятся
+    def __init__(self, path):
+        self.path = path
+        self.timings = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+
+    def _run(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        count = conn.execute("SELECT count(*) FROM clients").fetchone()[0]
+        index = 0
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            with conn:
+                conn.execute("UPDATE clients SET comment = ? WHERE id = ?", (f"запись {index}", index % count + 1))
+            self.timings.append(time.perf_counter() - started)
+            index += 1
+            time.sleep(0.01)
+        conn.close()
+
+    def __enter__(self):
+        self._thread.start()
+        time.sleep(0.2)
+        self.timings.clear()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def copy_pages(path, target, pages):
+    # Только копирование страниц: проверка копии идёт уже без блокировок рабочей базы
+    with closing(sqlite3.connect(path)) as source, closing(sqlite3.connect(target)) as copy:
+        return copy_database(source, copy, pages=pages)
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="50k")
+    parser.add_argument("--db", help="готовая база; копируется")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=3, help="нагрузка записи без копии, для сравнения")
+    args = parser.parse_args()
+
+    source = args.db or os.path.join(WORKDIR, "generated.db")
+    if args.db is None:
+        subprocess.run([sys.executable, "-m", "bench.generate", "--size", args.size, "--out", source],
+                       cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+    live = os.path.join(WORKDIR, "live.db")
+    shutil.copy(source, live)
+    print(f"база {args.db or args.size}: {os.path.getsize(live) / 2 ** 20:.0f} МиБ\n")
+
+    report_cold([cold_start(live) for _ in range(args.runs)])
+
+    print(f"\n{'журнал':<8} {'копия':<18} {'время, с':>9} {'шагов':>6} {'перезап.':>9} {'записей':>8} "
+          f"{'p50, мс':>8} {'p99, мс':>8} {'max, мс':>8}")
+    target = os.path.join(WORKDIR, "copy.db")
+    for journal in ("wal", "delete"):
+        with sqlite3.connect(live) as conn:
+            conn.execute(f"PRAGMA journal_mode = {journal}")
+        for label, pages in (("без копии", None), (f"по {BACKUP_PAGES} страниц", BACKUP_PAGES), ("одним шагом", -1)):
+            with Writer(live) as writer:
+                started = time.perf_counter()
+                if pages is None:
+                    time.sleep(args.seconds)
+                    progress = {"steps": 0, "restarts": 0, "single_step": False}
+                else:
+                    progress = copy_pages(live, target, pages)
+                    os.remove(target)
+                elapsed = time.perf_counter() - started
+            timings = writer.timings
+            note = "  остаток одним шагом" if progress["single_step"] else ""
+            print(f"{journal:<8} {label:<18} {elapsed:>9.2f} {progress['steps']:>6} {progress['restarts']:>9} "
+                  f"{len(timings):>8} {percentile(timings, 0.5):>8.1f} {percentile(timings, 0.99):>8.1f} "
+                  f"{max(timings) * 1000:>8.1f}{note}")
+
+    # Копия под записью в WAL (профиль production), её проверка и восстановление
+    with sqlite3.connect(live) as conn:
+        conn.execute("PRAGMA journal_mode = wal")
+    with Writer(live):
+        backup = create_backup(live, os.path.join(WORKDIR, "backups"))
+    started = time.perf_counter()
+    report = verify_backup(backup)
+    print(f"\nпроверка копии: {time.perf_counter() - started:.1f} с, {report['counts']}, "
+          f"расхождений {len(report['problems'])}")
+    started = time.perf_counter()
+    restore_backup(backup, live)
+    print(f"восстановление в рабочую базу (с копией текущей): {time.perf_counter() - started:.1f} с")
+
+if __name__ == "__main__":
+    main_bench()
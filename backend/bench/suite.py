@@ -0,0 +1,493 @@
+"""Замер всего API на синтетической базе и сравнение с сохранённым базовым замером.
+
+Запуск из каталога backend (нужен httpx):
+    python -m bench.suite --size 50k --out bench-50k.json
+    python -m bench.suite --compare bench-50k.json [--threshold 0.5]
+    python -m bench.suite --compare bench-50k.json --current after.json
+
+База строится bench.generate (--db — взять готовую, она копируется).
+Приложение вызывается в том же процессе через ASGI-транспорт httpx, без сети:
+1. Каждый маршрут по очереди: p50/p95/p99, число SQL-запросов и размер ответа.
+   Записи создают и удаляют свои же тренеров, группы, клиентов и посещения.
+2. Смешанная нагрузка (80% чтений, 20% записей) из --concurrency задач:
+   запросов в секунду, p50/p95/p99, ошибки.
+3. Пиковый RSS процесса.
+В начале и в конце прогона замеряется калибровочная работа без приложения;
+с --normalize время текущего замера приводится к скорости машины базового
+(грубо: годится, чтобы сравнить замеры с разных машин, а не соседние прогоны).
+Число SQL-запросов от машины не зависит и сравнивается точно.
+Результат — JSON. --compare завершается с кодом 1, если медиана и лучшее время
+маршрута выросли больше чем на --threshold (и больше чем на --min-ms), маршрут
+выполняет больше SQL-запросов, под нагрузкой упала пропускная способность или
+вырос p95, или вырос пиковый RSS.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+WORKDIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(WORKDIR, "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+os.environ["SCHEDULER"] = "0"
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+from bench.concurrency import percentile  # noqa: E402
+from bench.generate import NAMES  # noqa: E402
+from database import engine  # noqa: E402
+from serialization import FAST_JSON  # noqa: E402
+
+# Тяжёлые маршруты (полная выгрузка, пересчёты) повторяются реже
+HEAVY_REPEATS = 5
+WARMUP = 2
+
+Endpoint = namedtuple("Endpoint", "name build keep heavy", defaults=(None, False))
+
+
+class Club:
+    # Что знает о базе генератор запросов, и что создали сами записи
+    def __init__(self, clients, trainers, groups, seed):
+        self.rnd = random.Random(seed)
+        self.clients = clients
+        self.trainers = trainers
+        self.groups = groups
+        self.created = {"clients": [], "trainers": [], "groups": [], "periods": [], "payments": [], "freezeSettings": []}
+        self.archived = []
+        self.visits = []
+        self.serial = 0
+
+    def next(self):
+        self.serial += 1
+        return self.serial
+
+    def client_id(self):
+        return self.rnd.choice(self.clients)
+
+    def group_name(self):
+        return self.groups[self.rnd.randrange(len(self.groups))][1]
+
+
+def load_club(db_path, seed):
+    conn = sqlite3.connect(db_path)
+    try:
+        # Удалённым посещения не отмечаются
+        clients = [row[0] for row in conn.execute("SELECT id FROM clients WHERE NOT deleted")]
+        trainers = [row[0] for row in conn.execute("SELECT id FROM trainers")]
+        groups = conn.execute("SELECT id, name FROM groups").fetchall()
+    finally:
+        conn.close()
+    return Club(clients, trainers, groups, seed)
+
+
+# --- Маршруты ---
+def client_body(club, **fields):
+    return {"name": club.rnd.choice(NAMES), "surname": f"Замеров{club.next()}", "phone": "+996 555 000 000", **fields}
+
+
+def import_csv(club, rows=100):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(["contract_number", "name", "surname", "phone", "start_date", "end_date", "group", "status"])
+    today = date.today()
+    for _ in range(rows):
+        serial = club.next()
+        writer.writerow([f"И-{serial}", club.rnd.choice(NAMES), f"Импортов{serial}", "+996 700 000 000",
+                         today.isoformat(), (today + timedelta(days=30)).isoformat(), club.group_name(), "Активен"])
+    return buffer.getvalue().encode("utf-8-sig")
+
+
+def reference_endpoints(path, body, rename):
+    # Справочник: создать, переименовать и удалить созданное этим же замером
+    def keep(club, response):
+        club.created[path].append(response.json()["id"])
+
+    return [
+        Endpoint(f"POST /{path}", lambda club: ("POST", f"/{path}", {"json": body(club)}), keep),
+        Endpoint(f"PUT /{path}/{{id}}", lambda club: (
+            "PUT", f"/{path}/{club.rnd.choice(club.created[path])}", {"json": rename(body(club))},
+        )),
+        Endpoint(f"DELETE /{path}/{{id}}", lambda club: ("DELETE", f"/{path}/{club.created[path].pop()}", {})),
+    ]
+
+
+def keep_client(club, response):
+    club.created["clients"].append(response.json()["id"])
+
+
+def keep_visit(club, response):
+    result = response.json()
+    club.visits.append((result["client_id"], result["visit_date"]))
+
+
+def keep_archived(club, response):
+    club.archived.append(int(response.request.url.path.rsplit("/", 1)[1]))
+
+
+def new_visit_date(club):
+    # Каждая отметка — новая дата, иначе повтор ничего не пишет
+    return (date(2000, 1, 1) + timedelta(days=club.next())).isoformat()
+
+
+ENDPOINTS = [
+    Endpoint("GET /clients", lambda club: ("GET", "/clients", {}), heavy=True),
+    Endpoint("GET /clients (vnd.crm+json)", lambda club: ("GET", "/clients", {"headers": {"Accept": FAST_JSON}}), heavy=True),
+    Endpoint("GET /clients/page", lambda club: ("GET", "/clients/page?limit=50", {})),
+    Endpoint("GET /clients/page, активные по end_date", lambda club: (
+        "GET", "/clients/page?limit=50&status=Активен&sort=end_date", {},
+    )),
+    Endpoint("GET /clients/search", lambda club: ("GET", f"/clients/search?q={club.rnd.choice(NAMES)[:3]}", {})),
+    Endpoint("GET /clients/{id}", lambda club: ("GET", f"/clients/{club.client_id()}", {})),
+    Endpoint("GET /clients/{id}/visits", lambda club: ("GET", f"/clients/{club.client_id()}/visits", {})),
+    Endpoint("GET /clients/{id}/transitions", lambda club: ("GET", f"/clients/{club.client_id()}/transitions", {})),
+    Endpoint("GET /clients/export", lambda club: ("GET", "/clients/export", {}), heavy=True),
+    Endpoint("GET /changes", lambda club: ("GET", "/changes?since=0&limit=500", {})),
+    Endpoint("GET /analytics/revenue", lambda club: ("GET", "/analytics/revenue", {})),
+    Endpoint("GET /analytics/revenue?period=day", lambda club: ("GET", "/analytics/revenue?period=day", {})),
+    Endpoint("GET /analytics/members", lambda club: ("GET", "/analytics/members", {})),
+    Endpoint("GET /analytics/members?by=trainer", lambda club: ("GET", "/analytics/members?by=trainer", {})),
+    Endpoint("GET /trainers", lambda club: ("GET", "/trainers", {})),
+    Endpoint("GET /groups", lambda club: ("GET", "/groups", {})),
+    Endpoint("GET /periods", lambda club: ("GET", "/periods", {})),
+    Endpoint("GET /payments", lambda club: ("GET", "/payments", {})),
+    Endpoint("GET /freezeSettings", lambda club: ("GET", "/freezeSettings", {})),
+    Endpoint("GET /trainers/{id}/clients", lambda club: ("GET", f"/trainers/{club.rnd.choice(club.trainers)}/clients", {})),
+    Endpoint("GET /groups/{id}/clients", lambda club: (
+        "GET", f"/groups/{club.groups[club.rnd.randrange(len(club.groups))][0]}/clients", {},
+    )),
+    Endpoint("GET /schedule", lambda club: ("GET", "/schedule", {})),
+    Endpoint("GET /api/cache", lambda club: ("GET", "/api/cache", {})),
+    Endpoint("GET /metrics", lambda club: ("GET", "/metrics", {})),
+
+    Endpoint("POST /clients", lambda club: ("POST", "/clients", {"json": client_body(club, group=club.group_name())}),
+             keep_client),
+    Endpoint("PUT /clients/{id}", lambda club: ("PUT", f"/clients/{club.client_id()}", {"json": client_body(club)})),
+    Endpoint("POST /clients/batch", lambda club: ("POST", "/clients/batch", {"json": {"items": [
+        {"id": club.client_id(), "comment": f"Пакет {club.next()}"} for _ in range(50)
+    ]}})),
+    Endpoint("POST /clients/import", lambda club: (
+        "POST", "/clients/import", {"files": {"file": ("clients.csv", import_csv(club), "text/csv")}},
+    )),
+    Endpoint("POST /clients/{id}/visits", lambda club: (
+        "POST", f"/clients/{club.client_id()}/visits", {"json": {"visit_date": new_visit_date(club)}},
+    ), keep_visit),
+    Endpoint("DELETE /clients/{id}/visits/{date}", lambda club: (
+        "DELETE", "/clients/{}/visits/{}".format(*club.visits.pop()), {},
+    )),
+    Endpoint("POST /visits/batch", lambda club: (
+        "POST", "/visits/batch", {"json": {"group": club.group_name(), "visit_date": new_visit_date(club)}},
+    )),
+    Endpoint("DELETE /clients/{id}", lambda club: ("DELETE", f"/clients/{club.created['clients'].pop()}", {}),
+             keep_archived),
+    Endpoint("GET /clients/archive", lambda club: ("GET", "/clients/archive?limit=50", {})),
+    Endpoint("GET /clients/archive?q=", lambda club: ("GET", f"/clients/archive?q={club.rnd.choice(NAMES)[:3]}", {})),
+    Endpoint("POST /clients/{id}/restore", lambda club: ("POST", f"/clients/{club.archived.pop()}/restore", {})),
+    *reference_endpoints(
+        "trainers", lambda club: {"name": f"Тренер замера {club.next()}", "phone": "+996 555 111 111"},
+        lambda body: {**body, "name": body["name"] + " (переим.)"},
+    ),
+    *reference_endpoints(
+        "groups", lambda club: {"name": f"Группа замера {club.next()}", "days": "Пн,Ср,Пт", "time_start": "19:00"},
+        lambda body: {**body, "days": "Вт,Чт"},
+    ),
+    *reference_endpoints(
+        "periods", lambda club: {"label": "Замер", "value": f"bench-{club.next()}", "months": 1, "price": 3000, "trainings": 12},
+        lambda body: {**body, "price": 3500},
+    ),
+    *reference_endpoints(
+        "payments", lambda club: {"label": "Замер", "value": f"bench-{club.next()}", "type": "card", "banks": ["Оптима"]},
+        lambda body: {**body, "banks": ["Оптима", "Демир"]},
+    ),
+    *reference_endpoints(
+        "freezeSettings", lambda club: {"maxDays": 30, "reasons": ["Болезнь"], "requireConfirm": False},
+        lambda body: {**body, "maxDays": 45},
+    ),
+    Endpoint("POST /scheduler/run", lambda club: ("POST", "/scheduler/run", {}), heavy=True),
+    Endpoint("POST /analytics/rebuild", lambda club: ("POST", "/analytics/rebuild", {}), heavy=True),
+]
+
+# Смешанная нагрузка: вкладки администраторов листают, ищут и отмечают посещения
+LOAD_MIX = [
+    ("GET /clients/page", 20), ("GET /clients/page, активные по end_date", 10), ("GET /clients/search", 15),
+    ("GET /clients/{id}", 10), ("GET /trainers", 5), ("GET /groups", 5), ("GET /groups/{id}/clients", 5),
+    ("GET /schedule", 5), ("GET /analytics/revenue", 5),
+    ("PUT /clients/{id}", 10), ("POST /clients/{id}/visits", 10),
+]
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "after_cursor_execute", self)
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def calibrate(rounds=7):
+    # Одна и та же работа без приложения: SQLite и json. Отношение этого времени
+    # в двух замерах — поправка на разную скорость машины или её соседей
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, amount REAL)")
+    conn.executemany("INSERT INTO t VALUES (?, ?, ?)", ((i, f"Клиент {i}", i * 1.5) for i in range(20_000)))
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        rows = conn.execute("SELECT id, name, amount FROM t WHERE amount > 100 ORDER BY name").fetchall()
+        json.loads(json.dumps([{"id": i, "name": name, "amount": amount} for i, name, amount in rows], ensure_ascii=False))
+        timings.append(time.perf_counter() - started)
+    conn.close()
+    return min(timings) * 1000
+
+
+def rss_mib():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def peak_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def send(http, club, endpoint):
+    method, url, kwargs = endpoint.build(club)
+    started = time.perf_counter()
+    response = await http.request(method, url, **kwargs)
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise RuntimeError(f"{endpoint.name}: {method} {url} -> {response.status_code} {response.text[:200]}")
+    if endpoint.keep is not None:
+        endpoint.keep(club, response)
+    return elapsed, response
+
+
+async def measure_endpoints(http, club, repeats):
+    counter = StatementCounter()
+    results = {}
+    for endpoint in ENDPOINTS:
+        count = HEAVY_REPEATS if endpoint.heavy else repeats
+        timings, statements, sizes = [], [], []
+        for index in range(WARMUP + count):
+            before = counter.count
+            elapsed, response = await send(http, club, endpoint)
+            if index >= WARMUP:
+                timings.append(elapsed)
+                statements.append(counter.count - before)
+                sizes.append(len(response.content))
+        results[endpoint.name] = {
+            "min_ms": round(min(timings) * 1000, 3),
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "statements": int(statistics.median(statements)),
+            "bytes": int(statistics.median(sizes)),
+            "count": count,
+        }
+        print(f"{endpoint.name:<42} {results[endpoint.name]['p50_ms']:>9.2f} {results[endpoint.name]['p95_ms']:>9.2f} "
+              f"{results[endpoint.name]['statements']:>6} {results[endpoint.name]['bytes']:>10}")
+    return results
+
+
+async def run_load(http, club, concurrency, seconds):
+    by_name = {endpoint.name: endpoint for endpoint in ENDPOINTS}
+    names = [name for name, _ in LOAD_MIX]
+    weights = [weight for _, weight in LOAD_MIX]
+    timings, errors = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            try:
+                elapsed, _ = await send(http, club, by_name[club.rnd.choices(names, weights)[0]])
+                timings.append(elapsed)
+            except RuntimeError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "throughput": round(len(timings) / elapsed, 1),
+        "p50_ms": round(percentile(timings, 0.5), 3),
+        "p95_ms": round(percentile(timings, 0.95), 3),
+        "p99_ms": round(percentile(timings, 0.99), 3),
+    }
+
+
+def prepare(size, seed, db=None):
+    # Генератор — отдельный процесс, чтобы его память не попала в пиковый RSS
+    source = db or os.path.join(WORKDIR, "generated.db")
+    if db is None:
+        subprocess.run([sys.executable, "-m", "bench.generate", "--size", str(size), "--out", source, "--seed", str(seed)],
+                       cwd=BACKEND_DIR, check=True, stdout=subprocess.DEVNULL)
+    engine.dispose()
+    shutil.copy(source, DB_PATH)
+    return load_club(DB_PATH, seed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_suite(args):
+    club = prepare(args.size, args.seed, args.db)
+    calibration = calibrate()
+    print(f"база {args.size}: {len(club.clients)} клиентов, {len(club.trainers)} тренеров, {len(club.groups)} групп")
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as http:
+        print(f"\n{'маршрут':<42} {'p50, мс':>9} {'p95, мс':>9} {'SQL':>6} {'байт':>10}")
+        endpoints = await measure_endpoints(http, club, args.repeats)
+        load = await run_load(http, club, args.concurrency, args.seconds)
+    calibration = min(calibration, calibrate())
+    print(f"\nнагрузка, {args.concurrency} задач: {load['throughput']} запр/с, p50 {load['p50_ms']:.1f} мс, "
+          f"p95 {load['p95_ms']:.1f} мс, p99 {load['p99_ms']:.1f} мс, ошибок {load['errors']}")
+    result = {
+        "meta": {
+            "size": args.size, "clients": len(club.clients), "seed": args.seed, "repeats": args.repeats,
+            "concurrency": args.concurrency, "seconds": args.seconds, "commit": git_commit(),
+            "created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version, "machine": platform.machine(), "cpus": os.cpu_count(),
+            "calibration_ms": round(calibration, 3),
+        },
+        "endpoints": endpoints,
+        "load": load,
+        "rss_mib": round(rss_mib(), 1),
+        "peak_rss_mib": round(max(peak_rss_mib(), rss_mib()), 1),
+    }
+    print(f"RSS {result['rss_mib']} МиБ, пиковый {result['peak_rss_mib']} МиБ")
+    return result
+
+
+# --- Сравнение ---
+def slower(base, current, threshold, min_ms):
+    return current > base * (1 + threshold) and current - base > min_ms
+
+
+def scaled(result, factor):
+    endpoints = {
+        name: {**values, **{key: values[key] * factor for key in ("min_ms", "p50_ms", "p95_ms", "p99_ms")}}
+        for name, values in result["endpoints"].items()
+    }
+    load = {**result["load"], "throughput": result["load"]["throughput"] / factor,
+            **{key: result["load"][key] * factor for key in ("p50_ms", "p95_ms", "p99_ms")}}
+    return {**result, "endpoints": endpoints, "load": load}
+
+
+def compare(base, current, threshold, min_ms, normalize=False):
+    if base["meta"]["clients"] != current["meta"]["clients"]:
+        raise ValueError(f"Baseline has {base['meta']['clients']} clients, current run {current['meta']['clients']}")
+    if normalize:
+        # Текущий замер приводится к скорости машины базового
+        factor = base["meta"]["calibration_ms"] / current["meta"]["calibration_ms"]
+        print(f"калибровка: {base['meta']['calibration_ms']:.1f} -> {current['meta']['calibration_ms']:.1f} мс, "
+              f"время текущего замера умножено на {factor:.2f}")
+        current = scaled(current, factor)
+    regressions = []
+    print(f"\n{'маршрут':<42} {'p50 было':>9} {'стало':>9} {'p95 было':>9} {'стало':>9} {'SQL':>9}")
+    for name, before in base["endpoints"].items():
+        after = current["endpoints"].get(name)
+        if after is None:
+            print(f"{name:<42} нет в текущем замере")
+            continue
+        # p95 из пары десятков повторов слишком шумный для порога, он только печатается.
+        # Замедлением считается рост и медианы, и лучшего времени: соседи по машине
+        # сдвигают медиану, но редко — все повторы сразу
+        reasons = []
+        if slower(before["p50_ms"], after["p50_ms"], threshold, min_ms) and \
+                slower(before["min_ms"], after["min_ms"], threshold, min_ms):
+            reasons.append(f"p50 {before['p50_ms']:.1f} -> {after['p50_ms']:.1f} мс, "
+                           f"лучшее {before['min_ms']:.1f} -> {after['min_ms']:.1f} мс")
+        if after["statements"] > before["statements"]:
+            reasons.append(f"SQL {before['statements']} -> {after['statements']}")
+        print(f"{name:<42} {before['p50_ms']:>9.2f} {after['p50_ms']:>9.2f} {before['p95_ms']:>9.2f} {after['p95_ms']:>9.2f} "
+              f"{before['statements']:>4}->{after['statements']:<4}{'  РЕГРЕССИЯ' if reasons else ''}")
+        regressions += [f"{name}: {reason}" for reason in reasons]
+
+    before, after = base["load"], current["load"]
+    if after["throughput"] < before["throughput"] * (1 - threshold):
+        regressions.append(f"нагрузка: {before['throughput']} -> {after['throughput']} запр/с")
+    if slower(before["p95_ms"], after["p95_ms"], threshold, min_ms):
+        regressions.append(f"нагрузка: p95 {before['p95_ms']:.1f} -> {after['p95_ms']:.1f} мс")
+    if after["errors"] > before["errors"]:
+        regressions.append(f"нагрузка: ошибок {before['errors']} -> {after['errors']}")
+    if current["peak_rss_mib"] > base["peak_rss_mib"] * (1 + threshold):
+        regressions.append(f"пиковый RSS {base['peak_rss_mib']} -> {current['peak_rss_mib']} МиБ")
+    print(f"\nнагрузка: {before['throughput']} -> {after['throughput']} запр/с, "
+          f"пиковый RSS {base['peak_rss_mib']} -> {current['peak_rss_mib']} МиБ")
+    return regressions
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="50k", help="1k, 50k, 500k или число клиентов")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", help="готовая база из bench.generate вместо новой")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--out", help="куда записать результат (по умолчанию bench-<size>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="сравнить с базовым замером")
+    parser.add_argument("--current", help="готовый замер для сравнения вместо нового прогона")
+    parser.add_argument("--threshold", type=float, default=0.5, help="допустимое замедление, доля")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="замедление меньше этого — шум")
+    parser.add_argument("--normalize", action="store_true", help="поправить время на калибровку (замеры с разных машин)")
+    args = parser.parse_args()
+
+    base = None
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        # Без явных параметров прогон повторяет базовый
+        defaults = parser.parse_args([])
+        for key in ("size", "seed", "repeats", "concurrency", "seconds"):
+            if getattr(args, key) == getattr(defaults, key):
+                setattr(args, key, base["meta"][key])
+
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = asyncio.run(run_suite(args))
+        out = args.out or (None if base else f"bench-{args.size}.json")
+        if out:
+            with open(out, "w") as f:
+                json.dump(current, f, ensure_ascii=False, indent=2)
+            print(f"записано в {out}")
+
+    if base is not None:
+        regressions = compare(base, current, args.threshold, args.min_ms, args.normalize)
+        if regressions:
+            print("\nРегрессии:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nРегрессий нет")
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,147 @@
+"""Сто клубов в одном процессе: память и задержки реестра движков (tenancy.py).
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m bench.tenancy [--tenants 100] [--clients 500] [--max-engines 32] [--requests 3000]
+
+1. Заведение баз клубов и первый запрос к каждому (открытие движка и
+   проверка схемы).
+2. Равномерная нагрузка по всем клубам при лимите открытых движков меньше
+   их числа — худший случай для LRU — и перекошенная (80% запросов к 20%
+   клубов), как в жизни: крупные клубы работают весь день.
+3. То же без вытеснения (лимит = числу клубов) — сколько памяти стоит
+   держать открытыми все базы.
+Для каждого режима: p50/p95/p99, вытеснения, открытые движки и соединения,
+RSS процесса. Лимиты движков и соединений проверяются в tests/test_tenancy.py.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+TENANT_DIR = tempfile.mkdtemp()
+os.environ["TENANT_DATABASE_URL"] = f"sqlite:///{TENANT_DIR}/{{tenant}}.db"
+os.environ["DATABASE_URL"] = f"sqlite:///{TENANT_DIR}/unused.db"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+os.environ["SCHEDULER"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from bench.concurrency import percentile  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from tenancy import registry  # noqa: E402
+
+URLS = ("/clients/page?limit=50", "/trainers", "/clients/search?q=ива", "/analytics/members")
+
+
+def rss_mib():
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def tenant_name(index):
+    return f"club{index:03d}"
+
+
+def provision(tenants, clients):
+    started = time.perf_counter()
+    for index in range(tenants):
+        name = tenant_name(index)
+        registry.create(name)
+        seed_clients(registry._path(name), clients, seed=index)
+    return time.perf_counter() - started
+
+
+def request(client, tenant, url):
+    started = time.perf_counter()
+    response = client.get(url, headers={"X-Tenant": tenant})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def run_load(names, pick, requests, threads):
+    # У каждого потока свой TestClient; соединения считаются по ходу нагрузки
+    timings, lock = [], threading.Lock()
+    peak = {"connections": 0, "open": 0}
+
+    def worker(seed):
+        rnd = random.Random(seed)
+        client = TestClient(main.app)
+        local = []
+        for _ in range(requests // threads):
+            local.append(request(client, pick(rnd, names), rnd.choice(URLS)))
+            stats = registry.stats()
+            with lock:
+                peak["connections"] = max(peak["connections"], stats["connections"])
+                peak["open"] = max(peak["open"], stats["open"])
+        with lock:
+            timings.extend(local)
+
+    evicted = registry.evicted
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return timings, registry.evicted - evicted, peak
+
+
+def uniform(rnd, names):
+    return rnd.choice(names)
+
+
+def skewed(rnd, names):
+    hot = names[:max(1, len(names) // 5)]
+    return rnd.choice(hot) if rnd.random() < 0.8 else rnd.choice(names)
+
+
+def report(label, timings, evicted, peak):
+    ms = [t * 1000 for t in timings]
+    print(f"{label:<34} {percentile(timings, 0.5):>7.1f} {percentile(timings, 0.95):>7.1f} {percentile(timings, 0.99):>7.1f} "
+          f"{max(ms):>8.1f} {evicted:>8} {peak['open']:>6} {peak['connections']:>6} {rss_mib():>8.0f}")
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenants", type=int, default=100)
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--max-engines", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    baseline = rss_mib()
+    seconds = provision(args.tenants, args.clients)
+    names = [tenant_name(index) for index in range(args.tenants)]
+    print(f"{args.tenants} клубов по {args.clients} клиентов заведено за {seconds:.1f} с; RSS без клубов {baseline:.0f} МиБ")
+    print(f"лимит движков {args.max_engines}, соединений на клуб до {registry.pool_size + registry.max_overflow}, "
+          f"потоков {args.threads}")
+
+    registry.max_engines = args.max_engines
+    client = TestClient(main.app)
+    print(f"\n{'режим':<34} {'p50':>7} {'p95':>7} {'p99':>7} {'max, мс':>8} {'вытесн.':>8} {'движк.':>6} {'соед.':>6} {'RSS, МиБ':>8}")
+    evicted = registry.evicted
+    cold = [request(client, name, URLS[0]) for name in names]
+    report("первый запрос к каждому клубу", cold, registry.evicted - evicted, registry.stats())
+    warm = [request(client, names[0], URLS[0]) for _ in range(200)]
+    report("один клуб, движок открыт", warm, 0, registry.stats())
+
+    for label, pick in (("равномерно по всем клубам", uniform), ("80% запросов к 20% клубов", skewed)):
+        timings, evicted, peak = run_load(names, pick, args.requests, args.threads)
+        report(label, timings, evicted, peak)
+
+    registry.max_engines = args.tenants
+    run_load(names, uniform, args.tenants * 2, 1)
+    timings, evicted, peak = run_load(names, uniform, args.requests, args.threads)
+    report(f"без вытеснения (лимит {args.tenants})", timings, evicted, peak)
+    registry.dispose()
+    print(f"\nВсе движки закрыты: RSS {rss_mib():.0f} МиБ")
+
+
+if __name__ == "__main__":
+    main_bench()
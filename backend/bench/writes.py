@@ -0,0 +1,220 @@
+"""Запись одним запросом: INSERT/UPDATE ... RETURNING и версии строк с If-Match.
+
+Запуск из каталога backend (нужны uvicorn и httpx):
+    python -m bench.writes [--writers 8] [--seconds 10] [--hot 10]
+    DB_PROFILE=production python -m bench.writes   # разделы 1-2 без fsync на каждый коммит
+
+1. Число SQL-запросов на каждый обработчик записи (TestClient в процессе).
+2. Правка клиента на уровне БД: прежний путь ORM (SELECT, setattr, commit,
+   refresh) против одного UPDATE ... RETURNING — запросов и правок в секунду.
+3. Пропускная способность PUT /clients/{id} с If-Match на реальном uvicorn
+   (профиль production), несколько писателей по случайным клиентам.
+4. Потерянные правки: писатели увеличивают total_sessions у нескольких
+   «горячих» клиентов. Без If-Match часть приращений теряется, с If-Match
+   писатель получает 412, перечитывает клиента и повторяет.
+Пределы числа запросов и отсутствие потерь с If-Match проверяются в
+tests/test_writes.py.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["LOG_LEVEL"] = "WARNING"
+os.environ["INSTRUMENTATION"] = "0"
+os.environ["SCHEDULER"] = "0"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+import main  # noqa: E402
+import models  # noqa: E402
+from bench.concurrency import percentile, prepare_database, start_server  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from writes import update_statement  # noqa: E402
+
+CLIENT = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00", "trainer": "Тренер", "group": "Взрослые"}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+        event.listen(engine, "after_cursor_execute", self)
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+# --- 1. Запросы на обработчик ---
+def measure_statements(client, counter):
+    def count(method, url, body, **headers):
+        counter.count = 0
+        response = client.request(method, url, json=body, headers=headers)
+        return counter.count, response.json()
+
+    trainer = client.post("/trainers", json={"name": "Тренер"}).json()
+    group = client.post("/groups", json={"name": "Взрослые", "days": "Пн,Ср", "trainer_id": trainer["id"]}).json()
+    rows = []
+    statements, created = count("POST", "/clients", CLIENT)
+    rows.append(("POST /clients", statements, 1))
+    statements, _ = count("PUT", f"/clients/{created['id']}", {**created, "comment": "правка"}, **{"If-Match": '"1"'})
+    rows.append(("PUT /clients/{id}", statements, 1))
+    statements, _ = count("PUT", f"/clients/{created['id']}", {**created, "trainer": "Тренер 2"})
+    rows.append(("PUT /clients/{id}, смена тренера", statements, 1))
+    statements, period = count("POST", "/periods", {"label": "Месяц", "value": "1m", "months": 1, "price": 3000, "trainings": 12})
+    rows.append(("POST /periods", statements, 1))
+    statements, _ = count("PUT", f"/periods/{period['id']}", {**period, "price": 3500})
+    rows.append(("PUT /periods/{id}", statements, 1))
+    statements, payment = count("POST", "/payments", {"label": "Карта", "value": "card", "type": "card", "banks": ["Сбер"]})
+    rows.append(("POST /payments", statements, 1))
+    statements, _ = count("PUT", f"/payments/{payment['id']}", {**payment, "label": "Банковская карта"})
+    rows.append(("PUT /payments/{id}", statements, 1))
+    # Тренеры и группы дополнительно сверяют имена у клиентов и дни занятий
+    statements, _ = count("PUT", f"/trainers/{trainer['id']}", {"name": "Тренер Иванов"})
+    rows.append(("PUT /trainers/{id}", statements, 3))
+    statements, _ = count("PUT", f"/groups/{group['id']}", {**group, "days": "Вт,Чт"})
+    rows.append(("PUT /groups/{id}", statements, 6))
+
+    print(f"{'обработчик':<36} {'SQL':>4} {'ожидается':>10}")
+    for label, statements, expected in rows:
+        print(f"{label:<36} {statements:>4} {expected:>10}")
+    # 412 и 404 — ещё один SELECT, только на неуспешном пути
+    counter.count = 0
+    response = client.put(f"/clients/{created['id']}", json=created, headers={"If-Match": '"1"'})
+    print(f"{'PUT /clients/{id}, устаревший If-Match':<36} {counter.count:>4} {response.status_code:>10}")
+
+
+# --- 2. Правка на уровне БД ---
+def legacy_update(db, client_id, values):
+    db_client = db.query(models.Client).filter(models.Client.id == client_id).first()
+    for key, value in values.items():
+        setattr(db_client, key, value)
+    db.commit()
+    db.refresh(db_client)
+    return db_client
+
+
+def returning_update(db, client_id, values):
+    row = db.execute(update_statement(models.Client.__table__, client_id, values)).one()
+    db.commit()
+    return row
+
+
+def measure_db(counter, operations):
+    rnd = random.Random(0)
+    print(f"\n{'правка в БД':<22} {'правок/с':>9} {'SQL на правку':>14}")
+    for label, func in (("SELECT + refresh", legacy_update), ("UPDATE ... RETURNING", returning_update)):
+        ids = [rnd.randint(1, 20_000) for _ in range(operations)]
+        with SessionLocal() as db:
+            counter.count = 0
+            started = time.perf_counter()
+            for index, client_id in enumerate(ids):
+                func(db, client_id, {"comment": f"правка {index}", "paid": index % 2 == 0})
+            elapsed = time.perf_counter() - started
+        print(f"{label:<22} {operations / elapsed:>9.0f} {counter.count / operations:>14.1f}")
+
+
+# --- 3 и 4. Реальный сервер ---
+def run_writers(base_url, writers, seconds, pick, if_match):
+    lock = threading.Lock()
+    stats = {"ok": 0, "conflicts": 0, "errors": 0, "timings": [], "increments": {}}
+    deadline = time.perf_counter() + seconds
+
+    def writer(seed):
+        rnd = random.Random(seed)
+        known = {}
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            while time.perf_counter() < deadline:
+                client_id = pick(rnd)
+                if client_id not in known:
+                    known[client_id] = http.get(f"/clients/{client_id}").json()
+                row = known[client_id]
+                body = {**row, "total_sessions": (row["total_sessions"] or 0) + 1}
+                headers = {"If-Match": f'"{row["version"]}"'} if if_match else {}
+                started = time.perf_counter()
+                response = http.put(f"/clients/{client_id}", json=body, headers=headers)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if response.status_code == 200:
+                        stats["ok"] += 1
+                        stats["timings"].append(elapsed)
+                        stats["increments"][client_id] = stats["increments"].get(client_id, 0) + 1
+                    elif response.status_code == 412:
+                        stats["conflicts"] += 1
+                    else:
+                        stats["errors"] += 1
+                if response.status_code == 200:
+                    known[client_id] = response.json()
+                else:
+                    # Чужая правка: перечитать клиента и повторить на свежей версии
+                    known.pop(client_id, None)
+
+    threads = [threading.Thread(target=writer, args=(seed,)) for seed in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return stats
+
+
+def lost_updates(http, before, stats):
+    lost = 0
+    for client_id, increments in stats["increments"].items():
+        after = http.get(f"/clients/{client_id}").json()["total_sessions"] or 0
+        lost += before[client_id] + increments - after
+    return lost
+
+
+def measure_server(args):
+    db_path = os.path.join(tempfile.mkdtemp(), "server.db")
+    prepare_database(db_path)
+    proc, base_url = start_server(db_path, "production", args.port)
+    try:
+        with httpx.Client(base_url=base_url, timeout=30) as http:
+            spread = run_writers(base_url, args.writers, args.seconds, lambda rnd: rnd.randint(1, 50_000), True)
+            timings = spread["timings"]
+            print(f"\nPUT с If-Match, {args.writers} писателей, случайные клиенты: {spread['ok'] / args.seconds:.0f} правок/с, "
+                  f"p50 {percentile(timings, 0.5):.1f} мс, p95 {percentile(timings, 0.95):.1f} мс, "
+                  f"412: {spread['conflicts']}, ошибок: {spread['errors']}")
+
+            print(f"\n{args.hot} горячих клиентов, {args.writers} писателей увеличивают total_sessions:")
+            print(f"{'режим':<12} {'правок':>7} {'412':>6} {'ошибок':>7} {'потеряно':>9}")
+            hot = list(range(1, args.hot + 1))
+            for label, if_match in (("без If-Match", False), ("с If-Match", True)):
+                before = {client_id: http.get(f"/clients/{client_id}").json()["total_sessions"] or 0 for client_id in hot}
+                stats = run_writers(base_url, args.writers, args.seconds, lambda rnd: rnd.choice(hot), if_match)
+                lost = lost_updates(http, before, stats)
+                print(f"{label:<12} {stats['ok']:>7} {stats['conflicts']:>6} {stats['errors']:>7} {lost:>9}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main_bench():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--hot", type=int, default=10)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    seed_clients(DB_PATH, 20_000)
+    engine.dispose()
+    counter = StatementCounter()
+    measure_statements(TestClient(main.app), counter)
+    measure_db(counter, args.operations)
+    measure_server(args)
+
+
+if __name__ == "__main__":
+    main_bench()
@@ -0,0 +1,195 @@
+import csv
+import io
+import logging
+import tempfile
+from datetime import date
+from decimal import Decimal
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+import models
+from rosters import LINKS, resolve_links_many
+from schemas import ClientCreate
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+EXPORT_BATCH_SIZE = 1000
+CSV_DELIMITER = ";"  # Excel с русской локалью ожидает точку с запятой
+
+EXPORT_COLUMNS = [column.name for column in models.Client.__table__.columns]
+
+logger = logging.getLogger(__name__)
+
+
+# --- Импорт ---
+def iter_csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+    sample = text.read(8192)
+    text.seek(0)
+    # От Sniffer берётся только разделитель: кавычки он угадывает ненадёжно
+    # (doublequote=False превращает «""» внутри поля в лишние кавычки)
+    try:
+        delimiter = csv.Sniffer().sniff(sample, delimiters=";,\t").delimiter
+    except csv.Error:
+        delimiter = csv.excel.delimiter
+    reader = csv.reader(text, csv.excel, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip() for name in header]
+    for values in reader:
+        yield dict(zip(header, values))
+
+
+def iter_xlsx_rows(fileobj):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(name).strip() if name is not None else "" for name in header]
+        for values in rows:
+            yield dict(zip(header, map(_xlsx_value, values)))
+    finally:
+        workbook.close()
+
+
+def _xlsx_value(value):
+    # Телефоны и номера договоров Excel хранит числами, схема ждёт строки
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _clean(raw):
+    # Пустые ячейки не передаются, чтобы сработали значения по умолчанию схемы
+    return {key: value for key, value in raw.items() if key and value is not None and value != ""}
+
+
+def _link_field(detail):
+    # resolve_links_many сообщает «Unknown trainer_id: 5»
+    return next((id_field for id_field, _, _ in LINKS if detail.startswith(f"Unknown {id_field}:")), None)
+
+
+def import_clients(db, rows):
+    # Каждая пачка — своя транзакция. Ссылки на справочники проверяются так же,
+    # как при создании клиента; строки с неизвестным id и пачка, которую
+    # отвергла база, попадают в отчёт, уже записанные пачки остаются
+    inserted = 0
+    failed = 0
+    errors = []
+    chunk = []
+
+    def report(row_number, row_errors):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "errors": row_errors})
+
+    def flush():
+        nonlocal inserted
+        if not chunk:
+            return
+        try:
+            link_failures = resolve_links_many(db, [values for _, values in chunk])
+            valid = [values for index, (_, values) in enumerate(chunk) if index not in link_failures]
+            if valid:
+                db.execute(insert(models.Client), valid)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.exception("Import chunk failed")
+            message = str(getattr(e, "orig", None) or e)
+            for row_number, _ in chunk:
+                report(row_number, [{"field": None, "message": message}])
+        else:
+            for index, detail in sorted(link_failures.items()):
+                report(chunk[index][0], [{"field": _link_field(detail), "message": detail}])
+            inserted += len(valid)
+        chunk.clear()
+
+    # Строка 1 — заголовок, данные начинаются со второй, как в Excel
+    for row_number, raw in enumerate(rows, start=2):
+        if not any(value not in (None, "") for value in raw.values()):
+            continue
+        try:
+            chunk.append((row_number, ClientCreate(**_clean(raw)).dict()))
+        except ValidationError as e:
+            report(row_number, [
+                {"field": ".".join(str(p) for p in err["loc"]), "message": err["msg"]} for err in e.errors()
+            ])
+            continue
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            flush()
+    flush()
+    return {"inserted": inserted, "failed": failed, "errors": errors, "errors_truncated": failed > len(errors)}
+
+
+# --- Экспорт ---
+def _export_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+def _export_rows(session_factory):
+    # Каждая пачка читается в своей короткой транзакции по ключу id: открытое
+    # чтение в режиме rollback journal держит SHARED-блокировку, и медленный
+    # клиент задерживал бы коммиты всех записей до конца скачивания
+    table = models.Client.__table__
+    stmt = select(*[table.c[name] for name in EXPORT_COLUMNS]).order_by(table.c.id).limit(EXPORT_BATCH_SIZE)
+    last_id = None
+    while True:
+        with session_factory() as db:
+            partition = db.execute(stmt if last_id is None else stmt.where(table.c.id > last_id)).all()
+        if not partition:
+            return
+        yield partition
+        if len(partition) < EXPORT_BATCH_SIZE:
+            return
+        last_id = partition[-1].id
+
+
+def export_clients_csv(session_factory):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=CSV_DELIMITER)
+    writer.writerow(EXPORT_COLUMNS)
+    yield "﻿" + buffer.getvalue()
+    for partition in _export_rows(session_factory):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+
+
+def export_clients_xlsx(session_factory):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Клиенты")
+    sheet.append(EXPORT_COLUMNS)
+    for partition in _export_rows(session_factory):
+        for row in partition:
+            sheet.append(list(row))
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    workbook.save(spool)
+    spool.seek(0)
+    try:
+        while True:
+            block = spool.read(64 * 1024)
+            if not block:
+                break
+            yield block
+    finally:
+        spool.close()
@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+
+import orjson
+from sqlalchemy import event, func, select, text
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from schemas import ClientOut, GroupOut, PeriodOut, TrainerOut, payment_out
+
+# Другие воркеры и прямые записи в БД не вызывают after_commit в этом процессе —
+# их изменения вкладки получают не позже чем через интервал опроса
+CHANGES_POLL_INTERVAL = float(os.getenv("CHANGES_POLL_INTERVAL", "2"))
+# Коммиты, пришедшие за это время, уходят во вкладки одним событием
+CHANGES_COALESCE_MS = float(os.getenv("CHANGES_COALESCE_MS", "100"))
+CHANGES_BATCH_LIMIT = int(os.getenv("CHANGES_BATCH_LIMIT", "500"))
+CHANGES_HEARTBEAT = float(os.getenv("CHANGES_HEARTBEAT", "15"))
+
+UPSERT = "upsert"
+DELETE = "delete"
+
+logger = logging.getLogger(__name__)
+
+changes = models.Change.__table__
+
+# Сущность журнала: модель и то, как её отдаёт API
+FEEDS = {
+    "clients": (models.Client, ClientOut.model_validate),
+    "trainers": (models.Trainer, TrainerOut.model_validate),
+    "groups": (models.Group, GroupOut.model_validate),
+    "periods": (models.Period, PeriodOut.model_validate),
+    "payments": (models.Payment, payment_out),
+}
+
+
+# --- Триггеры ---
+def _record_sql(entity, row, op):
+    # Прежняя строка сущности удаляется, новая получает следующий seq: журнал
+    # не растёт от правок одной записи, а повтор с любого since отдаёт её
+    # последнее состояние. Не INSERT OR REPLACE — политику конфликта в триггере
+    # перекрывает внешний INSERT OR IGNORE
+    return (
+        f"DELETE FROM {changes.name} WHERE entity = '{entity}' AND entity_id = {row}.id; "
+        f"INSERT INTO {changes.name} (entity, entity_id, op) VALUES ('{entity}', {row}.id, '{op}')"
+    )
+
+
+def setup_changes(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        for entity, (model, _) in FEEDS.items():
+            table = model.__tablename__
+            for suffix, action, row, op in (("ai", "INSERT", "new", UPSERT), ("au", "UPDATE", "new", UPSERT),
+                                            ("ad", "DELETE", "old", DELETE)):
+                conn.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_changes_{suffix} AFTER {action} ON {table} BEGIN "
+                    f"{_record_sql(entity, row, op)}; END"
+                ))
+
+
+# --- Чтение ---
+def current_cursor(db):
+    return db.execute(select(func.coalesce(func.max(changes.c.seq), 0))).scalar()
+
+
+def read_changes(db, since=None, limit=CHANGES_BATCH_LIMIT):
+    # Без since — только курсор: вкладка берёт его до загрузки списков,
+    # повтор изменений поверх свежего списка безопасен
+    if since is None:
+        return {"cursor": current_cursor(db), "more": False, "reset": False, "upserts": {}, "deletes": {}}
+    rows = db.execute(
+        select(changes.c.seq, changes.c.entity, changes.c.entity_id, changes.c.op)
+        .where(changes.c.seq > since).order_by(changes.c.seq).limit(limit + 1)
+    ).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        cursor = current_cursor(db)
+        return {"cursor": cursor, "more": False, "reset": since > cursor, "upserts": {}, "deletes": {}}
+
+    upsert_ids, deletes = {}, {}
+    for row in rows:
+        if row.op == DELETE:
+            deletes.setdefault(row.entity, []).append(row.entity_id)
+        else:
+            upsert_ids.setdefault(row.entity, []).append(row.entity_id)
+    upserts = {}
+    for entity, ids in upsert_ids.items():
+        model, serialize = FEEDS[entity]
+        upserts[entity] = [
+            serialize(item).model_dump(mode="json")
+            for item in db.scalars(select(model).where(model.id.in_(ids)).order_by(model.id))
+        ]
+    return {"cursor": rows[-1].seq, "more": more, "reset": False, "upserts": upserts, "deletes": deletes}
+
+
+def encode_changes(batch):
+    return orjson.dumps(batch)
+
+
+# --- Поток для вкладок (SSE) ---
+class ChangeFeed:
+    # Подписчик — это курсор и флаг «есть новое», очереди событий нет: медленная
+    # вкладка при следующем чтении получает одну свёрнутую пачку до лимита
+    def __init__(self, session_factory=SessionLocal, poll_interval=CHANGES_POLL_INTERVAL,
+                 coalesce_ms=CHANGES_COALESCE_MS, heartbeat=CHANGES_HEARTBEAT, limit=CHANGES_BATCH_LIMIT, tenant=None):
+        self.session_factory = session_factory
+        self.tenant = tenant
+        self.poll_interval = poll_interval
+        self.coalesce = coalesce_ms / 1000
+        self.heartbeat = heartbeat
+        self.limit = limit
+        self.cursor = 0
+        self._subscribers = set()
+        self._loop = None
+        self._wake = asyncio.Event()
+        self._task = None
+        self._read_lock = asyncio.Lock()
+        self._last_batch = None
+        self._retired = False
+
+    @property
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def notify(self, session=None):
+        # after_commit в потоке обработчика: будим цикл, журнал он прочитает сам.
+        # Коммиты в базы других клубов (tenancy.py) этот журнал не меняют
+        if session is not None and session.info.get("tenant") != self.tenant:
+            return
+        if self._loop is not None and self._subscribers:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def _in_thread(self, func, *args):
+        # run_in_executor не копирует contextvars: чтения потока не складываются
+        # в метрики одного бесконечного HTTP-запроса
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _read(self, since):
+        with self.session_factory() as db:
+            return read_changes(db, since, self.limit)
+
+    def _read_cursor(self):
+        with self.session_factory() as db:
+            return current_cursor(db)
+
+    async def _watch(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(self.coalesce)
+            self._wake.clear()
+            if not self._subscribers:
+                continue
+            try:
+                cursor = await self._in_thread(self._read_cursor)
+            except Exception:
+                logger.exception("Change feed poll failed")
+                continue
+            if cursor != self.cursor:
+                self.cursor = cursor
+                for pending in self._subscribers:
+                    pending.set()
+
+    async def read(self, since):
+        # Вкладки с одинаковым курсором получают одну и ту же пачку
+        async with self._read_lock:
+            key = (since, self.cursor)
+            if self._last_batch is not None and self._last_batch[0] == key:
+                return self._last_batch[1]
+            batch = await self._in_thread(self._read, since)
+            self._last_batch = (key, batch)
+            return batch
+
+    async def stream(self, since):
+        if since is None:
+            since = await self._in_thread(self._read_cursor)
+        pending = asyncio.Event()
+        pending.set()
+        # Журнал вытесненного клуба мог уже остановиться, пока открывался поток
+        if self._retired and self._task is None:
+            self.start()
+        self._subscribers.add(pending)
+        try:
+            yield f"retry: {int(self.poll_interval * 1000)}\n\n".encode()
+            while True:
+                try:
+                    await asyncio.wait_for(pending.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                pending.clear()
+                batch = await self.read(since)
+                if batch["upserts"] or batch["deletes"] or batch["reset"]:
+                    since = batch["cursor"]
+                    yield b"id: %d\nevent: changes\ndata: %s\n\n" % (since, encode_changes(batch))
+                if batch["more"]:
+                    pending.set()
+        finally:
+            self._subscribers.discard(pending)
+            if self._retired and not self._subscribers:
+                await self.stop()
+
+    def start(self):
+        if self._task is not None:
+            return
+        # Примитивы asyncio привязываются к циклу при первом ожидании: после
+        # перезапуска приложения в новом цикле прежние уже не годятся
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._read_lock = asyncio.Lock()
+        self._last_batch = None
+        event.listen(Session, "after_commit", self.notify)
+        self._task = asyncio.create_task(self._watch())
+
+    def retire(self, on_retire=None):
+        # Из любого потока (вытеснение клуба в tenancy.py). on_retire вызывается
+        # в цикле журнала; журнал останавливается, когда уйдёт последняя вкладка
+        loop = self._loop
+        if loop is None:
+            return
+
+        def close():
+            if on_retire is not None:
+                on_retire()
+            self._retired = True
+            if not self._subscribers:
+                loop.create_task(self.stop())
+
+        loop.call_soon_threadsafe(close)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # Поле сбрасывается до ожидания: start() во время остановки запускает журнал заново
+        task, self._task, self._loop = self._task, None, None
+        event.remove(Session, "after_commit", self.notify)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+change_feed = ChangeFeed()
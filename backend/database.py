@@ -1,10 +1,108 @@
-from sqlalchemy import create_engine
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./crm.db"
+# backend/.env читается до того, как модули приложения возьмут настройки из
+# окружения: database импортируется первым из них (в main, скриптах и CLI).
+# Переменные, заданные в окружении процесса, важнее файла
+load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./crm.db")
+# default — настройки SQLite по умолчанию, production — WAL и тюнинг под конкурентную нагрузку
+DB_PROFILE = os.getenv("DB_PROFILE", "default")
+# sync — обработчики в пуле потоков, async — AsyncSession поверх aiosqlite/asyncpg
+DB_MODE = os.getenv("DB_MODE", "sync")
+
+ENGINE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "pool": {},
+    },
+    "production": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,
+            "cache_size": -64000,  # в КиБ, ~64 МБ
+            "mmap_size": 268435456,
+            "temp_store": "MEMORY",
+        },
+        "pool": {
+            "pool_size": 10,
+            "max_overflow": 20,
+            "pool_timeout": 30,
+        },
+    },
+}
+
+
+if DB_MODE not in ("sync", "async"):
+    raise ValueError(f"Unknown DB_MODE: {DB_MODE}")
+
+
+def engine_options(profile):
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown DB_PROFILE: {profile}")
+    pool = dict(ENGINE_PROFILES[profile]["pool"])
+    for option, env in (("pool_size", "DB_POOL_SIZE"), ("max_overflow", "DB_MAX_OVERFLOW"), ("pool_timeout", "DB_POOL_TIMEOUT")):
+        if os.getenv(env):
+            pool[option] = int(os.getenv(env))
+    return ENGINE_PROFILES[profile]["pragmas"], pool
+
+
+def _apply_pragmas(sync_engine, pragmas):
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+
+def make_engine(url=SQLALCHEMY_DATABASE_URL, profile=DB_PROFILE, **pool_overrides):
+    pragmas, pool = engine_options(profile)
+    pool.update(pool_overrides)
+    is_sqlite = url.startswith("sqlite")
+    new_engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        **pool,
+    )
+    if is_sqlite and pragmas:
+        _apply_pragmas(new_engine, pragmas)
+    return new_engine
+
+
+def async_url(url):
+    for sync_prefix, async_prefix in (
+        ("sqlite:", "sqlite+aiosqlite:"),
+        ("postgresql:", "postgresql+asyncpg:"),
+        ("postgres:", "postgresql+asyncpg:"),
+    ):
+        if url.startswith(sync_prefix):
+            return async_prefix + url[len(sync_prefix):]
+    return url
+
+
+def make_async_engine(url=SQLALCHEMY_DATABASE_URL, profile=DB_PROFILE):
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    pragmas, pool = engine_options(profile)
+    new_engine = create_async_engine(async_url(url), **pool)
+    if url.startswith("sqlite") and pragmas:
+        _apply_pragmas(new_engine.sync_engine, pragmas)
+    return new_engine
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    async_engine = make_async_engine()
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
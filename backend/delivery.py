@@ -0,0 +1,63 @@
+import os
+import stat
+from mimetypes import guess_type
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+# Ответы API сжимаются GZipMiddleware, если тело больше порога
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+
+# Имена файлов в /assets содержат хэш сборки и никогда не меняются
+IMMUTABLE = "public, max-age=31536000, immutable"
+# index.html и прочие файлы без хэша каждый раз сверяются по ETag
+REVALIDATE = "no-cache"
+
+# Порядок — по предпочтению, сжатые копии готовит precompress.py при сборке
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(headers):
+    accepted = set()
+    for item in headers.get("accept-encoding", "").split(","):
+        encoding, _, params = item.partition(";")
+        if params.replace(" ", "") not in ("q=0", "q=0.0"):
+            accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def precompressed_file_response(full_path, stat_result, headers, status_code=200):
+    full_path = str(full_path)
+    accepted = accepted_encodings(headers)
+    media_type = guess_type(full_path)[0] or "text/plain"
+    for encoding, suffix in PRECOMPRESSED:
+        if encoding not in accepted:
+            continue
+        try:
+            sibling_stat = os.stat(full_path + suffix)
+        except OSError:
+            continue
+        if stat.S_ISREG(sibling_stat.st_mode):
+            response = FileResponse(full_path + suffix, status_code=status_code, stat_result=sibling_stat, media_type=media_type)
+            response.headers["Content-Encoding"] = encoding
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+    response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+    response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+class CachedStaticFiles(StaticFiles):
+    def __init__(self, *args, cache_control=REVALIDATE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        request_headers = Headers(scope=scope)
+        response = precompressed_file_response(full_path, stat_result, request_headers, status_code)
+        response.headers["Cache-Control"] = self.cache_control
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,124 @@
+import logging
+from datetime import date
+
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+import models
+from rosters import link_values
+from writes import etag, expected_versions, insert_statement, update_statement, version_statement
+
+# Общее для обработчиков main.py и async_api.py: проверка запроса, сборка
+# запросов, ошибки и ответ. Обработчикам остаются только сессия, await и
+# откат транзакции — так синхронный и асинхронный пути не расходятся.
+
+logger = logging.getLogger(__name__)
+
+clients = models.Client.__table__
+
+
+# --- Ответ ---
+def with_etag(response, row):
+    response.headers["ETag"] = etag(row.version)
+    return row
+
+
+def client_response(request, response, row):
+    if row is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    if request.headers.get("if-none-match") == etag(row.version):
+        return Response(status_code=304, headers={"ETag": etag(row.version)})
+    return with_etag(response, row)
+
+
+# --- Запись с If-Match ---
+def version_error(version, not_found):
+    # UPDATE не вернул строку: записи нет (404) или её версия не совпала с
+    # If-Match (412, в ETag — текущая версия)
+    if version is None:
+        return HTTPException(status_code=404, detail=not_found)
+    return HTTPException(status_code=412, detail="Version mismatch", headers={"ETag": etag(version)})
+
+
+def updated_row(db, table, row_id, values, if_match, not_found):
+    # Один UPDATE ... RETURNING; SELECT версии — только если строка не вернулась
+    row = db.execute(update_statement(table, row_id, values, expected_versions(if_match))).one_or_none()
+    if row is None:
+        version = db.execute(version_statement(table, row_id)).scalar()
+        db.rollback()
+        raise version_error(version, not_found)
+    return row
+
+
+async def updated_row_async(db, table, row_id, values, if_match, not_found):
+    row = (await db.execute(update_statement(table, row_id, values, expected_versions(if_match)))).one_or_none()
+    if row is None:
+        version = (await db.execute(version_statement(table, row_id))).scalar()
+        await db.rollback()
+        raise version_error(version, not_found)
+    return row
+
+
+# --- Клиенты ---
+def client_insert(client):
+    values = client.dict()
+    return values, insert_statement(clients, link_values(values))
+
+
+def client_update_values(client):
+    values = client.dict(exclude_unset=True)
+    return values, link_values(values, update=True)
+
+
+def create_error(e):
+    # Вызывается из except: ошибка ссылок — 400, остальное — 500 с трассировкой в логе
+    if isinstance(e, ValueError):
+        return HTTPException(status_code=400, detail=str(e))
+    logger.exception("Error creating client")
+    return HTTPException(status_code=500, detail=f"Error creating client: {str(e)}")
+
+
+def client_created(response, row):
+    logger.info("Client created", extra={"client_id": row.id})
+    return with_etag(response, row)
+
+
+def client_restored(response, row):
+    if row is None:
+        raise HTTPException(status_code=404, detail="Archived client not found")
+    logger.info("Client restored", extra={"client_id": row.id})
+    return with_etag(response, row)
+
+
+def client_deleted(archived):
+    if not archived:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return {"ok": True}
+
+
+def check_batch(batch):
+    if (batch.items is None) == (batch.filter is None) or (batch.filter is None) != (batch.patch is None):
+        raise HTTPException(status_code=400, detail="items or filter with patch is required")
+
+
+# --- Посещения ---
+def check_in_date(visit):
+    return (visit and visit.visit_date) or date.today()
+
+
+def check_in_response(result):
+    if result is None:
+        raise HTTPException(status_code=404, detail="Client not found")
+    return result
+
+
+def visit_removed(removed):
+    if not removed:
+        raise HTTPException(status_code=404, detail="Visit not found")
+    return {"ok": True}
+
+
+def check_group_check_in(batch):
+    if batch.group is None and batch.client_ids is None:
+        raise HTTPException(status_code=400, detail="group or client_ids is required")
+    return batch.visit_date or date.today()
@@ -0,0 +1,242 @@
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+from starlette.routing import Mount
+
+# 0 — без middleware и хуков SQLAlchemy (метрики останутся пустыми)
+INSTRUMENTATION = os.getenv("INSTRUMENTATION", "1") != "0"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+# Столько одинаковых запросов за один HTTP-запрос считаются признаком N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger(__name__)
+
+
+# --- Логи ---
+_STANDARD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        # Поля из extra={...} попадают в запись как есть
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+_listener = None
+
+
+def setup_logging(level=LOG_LEVEL, stream=None):
+    # Обработчик запроса только кладёт запись в очередь, запись в поток
+    # выполняет отдельный поток QueueListener
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    root = logging.getLogger()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+
+# --- Метрики ---
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "query_seconds", "slow_queries", "statements", "n_plus_one")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.slow_queries = 0
+        self.statements = {}
+        self.n_plus_one = 0
+
+
+def route_name(scope):
+    # Шаблон пути, а не сам путь: /clients/{client_id}, а не /clients/42
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # FastAPI не записывает в scope смонтированные приложения (/assets, /static)
+    path = scope["path"]
+    for route in getattr(scope.get("app"), "routes", ()):
+        if isinstance(route, Mount) and (path == route.path or path.startswith(route.path + "/")):
+            return route.path
+    return "unmatched"
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = defaultdict(int)
+        self.latency = {}
+        self.queries = {}
+        self.query_seconds = defaultdict(float)
+        self.slow_queries = defaultdict(int)
+        self.n_plus_one = defaultdict(int)
+
+    def record(self, method, route, status, seconds, stats):
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            latency = self.latency.get((method, route))
+            if latency is None:
+                latency = self.latency[(method, route)] = Histogram(LATENCY_BUCKETS)
+            latency.observe(seconds)
+            queries = self.queries.get((method, route))
+            if queries is None:
+                queries = self.queries[(method, route)] = Histogram(QUERY_COUNT_BUCKETS)
+            queries.observe(stats.queries)
+            self.query_seconds[(method, route)] += stats.query_seconds
+            if stats.slow_queries:
+                self.slow_queries[(method, route)] += stats.slow_queries
+            if stats.n_plus_one:
+                self.n_plus_one[(method, route)] += stats.n_plus_one
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines.append("# TYPE crm_http_requests_total counter")
+            for (method, route, status), value in sorted(self.requests.items()):
+                lines.append(f'crm_http_requests_total{{method="{method}",route="{route}",status="{status}"}} {value}')
+            lines.append("# TYPE crm_http_request_duration_seconds histogram")
+            for (method, route), histogram in sorted(self.latency.items()):
+                _render_histogram(lines, "crm_http_request_duration_seconds", f'method="{method}",route="{route}"', histogram)
+            lines.append("# TYPE crm_db_queries_per_request histogram")
+            for (method, route), histogram in sorted(self.queries.items()):
+                _render_histogram(lines, "crm_db_queries_per_request", f'method="{method}",route="{route}"', histogram)
+            for name, values in (
+                ("crm_db_query_seconds_total", self.query_seconds),
+                ("crm_db_slow_queries_total", self.slow_queries),
+                ("crm_db_n_plus_one_total", self.n_plus_one),
+            ):
+                lines.append(f"# TYPE {name} counter")
+                for (method, route), value in sorted(values.items()):
+                    lines.append(f'{name}{{method="{method}",route="{route}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(lines, name, labels, histogram):
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum:g}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+metrics = Metrics()
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+class InstrumentationMiddleware:
+    # Чистый ASGI: contextvar доходит до обработчиков в пуле потоков,
+    # поэтому запросы к БД учитываются за текущим HTTP-запросом
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _current.reset(token)
+            metrics.record(scope["method"], route_name(scope), status, time.perf_counter() - started, stats)
+
+
+# --- SQL ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"]
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+        # executemany — это пачка одной вставки, а не N+1
+        if not executemany:
+            seen = stats.statements.get(statement, 0) + 1
+            stats.statements[statement] = seen
+            if seen == N_PLUS_ONE_THRESHOLD:
+                stats.n_plus_one += 1
+                logger.warning("Possible N+1 query", extra={"route": route_name(stats.scope), "statement": statement[:300]})
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        if stats is not None:
+            stats.slow_queries += 1
+        logger.warning("Slow query", extra={
+            "route": route_name(stats.scope) if stats is not None else None,
+            "duration_ms": round(elapsed * 1000, 1),
+            "statement": statement[:300],
+        })
+
+
+def instrument_engine(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstrument_engine(engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.remove(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.remove(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -2,25 +2,115 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI, HTTPException, Depends
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, UploadFile, File
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 from fastapi.middleware.cors import CORSMiddleware
-from database import SessionLocal, engine, Base
+from fastapi.middleware.gzip import GZipMiddleware
+from database import SessionLocal, engine, async_engine, DB_MODE
 import models
-from pydantic import BaseModel
+from pagination import keyset_page
+from queries import CLIENT_SORT_FIELDS, client_list_statement
+from search import search_archive, search_clients
+from analytics import revenue_report, members_report, rebuild_analytics, verify_analytics
+from schemas import (
+    ClientCreate, ClientUpdate, ClientOut, ClientArchiveOut, ClientPage, ClientBatch, ClientBatchOut,
+    VisitCreate, VisitOut, CheckInOut, GroupCheckIn, GroupCheckInOut,
+    RevenueRow, MembersRow, StatusTransitionOut, SchedulerRunOut, ChangesOut,
+    RosterOut, ScheduleDay,
+    TrainerCreate, TrainerUpdate, TrainerOut,
+    GroupCreate, GroupUpdate, GroupOut,
+    PeriodCreate, PeriodUpdate, PeriodOut,
+    PaymentCreate, PaymentUpdate, PaymentOut,
+    FreezeSettingsCreate, FreezeSettingsUpdate, FreezeSettingsOut,
+    payment_out, freeze_settings_out,
+)
+from refcache import reference_cache, reference_response
+from serialization import CLIENT_COLUMNS, fast_media_type, rows_response
+from delivery import CachedStaticFiles, GZIP_LEVEL, GZIP_MINIMUM_SIZE, IMMUTABLE, REVALIDATE
+from instrumentation import INSTRUMENTATION, InstrumentationMiddleware, instrument_engine, metrics, setup_logging
+from visits import check_in, check_in_group, remove_visit
+from scheduler import SCHEDULER, scheduler
+from rosters import check_links, link_clients, unlink_clients, roster, sync_group_days, weekly_schedule
+from writes import insert_statement, row_statement
+from handlers import (
+    check_batch, check_group_check_in, check_in_date, check_in_response, client_created, client_deleted,
+    client_insert, client_response, client_restored, client_update_values, create_error, updated_row,
+    visit_removed, with_etag,
+)
+from changes import CHANGES_BATCH_LIMIT, ChangeFeed, read_changes, encode_changes, change_feed
+from tenancy import prepare_database, registry, resolve_tenant
+from startup import StartupMiddleware, has_schema, startup
+from batch import update_clients, update_filtered
+from archive import archive_client, archive_list_statement, restore_client
+from bulk import iter_csv_rows, iter_xlsx_rows, import_clients, export_clients_csv, export_clients_xlsx
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from functools import partial
 from typing import List, Optional
+import asyncio
 import json
+import logging
 import os
-from dotenv import load_dotenv
+import stat
+import zipfile
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Новая база получает схему сразу. Существующая проверяется в фоне после
+# открытия порта: index.html отдаётся без ожидания, запросы к БД ждут проверку.
+# С TENANT_DATABASE_URL схема базы клуба проверяется при первом обращении к нему
+startup.defer(partial(prepare_database, engine) if registry is None else None)
+if registry is None and not has_schema(engine):
+    startup.prepare()
+scheduler.registry = registry
+
+# Журналы клубов: поток клуба запускается с первой подпиской на него
+tenant_feeds = {}
 
-# Load environment variables
-load_dotenv()
+def drop_tenant_feed(tenant):
+    # Клуб вытеснен из реестра: журнал забывается и останавливается после
+    # последней вкладки, следующая подписка заведёт новый
+    feed = tenant_feeds.get(tenant)
+    if feed is None:
+        return
 
-Base.metadata.create_all(bind=engine)
+    def forget():
+        if tenant_feeds.get(tenant) is feed:
+            del tenant_feeds[tenant]
 
-app = FastAPI()
+    feed.retire(forget)
+
+if registry is not None:
+    registry.on_evict.append(drop_tenant_feed)
+
+async def start_background():
+    try:
+        await asyncio.to_thread(startup.prepare)
+    except Exception:
+        logger.exception("Schema check failed")
+        return
+    # Каждый воркер uvicorn запускает свой цикл; проход выполняет держатель аренды
+    if SCHEDULER:
+        scheduler.start()
+
+@asynccontextmanager
+async def lifespan(app):
+    startup.mark("lifespan")
+    mount_static(app)
+    background = asyncio.create_task(start_background())
+    change_feed.start()
+    yield
+    await background
+    await change_feed.stop()
+    for feed in tenant_feeds.values():
+        await feed.stop()
+    await scheduler.stop()
+    if registry is not None:
+        registry.dispose()
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS для фронта
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:5174,https://challenger-crm.onrender.com").split(",")
@@ -31,221 +121,428 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_LEVEL)
+if INSTRUMENTATION:
+    app.add_middleware(InstrumentationMiddleware)
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine)
+    if registry is not None:
+        registry.on_create.append(instrument_engine)
+# Последним, то есть снаружи всех: время первого ответа вместе со сжатием
+app.add_middleware(StartupMiddleware, startup=startup)
+
+def get_tenant(request: Request):
+    # Клуб из заголовка TENANT_HEADER или поддомена; без TENANT_DATABASE_URL — None
+    if registry is None:
+        return None
+    try:
+        return resolve_tenant(request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def session_factory(tenant: Optional[str] = Depends(get_tenant)):
+    if tenant is None:
+        startup.prepare()  # сразу после запуска ждёт фоновую проверку схемы
+        return SessionLocal
+    try:
+        return registry.get(tenant).sessions
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
-def get_db():
-    db = SessionLocal()
+def get_db(sessions=Depends(session_factory)):
+    db = sessions()
     try:
         yield db
     finally:
         db.close()
 
-# --- Pydantic схемы ---
-class ClientBase(BaseModel):
-    contract_number: Optional[str] = None
-    name: str
-    surname: str
-    phone: str
-    address: Optional[str] = None
-    birth_date: Optional[str] = None
-    start_date: Optional[str] = None
-    end_date: Optional[str] = None
-    subscription_period: Optional[str] = None
-    payment_amount: Optional[str] = None
-    payment_method: Optional[str] = None
-    group: Optional[str] = None
-    comment: Optional[str] = None
-    status: Optional[str] = "Активен"
-    paid: Optional[bool] = False
-    total_sessions: Optional[int] = 0
-    has_discount: Optional[bool] = False
-    discount_reason: Optional[str] = None
-    deleted: Optional[bool] = False
-    trainer: Optional[str] = None
-
-class ClientCreate(ClientBase):
-    pass
-class ClientUpdate(ClientBase):
-    pass
-class ClientOut(ClientBase):
-    id: int
-    class Config:
-        from_attributes = True
+def cache_key(db, key):
+    # Справочники у каждого клуба свои
+    tenant = db.info.get("tenant")
+    return f"{tenant}:{key}" if tenant else key
+
+def tenant_feed(tenant):
+    if tenant is None:
+        return change_feed
+    feed = tenant_feeds.get(tenant)
+    if feed is None:
+        feed = tenant_feeds[tenant] = ChangeFeed(partial(registry.session, tenant), tenant=tenant)
+        feed.start()
+    return feed
+
+def cached_reference(request, key, load):
+    # Справочники меняются редко: ответ хранится уже сериализованным
+    entry = reference_cache.get(key)
+    if entry is None:
+        version = reference_cache.version(key)
+        body = json.dumps([item.dict() for item in load()], ensure_ascii=False).encode("utf-8")
+        entry = reference_cache.put(key, body, version)
+    return reference_response(request, entry)
 
 # --- Клиенты ---
 @app.get("/clients", response_model=List[ClientOut])
-def get_clients(db: Session = Depends(get_db)):
-    clients = db.query(models.Client).all()
-    print(f"Retrieved {len(clients)} clients")
-    return clients
+def get_clients(request: Request, db: Session = Depends(get_db)):
+    media_type = fast_media_type(request)
+    if media_type:
+        return rows_response(db.execute(client_list_statement(columns=CLIENT_COLUMNS)).all(), media_type)
+    return db.query(models.Client).all()
+
+@app.get("/clients/page", response_model=ClientPage)
+def get_clients_page(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    trainer: Optional[str] = None,
+    group: Optional[str] = None,
+    deleted: Optional[bool] = None,
+    paid: Optional[bool] = None,
+    sort: str = "id",
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: Session = Depends(get_db),
+):
+    if sort not in CLIENT_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort field: {sort}")
+    media_type = fast_media_type(request)
+    stmt = client_list_statement(status, trainer, group, deleted, paid, columns=CLIENT_COLUMNS if media_type else None)
+    try:
+        items, next_cursor = keyset_page(
+            db, stmt, CLIENT_SORT_FIELDS[sort], models.Client.id,
+            descending=order == "desc", cursor=cursor, limit=limit, tuples=media_type is not None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if media_type:
+        return rows_response(items, media_type, next_cursor=next_cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/clients/search", response_model=List[ClientOut])
+def search_clients_endpoint(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    include_deleted: bool = False,
+    db: Session = Depends(get_db),
+):
+    return search_clients(db, q, limit=limit, include_deleted=include_deleted)
+
+@app.post("/clients/import")
+def import_clients_endpoint(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    filename = (file.filename or "").lower()
+    if filename.endswith(".csv"):
+        rows = iter_csv_rows(file.file)
+    elif filename.endswith(".xlsx"):
+        rows = iter_xlsx_rows(file.file)
+    else:
+        raise HTTPException(status_code=415, detail="Only .csv and .xlsx files are supported")
+    try:
+        return import_clients(db, rows)
+    except (UnicodeDecodeError, zipfile.BadZipFile) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Cannot read file: {str(e)}")
+
+@app.get("/clients/export")
+def export_clients_endpoint(format: str = Query("csv", pattern="^(csv|xlsx)$"), sessions=Depends(session_factory)):
+    if format == "xlsx":
+        return StreamingResponse(
+            export_clients_xlsx(sessions),
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": 'attachment; filename="clients.xlsx"'},
+        )
+    return StreamingResponse(
+        export_clients_csv(sessions),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="clients.csv"'},
+    )
+
+@app.post("/clients/batch", response_model=ClientBatchOut)
+def update_clients_batch(batch: ClientBatch, db: Session = Depends(get_db)):
+    # Одна транзакция на пачку; ошибки по отдельным клиентам — в failed
+    check_batch(batch)
+    try:
+        if batch.items is not None:
+            return update_clients(db, batch.items)
+        return update_filtered(db, batch.filter, batch.patch)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/clients/archive", response_model=List[ClientArchiveOut])
+def get_archive(
+    q: Optional[str] = Query(None, min_length=1),
+    reason: Optional[str] = Query(None, pattern="^(deleted|expired)$"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    # Без q — последние перенесённые в архив
+    if q is None:
+        return db.execute(archive_list_statement(reason, limit)).all()
+    return search_archive(db, q, limit=limit, reason=reason)
+
+@app.get("/clients/{client_id}", response_model=ClientOut)
+def get_client(client_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    row = db.execute(row_statement(models.Client.__table__, client_id)).one_or_none()
+    return client_response(request, response, row)
 
 @app.post("/clients", response_model=ClientOut)
-def create_client(client: ClientCreate, db: Session = Depends(get_db)):
-    print(f"Creating client: {client.dict()}")
+def create_client(client: ClientCreate, response: Response, db: Session = Depends(get_db)):
+    values, stmt = client_insert(client)
     try:
-        db_client = models.Client(**client.dict())
-        db.add(db_client)
+        row = db.execute(stmt).one()
+        check_links(values, row)
         db.commit()
-        db.refresh(db_client)
-        print(f"Client created successfully: {db_client.id}")
-        return db_client
     except Exception as e:
-        print(f"Error creating client: {e}")
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error creating client: {str(e)}")
+        raise create_error(e)
+    return client_created(response, row)
 
 @app.put("/clients/{client_id}", response_model=ClientOut)
-def update_client(client_id: int, client: ClientUpdate, db: Session = Depends(get_db)):
-    db_client = db.query(models.Client).filter(models.Client.id == client_id).first()
-    if not db_client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    for key, value in client.dict(exclude_unset=True).items():
-        setattr(db_client, key, value)
+def update_client(
+    client_id: int,
+    client: ClientUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    values, linked = client_update_values(client)
+    row = updated_row(db, models.Client.__table__, client_id, linked, if_match, "Client not found")
+    try:
+        check_links(values, row)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     db.commit()
-    db.refresh(db_client)
-    return db_client
+    return with_etag(response, row)
 
 @app.delete("/clients/{client_id}")
 def delete_client(client_id: int, db: Session = Depends(get_db)):
-    db_client = db.query(models.Client).filter(models.Client.id == client_id).first()
-    if not db_client:
-        raise HTTPException(status_code=404, detail="Client not found")
-    db.delete(db_client)
+    # Клиент переносится в архив вместе с посещениями и историей статусов
+    return client_deleted(archive_client(db, client_id, datetime.now()))
+
+@app.post("/clients/{client_id}/restore", response_model=ClientOut)
+def restore_client_endpoint(client_id: int, response: Response, db: Session = Depends(get_db)):
+    return client_restored(response, restore_client(db, client_id))
+
+# --- Посещения ---
+@app.get("/clients/{client_id}/visits", response_model=List[VisitOut])
+def get_visits(client_id: int, db: Session = Depends(get_db)):
+    return db.query(models.Visit).filter(models.Visit.client_id == client_id).order_by(models.Visit.visit_date).all()
+
+@app.post("/clients/{client_id}/visits", response_model=CheckInOut)
+def check_in_client(client_id: int, visit: Optional[VisitCreate] = None, db: Session = Depends(get_db)):
+    return check_in_response(check_in(db, client_id, check_in_date(visit)))
+
+@app.delete("/clients/{client_id}/visits/{visit_date}")
+def delete_visit(client_id: int, visit_date: date, db: Session = Depends(get_db)):
+    return visit_removed(remove_visit(db, client_id, visit_date))
+
+@app.post("/visits/batch", response_model=GroupCheckInOut)
+def check_in_batch(batch: GroupCheckIn, db: Session = Depends(get_db)):
+    return check_in_group(db, check_group_check_in(batch), group=batch.group, client_ids=batch.client_ids)
+
+# --- Смена статусов ---
+@app.get("/clients/{client_id}/transitions", response_model=List[StatusTransitionOut])
+def get_transitions(client_id: int, db: Session = Depends(get_db)):
+    return (
+        db.query(models.StatusTransition)
+        .filter(models.StatusTransition.client_id == client_id)
+        .order_by(models.StatusTransition.id)
+        .all()
+    )
+
+@app.post("/scheduler/run", response_model=SchedulerRunOut)
+def run_scheduler(sessions=Depends(session_factory), tenant: Optional[str] = Depends(get_tenant)):
+    # Внеочередная смена статусов в базе клуба; если аренду держит другой воркер,
+    # ran = false. Архив и резервная копия остаются фоновому проходу: копия
+    # большой базы держала бы HTTP-запрос до конца копирования
+    result = scheduler.run_once(sessions, tenant, jobs=["status_transitions"])["status_transitions"]
+    return {"ran": result is not None, "transitions": result or {}}
+
+# --- Журнал изменений ---
+@app.get("/changes", response_model=ChangesOut)
+def get_changes(
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(CHANGES_BATCH_LIMIT, ge=1, le=5000),
+    db: Session = Depends(get_db),
+):
+    return Response(encode_changes(read_changes(db, since, limit)), media_type="application/json")
+
+@app.get("/changes/stream")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0),
+    sessions=Depends(session_factory),  # 404 для незаведённого клуба
+    tenant: Optional[str] = Depends(get_tenant),
+):
+    # EventSource переподключается по тому же URL и присылает id последнего
+    # события — он новее since из адреса
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    return StreamingResponse(
+        tenant_feed(tenant).stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# --- Аналитика ---
+@app.get("/analytics/revenue", response_model=List[RevenueRow])
+def get_revenue(
+    period: str = Query("month", pattern="^(day|month)$"),
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    group: Optional[str] = None,
+    trainer: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    return revenue_report(db, period, date_from, date_to, group, trainer)
+
+@app.get("/analytics/members", response_model=List[MembersRow])
+def get_members(by: str = Query("group", pattern="^(group|trainer)$"), db: Session = Depends(get_db)):
+    return members_report(db, by)
+
+@app.post("/analytics/rebuild")
+def rebuild_analytics_endpoint(db: Session = Depends(get_db)):
+    rebuild_analytics(db.connection())
     db.commit()
-    return {"ok": True}
+    return {"ok": True, "mismatches": len(verify_analytics(db.connection()))}
 
 # --- Тренеры ---
-class TrainerBase(BaseModel):
-    name: str
-    phone: Optional[str] = None
-    comment: Optional[str] = None
-class TrainerCreate(TrainerBase):
-    pass
-class TrainerUpdate(TrainerBase):
-    pass
-class TrainerOut(TrainerBase):
-    id: int
-    class Config:
-        from_attributes = True
-
 @app.get("/trainers", response_model=List[TrainerOut])
-def get_trainers(db: Session = Depends(get_db)):
-    return db.query(models.Trainer).all()
+def get_trainers(request: Request, db: Session = Depends(get_db)):
+    return cached_reference(
+        request, cache_key(db, "trainers"), lambda: [TrainerOut.model_validate(item) for item in db.query(models.Trainer)],
+    )
 
 @app.post("/trainers", response_model=TrainerOut)
-def create_trainer(trainer: TrainerCreate, db: Session = Depends(get_db)):
-    db_trainer = models.Trainer(**trainer.dict())
-    db.add(db_trainer)
+def create_trainer(trainer: TrainerCreate, response: Response, db: Session = Depends(get_db)):
+    row = db.execute(insert_statement(models.Trainer.__table__, trainer.dict())).one()
+    # Клиенты, у которых тренер с этим именем был записан строкой
+    link_clients(db.connection(), models.Trainer.__table__, row.id)
     db.commit()
-    db.refresh(db_trainer)
-    return db_trainer
+    reference_cache.invalidate(cache_key(db, "trainers"))
+    return with_etag(response, row)
 
 @app.put("/trainers/{trainer_id}", response_model=TrainerOut)
-def update_trainer(trainer_id: int, trainer: TrainerUpdate, db: Session = Depends(get_db)):
-    db_trainer = db.query(models.Trainer).filter(models.Trainer.id == trainer_id).first()
-    if not db_trainer:
-        raise HTTPException(status_code=404, detail="Trainer not found")
-    for key, value in trainer.dict(exclude_unset=True).items():
-        setattr(db_trainer, key, value)
+def update_trainer(
+    trainer_id: int,
+    trainer: TrainerUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    row = updated_row(db, models.Trainer.__table__, trainer_id, trainer.dict(exclude_unset=True), if_match, "Trainer not found")
+    link_clients(db.connection(), models.Trainer.__table__, trainer_id)
     db.commit()
-    db.refresh(db_trainer)
-    return db_trainer
+    reference_cache.invalidate(cache_key(db, "trainers"))
+    return with_etag(response, row)
 
 @app.delete("/trainers/{trainer_id}")
 def delete_trainer(trainer_id: int, db: Session = Depends(get_db)):
     db_trainer = db.query(models.Trainer).filter(models.Trainer.id == trainer_id).first()
     if not db_trainer:
         raise HTTPException(status_code=404, detail="Trainer not found")
+    unlink_clients(db, models.Trainer.__table__, trainer_id)
     db.delete(db_trainer)
     db.commit()
+    reference_cache.invalidate(cache_key(db, "trainers"))
+    # unlink_clients снимает тренера и с его групп
+    reference_cache.invalidate(cache_key(db, "groups"))
     return {"ok": True}
 
-# --- Группы ---
-class GroupBase(BaseModel):
-    name: str
-    days: Optional[str] = None
-    time_start: Optional[str] = None
-    time_end: Optional[str] = None
-    comment: Optional[str] = None
-class GroupCreate(GroupBase):
-    pass
-class GroupUpdate(GroupBase):
-    pass
-class GroupOut(GroupBase):
-    id: int
-    class Config:
-        from_attributes = True
+@app.get("/trainers/{trainer_id}/clients", response_model=RosterOut)
+def get_trainer_clients(trainer_id: int, include_deleted: bool = False, db: Session = Depends(get_db)):
+    result = roster(db, models.Trainer, trainer_id, include_deleted)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Trainer not found")
+    return result
 
+# --- Группы ---
 @app.get("/groups", response_model=List[GroupOut])
-def get_groups(db: Session = Depends(get_db)):
-    return db.query(models.Group).all()
+def get_groups(request: Request, db: Session = Depends(get_db)):
+    return cached_reference(
+        request, cache_key(db, "groups"), lambda: [GroupOut.model_validate(item) for item in db.query(models.Group)],
+    )
+
+def check_group_trainer(db, trainer_id):
+    if trainer_id is not None and db.get(models.Trainer, trainer_id) is None:
+        raise HTTPException(status_code=400, detail=f"Unknown trainer_id: {trainer_id}")
 
 @app.post("/groups", response_model=GroupOut)
-def create_group(group: GroupCreate, db: Session = Depends(get_db)):
-    db_group = models.Group(**group.dict())
-    db.add(db_group)
+def create_group(group: GroupCreate, response: Response, db: Session = Depends(get_db)):
+    check_group_trainer(db, group.trainer_id)
+    row = db.execute(insert_statement(models.Group.__table__, group.dict())).one()
+    sync_group_days(db, row)
+    link_clients(db.connection(), models.Group.__table__, row.id)
     db.commit()
-    db.refresh(db_group)
-    return db_group
+    reference_cache.invalidate(cache_key(db, "groups"))
+    return with_etag(response, row)
 
 @app.put("/groups/{group_id}", response_model=GroupOut)
-def update_group(group_id: int, group: GroupUpdate, db: Session = Depends(get_db)):
-    db_group = db.query(models.Group).filter(models.Group.id == group_id).first()
-    if not db_group:
-        raise HTTPException(status_code=404, detail="Group not found")
-    for key, value in group.dict(exclude_unset=True).items():
-        setattr(db_group, key, value)
+def update_group(
+    group_id: int,
+    group: GroupUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    check_group_trainer(db, group.trainer_id)
+    row = updated_row(db, models.Group.__table__, group_id, group.dict(exclude_unset=True), if_match, "Group not found")
+    sync_group_days(db, row)
+    link_clients(db.connection(), models.Group.__table__, group_id)
     db.commit()
-    db.refresh(db_group)
-    return db_group
+    reference_cache.invalidate(cache_key(db, "groups"))
+    return with_etag(response, row)
 
 @app.delete("/groups/{group_id}")
 def delete_group(group_id: int, db: Session = Depends(get_db)):
     db_group = db.query(models.Group).filter(models.Group.id == group_id).first()
     if not db_group:
         raise HTTPException(status_code=404, detail="Group not found")
+    unlink_clients(db, models.Group.__table__, group_id)
     db.delete(db_group)
     db.commit()
+    reference_cache.invalidate(cache_key(db, "groups"))
     return {"ok": True}
 
-# --- Периоды абонементов ---
-class PeriodBase(BaseModel):
-    label: str
-    value: str
-    months: int
-    price: float
-    trainings: int
-
-class PeriodCreate(PeriodBase):
-    pass
-class PeriodUpdate(PeriodBase):
-    pass
-class PeriodOut(PeriodBase):
-    id: int
-    class Config:
-        from_attributes = True
+@app.get("/groups/{group_id}/clients", response_model=RosterOut)
+def get_group_clients(group_id: int, include_deleted: bool = False, db: Session = Depends(get_db)):
+    result = roster(db, models.Group, group_id, include_deleted)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Group not found")
+    return result
 
+@app.get("/schedule", response_model=List[ScheduleDay])
+def get_schedule(trainer_id: Optional[int] = None, db: Session = Depends(get_db)):
+    # Неделя по дням group_days и времени групп; members — активные клиенты группы
+    return weekly_schedule(db, trainer_id)
+
+# --- Периоды абонементов ---
 @app.get("/periods", response_model=List[PeriodOut])
-def get_periods(db: Session = Depends(get_db)):
-    return db.query(models.Period).all()
+def get_periods(request: Request, db: Session = Depends(get_db)):
+    return cached_reference(
+        request, cache_key(db, "periods"), lambda: [PeriodOut.model_validate(item) for item in db.query(models.Period)],
+    )
 
 @app.post("/periods", response_model=PeriodOut)
-def create_period(period: PeriodCreate, db: Session = Depends(get_db)):
-    db_period = models.Period(**period.dict())
-    db.add(db_period)
+def create_period(period: PeriodCreate, response: Response, db: Session = Depends(get_db)):
+    row = db.execute(insert_statement(models.Period.__table__, period.dict())).one()
     db.commit()
-    db.refresh(db_period)
-    return db_period
+    reference_cache.invalidate(cache_key(db, "periods"))
+    return with_etag(response, row)
 
 @app.put("/periods/{period_id}", response_model=PeriodOut)
-def update_period(period_id: int, period: PeriodUpdate, db: Session = Depends(get_db)):
-    db_period = db.query(models.Period).filter(models.Period.id == period_id).first()
-    if not db_period:
-        raise HTTPException(status_code=404, detail="Period not found")
-    for key, value in period.dict(exclude_unset=True).items():
-        setattr(db_period, key, value)
+def update_period(
+    period_id: int,
+    period: PeriodUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    row = updated_row(db, models.Period.__table__, period_id, period.dict(exclude_unset=True), if_match, "Period not found")
     db.commit()
-    db.refresh(db_period)
-    return db_period
+    reference_cache.invalidate(cache_key(db, "periods"))
+    return with_etag(response, row)
 
 @app.delete("/periods/{period_id}")
 def delete_period(period_id: int, db: Session = Depends(get_db)):
@@ -254,79 +551,41 @@ def delete_period(period_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Period not found")
     db.delete(db_period)
     db.commit()
+    reference_cache.invalidate(cache_key(db, "periods"))
     return {"ok": True}
 
 # --- Способы оплаты ---
-class PaymentBase(BaseModel):
-    label: str
-    value: str
-    type: str
-    banks: Optional[List[str]] = []
-
-class PaymentCreate(PaymentBase):
-    pass
-class PaymentUpdate(PaymentBase):
-    pass
-class PaymentOut(PaymentBase):
-    id: int
-    class Config:
-        from_attributes = True
-
 @app.get("/payments", response_model=List[PaymentOut])
-def get_payments(db: Session = Depends(get_db)):
-    payments = db.query(models.Payment).all()
-    # Deserialize JSON fields
-    for payment in payments:
-        if payment.banks:
-            try:
-                payment.banks = json.loads(payment.banks)
-            except:
-                payment.banks = []
-        else:
-            payment.banks = []
-    return payments
+def get_payments(request: Request, db: Session = Depends(get_db)):
+    return cached_reference(
+        request, cache_key(db, "payments"), lambda: [payment_out(payment) for payment in db.query(models.Payment)],
+    )
 
 @app.post("/payments", response_model=PaymentOut)
-def create_payment(payment: PaymentCreate, db: Session = Depends(get_db)):
+def create_payment(payment: PaymentCreate, response: Response, db: Session = Depends(get_db)):
     payment_dict = payment.dict()
     # Serialize JSON fields
-    if payment_dict.get('banks'):
-        payment_dict['banks'] = json.dumps(payment_dict['banks'])
-    
-    db_payment = models.Payment(**payment_dict)
-    db.add(db_payment)
+    payment_dict['banks'] = json.dumps(payment_dict.get('banks') or [])
+    row = db.execute(insert_statement(models.Payment.__table__, payment_dict)).one()
     db.commit()
-    db.refresh(db_payment)
-    
-    # Deserialize for response
-    if db_payment.banks:
-        try:
-            db_payment.banks = json.loads(db_payment.banks)
-        except:
-            db_payment.banks = []
-    return db_payment
+    reference_cache.invalidate(cache_key(db, "payments"))
+    return payment_out(with_etag(response, row))
 
 @app.put("/payments/{payment_id}", response_model=PaymentOut)
-def update_payment(payment_id: int, payment: PaymentUpdate, db: Session = Depends(get_db)):
-    db_payment = db.query(models.Payment).filter(models.Payment.id == payment_id).first()
-    if not db_payment:
-        raise HTTPException(status_code=404, detail="Payment not found")
-    
-    for key, value in payment.dict(exclude_unset=True).items():
-        if key == 'banks' and value:
-            value = json.dumps(value)
-        setattr(db_payment, key, value)
-    
+def update_payment(
+    payment_id: int,
+    payment: PaymentUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    payment_dict = payment.dict(exclude_unset=True)
+    if 'banks' in payment_dict:
+        payment_dict['banks'] = json.dumps(payment_dict['banks'] or [])
+    row = updated_row(db, models.Payment.__table__, payment_id, payment_dict, if_match, "Payment not found")
     db.commit()
-    db.refresh(db_payment)
-    
-    # Deserialize for response
-    if db_payment.banks:
-        try:
-            db_payment.banks = json.loads(db_payment.banks)
-        except:
-            db_payment.banks = []
-    return db_payment
+    reference_cache.invalidate(cache_key(db, "payments"))
+    return payment_out(with_etag(response, row))
 
 @app.delete("/payments/{payment_id}")
 def delete_payment(payment_id: int, db: Session = Depends(get_db)):
@@ -335,78 +594,43 @@ def delete_payment(payment_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Payment not found")
     db.delete(db_payment)
     db.commit()
+    reference_cache.invalidate(cache_key(db, "payments"))
     return {"ok": True}
 
 # --- Настройки заморозки ---
-class FreezeSettingsBase(BaseModel):
-    maxDays: int = 30
-    reasons: List[str] = []
-    requireConfirm: bool = False
-
-class FreezeSettingsCreate(FreezeSettingsBase):
-    pass
-class FreezeSettingsUpdate(FreezeSettingsBase):
-    pass
-class FreezeSettingsOut(FreezeSettingsBase):
-    id: int
-    class Config:
-        from_attributes = True
-
 @app.get("/freezeSettings", response_model=List[FreezeSettingsOut])
-def get_freeze_settings(db: Session = Depends(get_db)):
-    settings = db.query(models.FreezeSettings).all()
-    # Deserialize JSON fields
-    for setting in settings:
-        if setting.reasons:
-            try:
-                setting.reasons = json.loads(setting.reasons)
-            except:
-                setting.reasons = []
-        else:
-            setting.reasons = []
-    return settings
+def get_freeze_settings(request: Request, db: Session = Depends(get_db)):
+    return cached_reference(
+        request, cache_key(db, "freezeSettings"), lambda: [freeze_settings_out(setting) for setting in db.query(models.FreezeSettings)]
+    )
 
 @app.post("/freezeSettings", response_model=FreezeSettingsOut)
-def create_freeze_settings(freeze_settings: FreezeSettingsCreate, db: Session = Depends(get_db)):
+def create_freeze_settings(freeze_settings: FreezeSettingsCreate, response: Response, db: Session = Depends(get_db)):
     settings_dict = freeze_settings.dict()
     # Serialize JSON fields
-    if settings_dict.get('reasons'):
-        settings_dict['reasons'] = json.dumps(settings_dict['reasons'])
-    
-    db_freeze_settings = models.FreezeSettings(**settings_dict)
-    db.add(db_freeze_settings)
+    settings_dict['reasons'] = json.dumps(settings_dict.get('reasons') or [])
+    row = db.execute(insert_statement(models.FreezeSettings.__table__, settings_dict)).one()
     db.commit()
-    db.refresh(db_freeze_settings)
-    
-    # Deserialize for response
-    if db_freeze_settings.reasons:
-        try:
-            db_freeze_settings.reasons = json.loads(db_freeze_settings.reasons)
-        except:
-            db_freeze_settings.reasons = []
-    return db_freeze_settings
+    reference_cache.invalidate(cache_key(db, "freezeSettings"))
+    return freeze_settings_out(with_etag(response, row))
 
 @app.put("/freezeSettings/{settings_id}", response_model=FreezeSettingsOut)
-def update_freeze_settings(settings_id: int, freeze_settings: FreezeSettingsUpdate, db: Session = Depends(get_db)):
-    db_freeze_settings = db.query(models.FreezeSettings).filter(models.FreezeSettings.id == settings_id).first()
-    if not db_freeze_settings:
-        raise HTTPException(status_code=404, detail="Freeze settings not found")
-    
-    for key, value in freeze_settings.dict(exclude_unset=True).items():
-        if key == 'reasons' and value:
-            value = json.dumps(value)
-        setattr(db_freeze_settings, key, value)
-    
+def update_freeze_settings(
+    settings_id: int,
+    freeze_settings: FreezeSettingsUpdate,
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+):
+    settings_dict = freeze_settings.dict(exclude_unset=True)
+    if 'reasons' in settings_dict:
+        settings_dict['reasons'] = json.dumps(settings_dict['reasons'] or [])
+    row = updated_row(
+        db, models.FreezeSettings.__table__, settings_id, settings_dict, if_match, "Freeze settings not found",
+    )
     db.commit()
-    db.refresh(db_freeze_settings)
-    
-    # Deserialize for response
-    if db_freeze_settings.reasons:
-        try:
-            db_freeze_settings.reasons = json.loads(db_freeze_settings.reasons)
-        except:
-            db_freeze_settings.reasons = []
-    return db_freeze_settings
+    reference_cache.invalidate(cache_key(db, "freezeSettings"))
+    return freeze_settings_out(with_etag(response, row))
 
 @app.delete("/freezeSettings/{settings_id}")
 def delete_freeze_settings(settings_id: int, db: Session = Depends(get_db)):
@@ -415,12 +639,32 @@ def delete_freeze_settings(settings_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Freeze settings not found")
     db.delete(db_freeze_settings)
     db.commit()
+    reference_cache.invalidate(cache_key(db, "freezeSettings"))
     return {"ok": True}
 
+@app.get("/api/cache")
+def cache_stats():
+    return reference_cache.stats()
+
+@app.get("/api/startup")
+def startup_stats():
+    return startup.stats()
+
+@app.get("/api/tenants")
+def tenant_stats():
+    return registry.stats() if registry is not None else {}
+
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Асинхронный режим: обработчики клиентов и справочников заменяются на async-версии
+if DB_MODE == "async":
+    import async_api
+    async_api.install(app)
+
 # Static files for production deployment
-static_dir = os.path.join(os.path.dirname(__file__), "static")
-print(f"Checking for static directory: {static_dir}")
-print(f"Directory exists: {os.path.exists(static_dir)}")
+static_dir = os.getenv("STATIC_DIR", os.path.join(os.path.dirname(__file__), "static"))
 
 # Debug endpoint to check file structure
 @app.get("/api/debug")
@@ -437,19 +681,38 @@ async def debug_info():
     except Exception as e:
         return {"error": str(e)}
 
-if os.path.exists(static_dir):
+def mount_static(app):
+    # Из lifespan, а не при импорте: импорт не трогает диск, а маршрут SPA
+    # встаёт последним, после всех маршрутов API (в том числе async_api).
+    # Повторный запуск lifespan в том же процессе (тесты) ничего не добавляет
+    if getattr(app.state, "static_mounted", False):
+        return
+    app.state.static_mounted = True
+    exists = os.path.exists(static_dir)
+    logger.info("Static directory", extra={"static_dir": static_dir, "exists": exists})
+    if not exists:
+        logger.warning("Static directory not found", extra={"static_dir": static_dir, "cwd": os.getcwd()})
+
+        @app.get("/")
+        async def serve_debug():
+            return {"message": "Static files not found", "cwd": os.getcwd(), "static_dir": static_dir}
+        return
+
     # Mount static files at root to serve assets directly
-    app.mount("/assets", StaticFiles(directory=os.path.join(static_dir, "assets")), name="assets")
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
-    
+    app.mount("/assets", CachedStaticFiles(directory=os.path.join(static_dir, "assets"), cache_control=IMMUTABLE), name="assets")
+    static_files = CachedStaticFiles(directory=static_dir, cache_control=REVALIDATE)
+    app.mount("/static", static_files, name="static")
+    index_path = os.path.join(static_dir, "index.html")
+
+    def serve_index(request):
+        return static_files.file_response(index_path, os.stat(index_path), request.scope)
+
     @app.get("/")
-    async def serve_spa():
-        index_path = os.path.join(static_dir, "index.html")
-        print(f"Serving index.html from: {index_path}")
-        return FileResponse(index_path)
+    async def serve_spa(request: Request):
+        return serve_index(request)
     
     @app.get("/{full_path:path}")
-    async def serve_spa_routes(full_path: str):
+    async def serve_spa_routes(full_path: str, request: Request):
         # Exclude API routes, docs, and static assets
         if (full_path.startswith("api/") or 
             full_path.startswith("docs") or 
@@ -457,13 +720,10 @@ if os.path.exists(static_dir):
             full_path.startswith("static/") or
             full_path.startswith("assets/")):
             raise HTTPException(status_code=404, detail="Not found")
-        index_path = os.path.join(static_dir, "index.html")
-        return FileResponse(index_path)
-else:
-    print(f"Static directory not found at {static_dir}")
-    print(f"Current working directory: {os.getcwd()}")
-    print(f"Directory contents: {os.listdir('.')}")
-    
-    @app.get("/")
-    async def serve_debug():
-        return {"message": "Static files not found", "cwd": os.getcwd(), "static_dir": static_dir}
+        # Файлы из корня сборки (например, /vite.svg) отдаются как есть
+        file_path, stat_result = static_files.lookup_path(full_path)
+        if stat_result is not None and stat.S_ISREG(stat_result.st_mode):
+            return static_files.file_response(file_path, stat_result, request.scope)
+        return serve_index(request)
+
+startup.mark("imported")
@@ -0,0 +1,218 @@
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import inspect, text
+
+from database import Base
+from parsing import parse_date, parse_money
+import models
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+
+MIGRATIONS = []
+
+
+def migration(version, name):
+    def register(func):
+        MIGRATIONS.append((version, name, func))
+        MIGRATIONS.sort(key=lambda m: m[0])
+        return func
+    return register
+
+
+def upgrade(engine):
+    # Новые таблицы создаются сразу по моделям, а изменения существующих —
+    # миграциями. Каждая миграция должна корректно проходить и на свежей базе.
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+    Base.metadata.create_all(bind=engine)
+
+    pending = [m for m in MIGRATIONS if m[0] not in applied]
+    for version, name, func in pending:
+        logger.info("Applying migration %s_%s", version, name)
+        func(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:v, :n, :at)"),
+                {"v": version, "n": name, "at": datetime.now(timezone.utc).isoformat()},
+            )
+    # Без статистики планировщик SQLite выбирает индекс фильтра вместо индекса сортировки
+    if pending and engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+
+def _column_types(conn, table):
+    return {col["name"]: str(col["type"]).upper() for col in inspect(conn).get_columns(table)}
+
+
+def _rebuild_table(engine, table, convert, batch_size=BATCH_SIZE):
+    # SQLite не умеет ALTER COLUMN: старая таблица переименовывается, новая
+    # создаётся по модели и заполняется пачками. Прерванный перенос
+    # продолжается с последнего скопированного id. Без convert строки
+    # копируются внутри SQLite как есть.
+    old = f"{table.name}__old"
+    with engine.begin() as conn:
+        if not inspect(conn).has_table(old):
+            for index in inspect(conn).get_indexes(table.name):
+                conn.execute(text(f'DROP INDEX IF EXISTS "{index["name"]}"'))
+            # Иначе внешние ключи других таблиц (visits.client_id) переедут на __old
+            conn.execute(text("PRAGMA legacy_alter_table = ON"))
+            conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old}"'))
+            conn.execute(text("PRAGMA legacy_alter_table = OFF"))
+        table.create(conn, checkfirst=True)
+        last_id = conn.execute(text(f'SELECT coalesce(max(id), 0) FROM "{table.name}"')).scalar()
+        old_columns = [col["name"] for col in inspect(conn).get_columns(old)]
+
+    columns = [col for col in old_columns if col in table.c]
+    column_list = ", ".join(f'"{col}"' for col in columns)
+    select = text(f'SELECT {column_list} FROM "{old}" WHERE id > :last_id ORDER BY id LIMIT :limit')
+    copy = text(f'INSERT INTO "{table.name}" ({column_list}) {select.text}')
+    while convert is None:
+        with engine.begin() as conn:
+            if not conn.execute(copy, {"last_id": last_id, "limit": batch_size}).rowcount:
+                break
+            last_id = conn.execute(text(f'SELECT max(id) FROM "{table.name}"')).scalar()
+    while convert is not None:
+        with engine.begin() as conn:
+            rows = [dict(zip(columns, row)) for row in conn.execute(select, {"last_id": last_id, "limit": batch_size})]
+            if not rows:
+                break
+            conn.execute(table.insert(), [convert(row) for row in rows])
+        last_id = rows[-1]["id"]
+
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE "{old}"'))
+
+
+def _convert_client(row):
+    # Значения, которые не удалось разобрать, сохраняются в комментарии
+    unparsed = []
+    for key in ("birth_date", "start_date", "end_date"):
+        try:
+            row[key] = parse_date(row[key])
+        except ValueError:
+            unparsed.append(f"{key}: {row[key]}")
+            row[key] = None
+    try:
+        row["payment_amount"] = parse_money(row["payment_amount"])
+    except ValueError:
+        unparsed.append(f"payment_amount: {row['payment_amount']}")
+        row["payment_amount"] = None
+    if unparsed:
+        note = "[" + "; ".join(unparsed) + "]"
+        row["comment"] = f"{row['comment']}\n{note}" if row.get("comment") else note
+    return row
+
+
+def _create_indexes(engine, table, *names):
+    # Только индексы своей миграции: в модели уже есть индексы по колонкам,
+    # которые добавят следующие миграции
+    with engine.begin() as conn:
+        for index in table.indexes:
+            if index.name in names:
+                index.create(conn, checkfirst=True)
+
+
+@migration(1, "typed_client_columns")
+def typed_client_columns(engine):
+    # Строковые даты и суммы были только в старых базах SQLite; в других СУБД
+    # таблицу сразу создаёт create_all с нужными типами
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        types = _column_types(conn, "clients")
+        interrupted = inspect(conn).has_table("clients__old")
+    typed = types.get("end_date") == "DATE" and types.get("payment_amount", "").startswith("NUMERIC")
+    if interrupted or not typed:
+        _rebuild_table(engine, models.Client.__table__, _convert_client)
+
+
+@migration(2, "client_indexes")
+def client_indexes(engine):
+    _create_indexes(
+        engine, models.Client.__table__,
+        "ix_clients_deleted_status_end_date", "ix_clients_end_date", "ix_clients_start_date",
+        "ix_clients_trainer_status", "ix_clients_group_status", "ix_clients_surname",
+    )
+
+
+@migration(3, "client_visit_counters")
+def client_visit_counters(engine):
+    with engine.begin() as conn:
+        columns = _column_types(conn, "clients")
+        if "sessions_used" not in columns:
+            conn.execute(text("ALTER TABLE clients ADD COLUMN sessions_used INTEGER NOT NULL DEFAULT 0"))
+        if "last_visit_date" not in columns:
+            conn.execute(text("ALTER TABLE clients ADD COLUMN last_visit_date DATE"))
+
+
+@migration(4, "client_freeze_window")
+def client_freeze_window(engine):
+    with engine.begin() as conn:
+        columns = _column_types(conn, "clients")
+        for column in ("freeze_start", "freeze_end"):
+            if column not in columns:
+                conn.execute(text(f"ALTER TABLE clients ADD COLUMN {column} DATE"))
+    _create_indexes(engine, models.Client.__table__, "ix_clients_status_end_date", "ix_clients_status_freeze_end")
+
+
+@migration(5, "client_reference_links")
+def client_reference_links(engine):
+    from rosters import fill_group_days, link_clients
+
+    with engine.begin() as conn:
+        client_columns = _column_types(conn, "clients")
+        for column, ref in (("trainer_id", "trainers"), ("group_id", "groups")):
+            if column not in client_columns:
+                conn.execute(text(f"ALTER TABLE clients ADD COLUMN {column} INTEGER REFERENCES {ref}(id)"))
+        group_columns = _column_types(conn, "groups")
+        if "trainer_id" not in group_columns:
+            conn.execute(text("ALTER TABLE groups ADD COLUMN trainer_id INTEGER REFERENCES trainers(id)"))
+        if "capacity" not in group_columns:
+            conn.execute(text("ALTER TABLE groups ADD COLUMN capacity INTEGER"))
+    _create_indexes(engine, models.Client.__table__, "ix_clients_trainer_id_status", "ix_clients_group_id_status")
+    # link_clients увеличивает version у клиентов — колонка из миграции 6 нужна уже здесь
+    row_versions(engine)
+    with engine.begin() as conn:
+        linked = link_clients(conn)
+        days = fill_group_days(conn)
+        unresolved = conn.execute(text(
+            'SELECT count(*) FROM clients WHERE (trainer IS NOT NULL AND trainer != \'\' AND trainer_id IS NULL) '
+            'OR ("group" IS NOT NULL AND "group" != \'\' AND group_id IS NULL)'
+        )).scalar()
+    # Имена без записи в справочнике остаются строкой: ссылка появится, когда
+    # тренера или группу с таким именем заведут
+    logger.info("Linked clients to trainers and groups", extra={
+        "linked": linked, "group_days": days, "unresolved_clients": unresolved,
+    })
+
+
+VERSIONED_TABLES = ("clients", "trainers", "groups", "periods", "payments", "freeze_settings")
+
+
+@migration(6, "row_versions")
+def row_versions(engine):
+    with engine.begin() as conn:
+        for table in VERSIONED_TABLES:
+            if "version" not in _column_types(conn, table):
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+@migration(7, "client_archive")
+def client_archive(engine):
+    # Таблицы архива создаёт create_all. clients пересоздаётся с AUTOINCREMENT:
+    # id клиента, перенесённого в архив, не должен достаться новому клиенту
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.connect() as conn:
+        sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'clients'")).scalar()
+        interrupted = inspect(conn).has_table("clients__old")
+    if interrupted or "AUTOINCREMENT" not in sql.upper():
+        _rebuild_table(engine, models.Client.__table__, None)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Date, Text, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Boolean, Date, DateTime, Text, ForeignKey, Float, Numeric, Index, Table, UniqueConstraint
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -10,11 +10,11 @@ class Client(Base):
     surname = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     address = Column(String, nullable=True)
-    birth_date = Column(String, nullable=True)
-    start_date = Column(String, nullable=True)
-    end_date = Column(String, nullable=True)
+    birth_date = Column(Date, nullable=True)
+    start_date = Column(Date, nullable=True)
+    end_date = Column(Date, nullable=True)
     subscription_period = Column(String, nullable=True)
-    payment_amount = Column(String, nullable=True)
+    payment_amount = Column(Numeric(12, 2), nullable=True)
     payment_method = Column(String, nullable=True)
     group = Column(String, nullable=True)
     comment = Column(Text, nullable=True)
@@ -25,6 +25,134 @@ class Client(Base):
     discount_reason = Column(String, nullable=True)
     deleted = Column(Boolean, default=False)
     trainer = Column(String, nullable=True)
+    # Счётчики посещений обновляются в той же транзакции, что и запись в visits
+    sessions_used = Column(Integer, nullable=False, default=0, server_default="0")
+    last_visit_date = Column(Date, nullable=True)
+    # Окно заморозки; после freeze_end планировщик возвращает статус «Активен»
+    freeze_start = Column(Date, nullable=True)
+    freeze_end = Column(Date, nullable=True)
+    # Ссылки на справочники; trainer и group остаются копией имени для фильтров,
+    # сводок и фронтенда и обновляются при переименовании (rosters.py)
+    trainer_id = Column(Integer, ForeignKey("trainers.id", ondelete="SET NULL"), nullable=True)
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="SET NULL"), nullable=True)
+    # Версия строки для ETag и If-Match; растёт при каждой правке (writes.py)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        Index("ix_clients_deleted_status_end_date", "deleted", "status", "end_date"),
+        Index("ix_clients_end_date", "end_date"),
+        Index("ix_clients_start_date", "start_date"),
+        Index("ix_clients_trainer_status", "trainer", "status"),
+        Index("ix_clients_group_status", "group", "status"),
+        Index("ix_clients_surname", "surname"),
+        # Поиск просроченных абонементов и заморозок планировщиком
+        Index("ix_clients_status_end_date", "status", "end_date"),
+        Index("ix_clients_status_freeze_end", "status", "freeze_end"),
+        # Составы групп и тренеров; с deleted число активных по группам для
+        # расписания считается по одному индексу, без чтения строк
+        Index("ix_clients_trainer_id_status", "trainer_id", "status", "deleted"),
+        Index("ix_clients_group_id_status", "group_id", "status", "deleted"),
+        # id не переиспользуется: у клиента в архиве (archive.py) он остаётся
+        # занятым до восстановления
+        {"sqlite_autoincrement": True},
+    )
+
+class Visit(Base):
+    __tablename__ = "visits"
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
+    visit_date = Column(Date, nullable=False)
+    checked_in_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Одно посещение в день, как и в журнале на фронтенде
+        UniqueConstraint("client_id", "visit_date", name="uq_visits_client_date"),
+        Index("ix_visits_visit_date", "visit_date"),
+    )
+
+class StatusTransition(Base):
+    __tablename__ = "status_transitions"
+    id = Column(Integer, primary_key=True, index=True)
+    client_id = Column(Integer, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
+    from_status = Column(String, nullable=False)
+    to_status = Column(String, nullable=False)
+    reason = Column(String, nullable=False)  # expired, thawed
+    changed_at = Column(DateTime, nullable=False)
+
+# --- Архив ---
+# Удалённые и давно завершившие абонемент клиенты (archive.py). Карточка —
+# те же колонки без внешних ключей и индексов горячей таблицы, id клиента
+# сохраняется. Посещения и история статусов переносятся вместе с клиентом
+def _archived_columns(table):
+    return [
+        Column(column.name, column.type, primary_key=column.primary_key, autoincrement=False, nullable=column.nullable)
+        for column in table.columns
+    ]
+
+class ClientArchive(Base):
+    __table__ = Table(
+        "clients_archive", Base.metadata,
+        *_archived_columns(Client.__table__),
+        Column("archived_at", DateTime, nullable=False),
+        Column("archive_reason", String, nullable=False),  # deleted, expired
+        Index("ix_clients_archive_archived_at", "archived_at"),
+    )
+
+class VisitArchive(Base):
+    __tablename__ = "visits_archive"
+    id = Column(Integer, primary_key=True)
+    client_id = Column(Integer, nullable=False, index=True)
+    visit_date = Column(Date, nullable=False)
+    checked_in_at = Column(DateTime, nullable=False)
+
+class StatusTransitionArchive(Base):
+    __tablename__ = "status_transitions_archive"
+    id = Column(Integer, primary_key=True)
+    client_id = Column(Integer, nullable=False, index=True)
+    from_status = Column(String, nullable=False)
+    to_status = Column(String, nullable=False)
+    reason = Column(String, nullable=False)
+    changed_at = Column(DateTime, nullable=False)
+
+# Одна запись на задачу планировщика: кто из воркеров её выполняет и до какого времени
+class SchedulerLease(Base):
+    __tablename__ = "scheduler_leases"
+    name = Column(String, primary_key=True)
+    owner = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+# Журнал изменений для синхронизации вкладок (changes.py): по одной строке на
+# сущность, каждая запись в неё получает новый seq. AUTOINCREMENT — seq не
+# переиспользуется, даже когда строка с наибольшим seq заменяется
+class Change(Base):
+    __tablename__ = "changes"
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # clients, trainers, groups, periods, payments
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # upsert, delete
+
+    __table_args__ = (
+        UniqueConstraint("entity", "entity_id", name="uq_changes_entity"),
+        {"sqlite_autoincrement": True},
+    )
+
+# Сводки для дашбордов поддерживаются триггерами на clients (analytics.py).
+# Пустые группа и тренер хранятся как '', чтобы ключ работал в ON CONFLICT
+class DailySummary(Base):
+    __tablename__ = "analytics_daily"
+    day = Column(Date, primary_key=True)
+    group = Column(String, primary_key=True)
+    trainer = Column(String, primary_key=True)
+    started = Column(Integer, nullable=False, default=0)
+    revenue_cents = Column(Integer, nullable=False, default=0)  # оплаченные абонементы по дате начала
+    expired = Column(Integer, nullable=False, default=0)  # абонементы, закончившиеся в этот день
+
+class MemberSummary(Base):
+    __tablename__ = "analytics_members"
+    group = Column(String, primary_key=True)
+    trainer = Column(String, primary_key=True)
+    status = Column(String, primary_key=True)
+    members = Column(Integer, nullable=False, default=0)
 
 class Trainer(Base):
     __tablename__ = "trainers"
@@ -32,15 +160,33 @@ class Trainer(Base):
     name = Column(String, nullable=False)
     phone = Column(String, nullable=True)
     comment = Column(Text, nullable=True)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    clients = relationship("Client", order_by="Client.id", viewonly=True)
 
 class Group(Base):
     __tablename__ = "groups"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    days = Column(String, nullable=True)  # Список дней через запятую
+    days = Column(String, nullable=True)  # Список дней через запятую, разобранный — в group_days
     time_start = Column(String, nullable=True)
     time_end = Column(String, nullable=True)
     comment = Column(Text, nullable=True)
+    trainer_id = Column(Integer, ForeignKey("trainers.id", ondelete="SET NULL"), nullable=True, index=True)
+    capacity = Column(Integer, nullable=True)  # мест в зале; без него загрузка не считается
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    clients = relationship("Client", order_by="Client.id", viewonly=True)
+
+# День недели занятия группы: 0 — понедельник
+class GroupDay(Base):
+    __tablename__ = "group_days"
+    group_id = Column(Integer, ForeignKey("groups.id", ondelete="CASCADE"), primary_key=True)
+    weekday = Column(Integer, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_group_days_weekday", "weekday"),
+    )
 
 class Period(Base):
     __tablename__ = "periods"
@@ -50,6 +196,7 @@ class Period(Base):
     months = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)  # в рублях
     trainings = Column(Integer, nullable=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class Payment(Base):
     __tablename__ = "payments"
@@ -58,6 +205,7 @@ class Payment(Base):
     value = Column(String, nullable=False, unique=True)
     type = Column(String, nullable=False)  # cash, card, transfer
     banks = Column(Text, nullable=True)  # JSON список банков
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
 class FreezeSettings(Base):
     __tablename__ = "freeze_settings"
@@ -65,3 +213,4 @@ class FreezeSettings(Base):
     maxDays = Column(Integer, default=30)
     reasons = Column(Text, nullable=True)  # JSON список причин
     requireConfirm = Column(Boolean, default=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
@@ -0,0 +1,110 @@
+import base64
+import json
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(value, row_id):
+    raw = json.dumps([value, row_id], ensure_ascii=False, default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return value, row_id
+
+
+def _cursor_value(column, value):
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+        if python_type is date:
+            return date.fromisoformat(value)
+        if python_type is Decimal:
+            return Decimal(value)
+    except (NotImplementedError, ValueError, TypeError, ArithmeticError):
+        raise ValueError("Invalid cursor")
+    return value
+
+
+def keyset_segments(stmt, column, id_column, descending=False, cursor=None):
+    # NULL считаются наименьшими значениями. Строки с NULL и без выбираются
+    # отдельными запросами, чтобы каждый из них шёл по индексу (col, id).
+    def values(after=None):
+        q = stmt
+        if column is id_column:
+            if after is not None:
+                q = q.where(id_column < after[1] if descending else id_column > after[1])
+            return q.order_by(id_column.desc() if descending else id_column.asc())
+        if column.nullable:
+            q = q.where(column.isnot(None))
+        if after is not None:
+            key, bound = tuple_(column, id_column), tuple_(*after)
+            q = q.where(key < bound if descending else key > bound)
+        if descending:
+            return q.order_by(column.desc(), id_column.desc())
+        return q.order_by(column.asc(), id_column.asc())
+
+    def nulls(after_id=None):
+        q = stmt.where(column.is_(None))
+        if after_id is not None:
+            q = q.where(id_column < after_id if descending else id_column > after_id)
+        return q.order_by(id_column.desc() if descending else id_column.asc())
+
+    with_nulls = column is not id_column and column.nullable
+    if cursor is None:
+        if with_nulls:
+            return [values(), nulls()] if descending else [nulls(), values()]
+        return [values()]
+
+    value, last_id = decode_cursor(cursor)
+    value = _cursor_value(column, value)
+    if value is None and with_nulls:
+        return [nulls(last_id)] if descending else [nulls(last_id), values()]
+    if value is None:
+        raise ValueError("Invalid cursor")
+    segments = [values((value, last_id))]
+    if with_nulls and descending:
+        segments.append(nulls())
+    return segments
+
+
+def _finish_page(rows, column, id_column, limit):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def _fetch(result, tuples):
+    # tuples=True — выборка отдельных колонок, строки без ORM-объектов
+    return result.all() if tuples else result.scalars().all()
+
+
+def keyset_page(db, stmt, column, id_column, descending=False, cursor=None, limit=50, tuples=False):
+    rows = []
+    for segment in keyset_segments(stmt, column, id_column, descending, cursor):
+        rows.extend(_fetch(db.execute(segment.limit(limit + 1 - len(rows))), tuples))
+        if len(rows) > limit:
+            break
+    return _finish_page(rows, column, id_column, limit)
+
+
+async def keyset_page_async(db, stmt, column, id_column, descending=False, cursor=None, limit=50, tuples=False):
+    rows = []
+    for segment in keyset_segments(stmt, column, id_column, descending, cursor):
+        rows.extend(_fetch(await db.execute(segment.limit(limit + 1 - len(rows))), tuples))
+        if len(rows) > limit:
+            break
+    return _finish_page(rows, column, id_column, limit)
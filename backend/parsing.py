@@ -0,0 +1,43 @@
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y", "%d.%m.%y", "%d/%m/%Y")
+
+
+def parse_date(value):
+    if value is None or isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    value = str(value).strip()
+    if not value:
+        return None
+    # ISO с временем: 2025-05-24T00:00:00.000Z
+    candidate = value[:10] if re.match(r"\d{4}-\d{2}-\d{2}T", value) else value
+    # Быстрый путь для ISO: strptime заметно медленнее при массовом импорте
+    if len(candidate) == 10 and candidate[4] == "-":
+        try:
+            return date.fromisoformat(candidate)
+        except ValueError:
+            pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(candidate, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date: {value}")
+
+
+def parse_money(value):
+    if value is None or isinstance(value, Decimal):
+        return value
+    if isinstance(value, (int, float)):
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    value = re.sub(r"[\s₽]|руб\.?|р\.", "", str(value), flags=re.IGNORECASE)
+    if not value:
+        return None
+    try:
+        return Decimal(value.replace(",", ".")).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        raise ValueError(f"Invalid amount: {value}")
@@ -0,0 +1,49 @@
+"""Готовит сжатые копии (.gz, .br) статики фронтенда после сборки.
+
+    python precompress.py static
+
+brotli необязателен: без него создаются только .gz.
+"""
+import gzip
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONS = (".js", ".css", ".html", ".svg", ".json", ".txt", ".map")
+MINIMUM_SIZE = 1024
+
+
+def _up_to_date(source, target):
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def precompress(directory):
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if not name.endswith(EXTENSIONS) or os.path.getsize(path) < MINIMUM_SIZE:
+                continue
+            with open(path, "rb") as f:
+                data = None
+                if not _up_to_date(path, path + ".gz"):
+                    data = f.read()
+                    with open(path + ".gz", "wb") as out:
+                        out.write(gzip.compress(data, compresslevel=9, mtime=0))
+                    written.append(path + ".gz")
+                if brotli is not None and not _up_to_date(path, path + ".br"):
+                    data = data if data is not None else f.read()
+                    with open(path + ".br", "wb") as out:
+                        out.write(brotli.compress(data, quality=11))
+                    written.append(path + ".br")
+    return written
+
+
+if __name__ == "__main__":
+    directory = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+    for path in precompress(directory):
+        print(path)
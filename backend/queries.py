@@ -0,0 +1,33 @@
+from sqlalchemy import select
+
+import models
+
+CLIENT_SORT_FIELDS = {
+    "id": models.Client.id,
+    "surname": models.Client.surname,
+    "name": models.Client.name,
+    "contract_number": models.Client.contract_number,
+    "start_date": models.Client.start_date,
+    "end_date": models.Client.end_date,
+}
+
+
+def client_list_statement(
+    status=None, trainer=None, group=None, deleted=None, paid=None, columns=None, trainer_id=None, group_id=None,
+):
+    stmt = select(*columns) if columns else select(models.Client)
+    if status is not None:
+        stmt = stmt.where(models.Client.status == status)
+    if trainer is not None:
+        stmt = stmt.where(models.Client.trainer == trainer)
+    if group is not None:
+        stmt = stmt.where(models.Client.group == group)
+    if deleted is not None:
+        stmt = stmt.where(models.Client.deleted == deleted)
+    if paid is not None:
+        stmt = stmt.where(models.Client.paid == paid)
+    if trainer_id is not None:
+        stmt = stmt.where(models.Client.trainer_id == trainer_id)
+    if group_id is not None:
+        stmt = stmt.where(models.Client.group_id == group_id)
+    return stmt
@@ -0,0 +1,61 @@
+import hashlib
+import os
+import threading
+import time
+from collections import defaultdict, namedtuple
+
+from fastapi.responses import Response
+
+# Между воркерами инвалидация не передаётся, TTL ограничивает устаревание
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "60"))
+
+CacheEntry = namedtuple("CacheEntry", "version body etag stored_at")
+
+
+class ReferenceCache:
+    def __init__(self, ttl=REFERENCE_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._versions = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.misses = defaultdict(int)
+
+    def version(self, key):
+        return self._versions[key]
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry.version != self._versions[key] or time.monotonic() - entry.stored_at > self.ttl:
+            self.misses[key] += 1
+            return None
+        self.hits[key] += 1
+        return entry
+
+    def put(self, key, body, version):
+        # version берётся до чтения из БД: если за это время справочник
+        # изменили, результат отдаётся, но в кэш не попадает
+        entry = CacheEntry(version, body, '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"', time.monotonic())
+        with self._lock:
+            if self.ttl > 0 and version == self._versions[key]:
+                self._entries[key] = entry
+        return entry
+
+    def invalidate(self, key):
+        with self._lock:
+            self._versions[key] += 1
+            self._entries.pop(key, None)
+
+    def stats(self):
+        keys = sorted(set(self.hits) | set(self.misses))
+        return {key: {"hits": self.hits[key], "misses": self.misses[key], "version": self._versions[key]} for key in keys}
+
+
+reference_cache = ReferenceCache()
+
+
+def reference_response(request, entry):
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == entry.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
@@ -0,0 +1,295 @@
+import re
+from collections import Counter
+
+from sqlalchemy import case, delete, exists, func, insert, or_, select, update
+from sqlalchemy.orm import selectinload
+
+import models
+
+ACTIVE = "Активен"
+FROZEN = "Заморожен"
+
+WEEKDAYS = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+# Как дни записаны в groups.days: фронтенд пишет «Пн,Ср,Пт», в старых данных
+# встречаются полные названия и английские сокращения
+_DAY_NAMES = {
+    **{name.lower(): index for index, name in enumerate(WEEKDAYS)},
+    **{name: index for index, name in enumerate(
+        ("понедельник", "вторник", "среда", "четверг", "пятница", "суббота", "воскресенье"))},
+    **{name: index for index, name in enumerate(("mon", "tue", "wed", "thu", "fri", "sat", "sun"))},
+    **{name: index for index, name in enumerate(
+        ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"))},
+}
+
+clients = models.Client.__table__
+trainers = models.Trainer.__table__
+groups = models.Group.__table__
+group_days = models.GroupDay.__table__
+
+# Поле id, поле с копией имени, справочник
+LINKS = (
+    ("trainer_id", "trainer", trainers),
+    ("group_id", "group", groups),
+)
+
+
+def parse_days(value):
+    # Неизвестные слова пропускаются, порядок и повторы не важны
+    days = set()
+    for token in re.split(r"[,;\s]+", (value or "").strip().lower()):
+        if token in _DAY_NAMES:
+            days.add(_DAY_NAMES[token])
+    return sorted(days)
+
+
+# --- Ссылки клиентов на справочники ---
+def link_statements(ref_table=None, ref_id=None):
+    # Пакетная сверка: имя по id (переименование) и id по имени у клиентов без
+    # ссылки (миграция, импорт, новый тренер с именем из старых записей)
+    for id_field, name_field, ref in LINKS:
+        if ref_table is not None and ref is not ref_table:
+            continue
+        id_column, name_column = clients.c[id_field], clients.c[name_field]
+        current_name = select(ref.c.name).where(ref.c.id == id_column).scalar_subquery()
+        rename = update(clients).where(
+            id_column.isnot(None), exists().where(ref.c.id == id_column), name_column.is_distinct_from(current_name),
+        ).values({name_field: current_name, "version": clients.c.version + 1})
+        link = update(clients).where(
+            id_column.is_(None), name_column.isnot(None), exists().where(ref.c.name == name_column),
+        ).values({
+            id_field: select(func.min(ref.c.id)).where(ref.c.name == name_column).scalar_subquery(),
+            "version": clients.c.version + 1,
+        })
+        if ref_id is not None:
+            rename = rename.where(id_column == ref_id)
+            link = link.where(name_column == select(ref.c.name).where(ref.c.id == ref_id).scalar_subquery())
+        yield rename
+        yield link
+
+
+def link_clients(conn, ref_table=None, ref_id=None):
+    return sum(conn.execute(stmt).rowcount for stmt in link_statements(ref_table, ref_id))
+
+
+def unlink_clients(db, ref_table, ref_id):
+    # Клиенты удалённого тренера или группы сохраняют имя, но теряют ссылку
+    id_field = next(id_field for id_field, _, ref in LINKS if ref is ref_table)
+    db.execute(update(clients).where(clients.c[id_field] == ref_id).values({id_field: None, "version": clients.c.version + 1}))
+    if ref_table is trainers:
+        db.execute(update(groups).where(groups.c.trainer_id == ref_id).values(trainer_id=None, version=groups.c.version + 1))
+    else:
+        db.execute(delete(group_days).where(group_days.c.group_id == ref_id))
+
+
+def _lookup(values, current, id_field, name_field):
+    # id важнее имени; если id не менялся, а имя поменяли — id ищется по имени.
+    # Фронтенд присылает клиента целиком, поэтому сравнение с текущими значениями
+    if id_field in values and values[id_field] != getattr(current, id_field, None):
+        return ("id", values[id_field]) if values[id_field] is not None else None
+    if name_field in values and values[name_field] != getattr(current, name_field, None):
+        return "name", values[name_field]
+    return None
+
+
+def _lookup_statement(ref, by, value):
+    if by == "id":
+        return select(ref.c.id, ref.c.name).where(ref.c.id == value)
+    return select(ref.c.id, ref.c.name).where(ref.c.name == value).order_by(ref.c.id).limit(1)
+
+
+def _apply_lookup(values, id_field, name_field, by, row):
+    if by == "id":
+        if row is None:
+            raise ValueError(f"Unknown {id_field}: {values[id_field]}")
+        values[name_field] = row.name
+    else:
+        values[id_field] = row.id if row is not None else None
+
+
+def resolve_links(db, values, current=None):
+    for id_field, name_field, ref in LINKS:
+        lookup = _lookup(values, current, id_field, name_field)
+        if lookup is None:
+            continue
+        by, value = lookup
+        row = db.execute(_lookup_statement(ref, by, value)).first() if value else None
+        _apply_lookup(values, id_field, name_field, by, row)
+    return values
+
+
+async def resolve_links_async(db, values, current=None):
+    for id_field, name_field, ref in LINKS:
+        lookup = _lookup(values, current, id_field, name_field)
+        if lookup is None:
+            continue
+        by, value = lookup
+        row = (await db.execute(_lookup_statement(ref, by, value))).first() if value else None
+        _apply_lookup(values, id_field, name_field, by, row)
+    return values
+
+
+def _name_by_id(ref, ref_id):
+    return select(ref.c.name).where(ref.c.id == ref_id).scalar_subquery()
+
+
+def _id_by_name(ref, name):
+    return select(func.min(ref.c.id)).where(ref.c.name == name).scalar_subquery() if name else None
+
+
+def link_values(values, update=False):
+    # Разрешение ссылок внутри самого INSERT/UPDATE: вместо поиска в справочнике
+    # до записи — подзапросы, а для UPDATE ещё и сравнение с текущей строкой
+    # через CASE (те же правила, что в _lookup). Неизвестный id проверяет
+    # check_links по возвращённой строке
+    values = dict(values)
+    for id_field, name_field, ref in LINKS:
+        has_id, has_name = id_field in values, name_field in values
+        if not update:
+            lookup = _lookup(values, None, id_field, name_field)
+            if lookup is not None:
+                by, value = lookup
+                if by == "id":
+                    values[name_field] = _name_by_id(ref, value)
+                else:
+                    values[id_field] = _id_by_name(ref, value)
+            continue
+        if not (has_id or has_name):
+            continue
+        id_column, name_column = clients.c[id_field], clients.c[name_field]
+        sent_name = values[name_field] if has_name else name_column
+        whens = []
+        if has_id:
+            id_changed = id_column.is_distinct_from(values[id_field])
+            whens.append((id_changed, values[id_field]))
+        if has_name:
+            whens.append((name_column.is_distinct_from(values[name_field]), _id_by_name(ref, values[name_field])))
+        new_name = sent_name
+        if has_id and values[id_field] is not None:
+            new_name = case((id_changed, _name_by_id(ref, values[id_field])), else_=sent_name)
+        values[id_field] = case(*whens, else_=id_column)
+        values[name_field] = new_name
+    return values
+
+
+def check_links(values, row):
+    # Ссылка на несуществующую запись справочника оставляет имя пустым
+    for id_field, name_field, _ in LINKS:
+        if values.get(id_field) is not None and getattr(row, name_field) is None:
+            raise ValueError(f"Unknown {id_field}: {values[id_field]}")
+
+
+def _many_lookups(items, currents):
+    # Пачка клиентов: один запрос на справочник, а не на каждого клиента
+    for id_field, name_field, ref in LINKS:
+        lookups = {}
+        for index, values in enumerate(items):
+            lookup = _lookup(values, currents[index] if currents else None, id_field, name_field)
+            if lookup is not None:
+                lookups[index] = lookup
+        ids = {value for by, value in lookups.values() if by == "id" and value}
+        names = {value for by, value in lookups.values() if by == "name" and value}
+        stmt = None
+        if ids or names:
+            stmt = select(ref.c.id, ref.c.name).where(or_(ref.c.id.in_(ids), ref.c.name.in_(names))).order_by(ref.c.id)
+        yield id_field, name_field, lookups, stmt
+
+
+def _apply_many(items, id_field, name_field, lookups, rows, failures):
+    by_id = {row.id: row for row in rows}
+    by_name = {}
+    for row in rows:
+        by_name.setdefault(row.name, row)  # как и для одного клиента — наименьший id
+    for index, (by, value) in lookups.items():
+        if index in failures:
+            continue
+        row = (by_id if by == "id" else by_name).get(value) if value else None
+        try:
+            _apply_lookup(items[index], id_field, name_field, by, row)
+        except ValueError as e:
+            failures[index] = str(e)
+
+
+def resolve_links_many(db, items, currents=None):
+    # Возвращает ошибки по номерам в items; остальные значения дополняются на месте
+    failures = {}
+    for id_field, name_field, lookups, stmt in _many_lookups(items, currents):
+        rows = db.execute(stmt).all() if stmt is not None else []
+        _apply_many(items, id_field, name_field, lookups, rows, failures)
+    return failures
+
+
+async def resolve_links_many_async(db, items, currents=None):
+    failures = {}
+    for id_field, name_field, lookups, stmt in _many_lookups(items, currents):
+        rows = (await db.execute(stmt)).all() if stmt is not None else []
+        _apply_many(items, id_field, name_field, lookups, rows, failures)
+    return failures
+
+
+def sync_group_days(db, group):
+    db.execute(delete(group_days).where(group_days.c.group_id == group.id))
+    days = parse_days(group.days)
+    if days:
+        db.execute(insert(group_days), [{"group_id": group.id, "weekday": weekday} for weekday in days])
+
+
+def fill_group_days(conn):
+    # Для миграции: разбирает groups.days у всех групп
+    conn.execute(delete(group_days))
+    rows = [
+        {"group_id": group_id, "weekday": weekday}
+        for group_id, days in conn.execute(select(groups.c.id, groups.c.days))
+        for weekday in parse_days(days)
+    ]
+    if rows:
+        conn.execute(insert(group_days), rows)
+    return len(rows)
+
+
+# --- Составы ---
+def roster(db, model, ref_id, include_deleted=False):
+    # Два запроса при любом размере состава: справочник и его клиенты (selectinload)
+    members = model.clients
+    if not include_deleted:
+        members = members.and_(models.Client.deleted.isnot(True))
+    ref = db.query(model).options(selectinload(members)).filter(model.id == ref_id).first()
+    if ref is None:
+        return None
+    statuses = Counter(client.status for client in ref.clients)
+    return {
+        "id": ref.id, "name": ref.name, "total": len(ref.clients),
+        "active": statuses[ACTIVE], "frozen": statuses[FROZEN], "clients": ref.clients,
+    }
+
+
+# --- Расписание ---
+def active_members_statement():
+    return (
+        select(clients.c.group_id, func.count())
+        .where(clients.c.group_id.isnot(None), clients.c.status == ACTIVE, clients.c.deleted.isnot(True))
+        .group_by(clients.c.group_id)
+    )
+
+
+def weekly_schedule(db, trainer_id=None):
+    members = dict(db.execute(active_members_statement()).all())
+    sessions = (
+        select(
+            group_days.c.weekday, groups.c.id, groups.c.name, groups.c.time_start, groups.c.time_end,
+            groups.c.trainer_id, groups.c.capacity,
+        )
+        .join(groups, groups.c.id == group_days.c.group_id)
+        .order_by(group_days.c.weekday, groups.c.time_start, groups.c.name)
+    )
+    if trainer_id is not None:
+        sessions = sessions.where(groups.c.trainer_id == trainer_id)
+    week = [{"weekday": weekday, "day": day, "members": 0, "sessions": []} for weekday, day in enumerate(WEEKDAYS)]
+    for weekday, group_id, name, time_start, time_end, group_trainer_id, capacity in db.execute(sessions):
+        count = members.get(group_id, 0)
+        week[weekday]["members"] += count
+        week[weekday]["sessions"].append({
+            "group_id": group_id, "group": name, "time_start": time_start, "time_end": time_end,
+            "trainer_id": group_trainer_id, "members": count, "capacity": capacity,
+            "occupancy": round(count / capacity, 3) if capacity else None,
+        })
+    return week
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+import models
+from archive import run_archive
+from backup import run_backup
+from database import SessionLocal
+
+# 0 — фоновые проходы не запускаются (POST /scheduler/run работает всегда)
+SCHEDULER = os.getenv("SCHEDULER", "1") != "0"
+SCHEDULER_INTERVAL = float(os.getenv("SCHEDULER_INTERVAL", "300"))
+SCHEDULER_CHUNK_SIZE = int(os.getenv("SCHEDULER_CHUNK_SIZE", "1000"))
+# Аренда дольше интервала: воркер-владелец продлевает её каждым проходом,
+# остальные забирают задачу, только если он пропал
+SCHEDULER_LEASE_SECONDS = float(os.getenv("SCHEDULER_LEASE_SECONDS", str(SCHEDULER_INTERVAL * 2)))
+# Первый проход после запуска откладывается: проснувшийся инстанс сначала
+# отвечает на запросы, которые его разбудили
+SCHEDULER_START_DELAY = float(os.getenv("SCHEDULER_START_DELAY", "30"))
+
+ACTIVE = "Активен"
+FROZEN = "Заморожен"
+FINISHED = "Завершён"
+
+logger = logging.getLogger(__name__)
+
+clients = models.Client.__table__
+transitions = models.StatusTransition.__table__
+leases = models.SchedulerLease.__table__
+
+# Причина, из какого статуса, в какой, по какой дате. Разморозка идёт первой:
+# у размороженного клиента с прошедшим end_date абонемент завершится в том же проходе
+TRANSITIONS = (
+    ("thawed", FROZEN, ACTIVE, clients.c.freeze_end),
+    ("expired", ACTIVE, FINISHED, clients.c.end_date),
+)
+
+
+# --- Аренда ---
+def _insert(db, table):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(table)
+
+
+def acquire_lease(db, name, owner, now, seconds):
+    # Одна команда: новая аренда, продление своей или захват просроченной
+    stmt = _insert(db, leases).values(name=name, owner=owner, expires_at=now + timedelta(seconds=seconds))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"owner": stmt.excluded.owner, "expires_at": stmt.excluded.expires_at},
+        where=or_(leases.c.owner == owner, leases.c.expires_at < now),
+    )
+    acquired = db.execute(stmt).rowcount == 1
+    db.commit()
+    return acquired
+
+
+def release_lease(db, name, owner):
+    db.execute(update(leases).where(leases.c.name == name, leases.c.owner == owner).values(expires_at=datetime.min))
+    db.commit()
+
+
+# --- Смена статусов ---
+def _due(from_status, column, today, chunk_size):
+    # Индексы (status, end_date) и (status, freeze_end)
+    return select(clients.c.id).where(
+        clients.c.status == from_status, column < today, clients.c.deleted.isnot(True),
+    ).limit(chunk_size)
+
+
+def apply_transition(db, reason, from_status, to_status, column, now, chunk_size=SCHEDULER_CHUNK_SIZE):
+    # Пачка — одна транзакция: UPDATE ... RETURNING и запись истории. Условие
+    # повторяется в самом UPDATE, поэтому параллельный проход ничего не задвоит
+    today = now.date()
+    changed = 0
+    while True:
+        ids = db.execute(
+            update(clients)
+            .where(clients.c.id.in_(_due(from_status, column, today, chunk_size)))
+            .values(status=to_status, version=clients.c.version + 1)
+            .returning(clients.c.id)
+        ).scalars().all()
+        if ids:
+            db.execute(insert(transitions), [
+                {"client_id": client_id, "from_status": from_status, "to_status": to_status,
+                 "reason": reason, "changed_at": now}
+                for client_id in ids
+            ])
+        db.commit()
+        changed += len(ids)
+        if len(ids) < chunk_size:
+            return changed
+
+
+def run_transitions(db, now, chunk_size=SCHEDULER_CHUNK_SIZE):
+    return {
+        reason: apply_transition(db, reason, from_status, to_status, column, now, chunk_size)
+        for reason, from_status, to_status, column in TRANSITIONS
+    }
+
+
+# --- Планировщик ---
+class Scheduler:
+    def __init__(self, session_factory=SessionLocal, clock=datetime.now, interval=SCHEDULER_INTERVAL,
+                 lease_seconds=SCHEDULER_LEASE_SECONDS, chunk_size=SCHEDULER_CHUNK_SIZE, start_delay=SCHEDULER_START_DELAY):
+        self.session_factory = session_factory
+        self.clock = clock
+        self.interval = interval
+        self.start_delay = start_delay
+        self.lease_seconds = lease_seconds
+        self.chunk_size = chunk_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs = {}
+        # Реестр клубов (tenancy.py): задачи выполняются в базе каждого клуба
+        self.registry = None
+        self._task = None
+
+    def add_job(self, name, func):
+        self.jobs[name] = func
+
+    def _databases(self):
+        if self.registry is None:
+            yield None, self.session_factory
+            return
+        for tenant in self.registry.tenants():
+            # База, которая не открывается (повреждён файл, не прошла миграция), пропускается
+            try:
+                with self.registry.borrowed(tenant) as session_factory:
+                    yield tenant, session_factory
+            except Exception:
+                logger.exception("Tenant database unavailable", extra={"tenant": tenant})
+
+    def run_once(self, session_factory=None, tenant=None, jobs=None):
+        # Задачу выполняет тот воркер, который держит её аренду; у остальных — None.
+        # jobs — только эти задачи (по имени), без него — все
+        session_factory = session_factory or self.session_factory
+        results = {}
+        for name in jobs or list(self.jobs):
+            func = self.jobs[name]
+            with session_factory() as db:
+                if not acquire_lease(db, name, self.owner, self.clock(), self.lease_seconds):
+                    results[name] = None
+                    continue
+                started = time.perf_counter()
+                results[name] = func(db, self.clock(), self.chunk_size)
+            # Пустые проходы раз в несколько минут — только в DEBUG
+            level = logging.INFO if any(results[name].values()) else logging.DEBUG
+            extra = {"job": name, "result": results[name], "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+            if tenant is not None:
+                extra["tenant"] = tenant
+            logger.log(level, "Scheduler job finished", extra=extra)
+        return results
+
+    def run_all(self):
+        # Ошибка в базе одного клуба не останавливает проход по остальным
+        for tenant, session_factory in self._databases():
+            try:
+                self.run_once(session_factory, tenant)
+            except Exception:
+                if tenant is None:
+                    raise
+                logger.exception("Scheduler pass failed", extra={"tenant": tenant})
+        if self.registry is not None:
+            self.registry.evict_idle()
+
+    async def _loop(self):
+        await asyncio.sleep(self.start_delay)
+        while True:
+            try:
+                await asyncio.to_thread(self.run_all)
+            except Exception:
+                logger.exception("Scheduler pass failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for _, session_factory in self._databases():
+            with session_factory() as db:
+                for name in self.jobs:
+                    release_lease(db, name, self.owner)
+
+
+scheduler = Scheduler()
+scheduler.add_job("status_transitions", run_transitions)
+# После смены статусов: абонемент, завершённый в этом проходе, давно истёкшим ещё не считается
+scheduler.add_job("archive", run_archive)
+# Последней: копия снимается с базы, где статусы и архив уже обновлены
+scheduler.add_job("backup", run_backup)
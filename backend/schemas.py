@@ -0,0 +1,313 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+from parsing import parse_date, parse_money
+
+# --- Клиенты ---
+class ClientBase(BaseModel):
+    contract_number: Optional[str] = None
+    name: str
+    surname: str
+    phone: str
+    address: Optional[str] = None
+    birth_date: Optional[date] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    subscription_period: Optional[str] = None
+    payment_amount: Optional[Decimal] = None
+    payment_method: Optional[str] = None
+    group: Optional[str] = None
+    comment: Optional[str] = None
+    status: Optional[str] = "Активен"
+    paid: Optional[bool] = False
+    total_sessions: Optional[int] = 0
+    has_discount: Optional[bool] = False
+    discount_reason: Optional[str] = None
+    deleted: Optional[bool] = False
+    trainer: Optional[str] = None
+    freeze_start: Optional[date] = None
+    freeze_end: Optional[date] = None
+    # Приоритетнее имени: по id подставляется актуальное имя тренера и группы
+    trainer_id: Optional[int] = None
+    group_id: Optional[int] = None
+
+    # Фронтенд присылает пустые строки и суммы строкой
+    @field_validator("birth_date", "start_date", "end_date", "freeze_start", "freeze_end", mode="before")
+    @classmethod
+    def parse_dates(cls, value):
+        return parse_date(value)
+
+    @field_validator("payment_amount", mode="before")
+    @classmethod
+    def parse_amount(cls, value):
+        return parse_money(value)
+
+class ClientCreate(ClientBase):
+    pass
+class ClientUpdate(ClientBase):
+    pass
+class ClientOut(ClientBase):
+    id: int
+    sessions_used: int = 0
+    last_visit_date: Optional[date] = None
+    version: int = 1  # то же значение, что в ETag; передаётся обратно в If-Match
+    class Config:
+        from_attributes = True
+
+class ClientArchiveOut(ClientOut):
+    archived_at: datetime
+    archive_reason: str  # deleted, expired
+
+class ClientPage(BaseModel):
+    items: List[ClientOut]
+    next_cursor: Optional[str] = None
+
+# --- Пакетные правки ---
+class ClientPatch(ClientBase):
+    # Частичная правка: применяются только присланные поля
+    name: Optional[str] = None
+    surname: Optional[str] = None
+    phone: Optional[str] = None
+
+    @field_validator("name", "surname", "phone")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
+class ClientBatchItem(ClientPatch):
+    id: int
+
+class ClientFilter(BaseModel):
+    status: Optional[str] = None
+    trainer: Optional[str] = None
+    group: Optional[str] = None
+    trainer_id: Optional[int] = None
+    group_id: Optional[int] = None
+    paid: Optional[bool] = None
+    deleted: Optional[bool] = None  # не задан — удалённые клиенты не затрагиваются
+    client_ids: Optional[List[int]] = Field(None, max_length=5000)
+
+class ClientBatch(BaseModel):
+    # Либо список правок по id, либо фильтр и одна правка для всех подходящих
+    items: Optional[List[ClientBatchItem]] = Field(None, max_length=5000)
+    filter: Optional[ClientFilter] = None
+    patch: Optional[ClientPatch] = None
+
+class BatchFailure(BaseModel):
+    id: int
+    detail: str
+
+class ClientBatchOut(BaseModel):
+    updated: List[int]
+    failed: List[BatchFailure] = []
+
+# --- Посещения ---
+class VisitCreate(BaseModel):
+    visit_date: Optional[date] = None
+
+    @field_validator("visit_date", mode="before")
+    @classmethod
+    def parse_visit_date(cls, value):
+        return parse_date(value)
+
+class VisitOut(BaseModel):
+    id: int
+    client_id: int
+    visit_date: date
+    checked_in_at: datetime
+    class Config:
+        from_attributes = True
+
+class CheckInOut(BaseModel):
+    client_id: int
+    visit_date: date
+    checked_in: bool  # False — посещение за эту дату уже было отмечено
+    sessions_used: int
+    remaining_sessions: Optional[int] = None
+    last_visit_date: Optional[date] = None
+
+class GroupCheckIn(VisitCreate):
+    group: Optional[str] = None
+    client_ids: Optional[List[int]] = Field(None, max_length=5000)
+
+class GroupCheckInOut(BaseModel):
+    visit_date: date
+    checked_in: List[int]
+    skipped: List[int]  # уже отмечены за эту дату
+    not_found: List[int] = []  # нет такого клиента или он удалён
+
+# --- Смена статусов ---
+class StatusTransitionOut(BaseModel):
+    id: int
+    client_id: int
+    from_status: str
+    to_status: str
+    reason: str
+    changed_at: datetime
+    class Config:
+        from_attributes = True
+
+class SchedulerRunOut(BaseModel):
+    ran: bool
+    transitions: dict = {}
+
+# --- Журнал изменений ---
+class ChangesOut(BaseModel):
+    cursor: int  # передаётся в следующий запрос как since
+    more: bool = False  # изменений больше лимита, нужен ещё запрос
+    reset: bool = False  # since впереди журнала (БД восстановлена) — перезагрузить списки целиком
+    upserts: Dict[str, List[dict]] = {}
+    deletes: Dict[str, List[int]] = {}
+
+
+# --- Аналитика ---
+class RevenueRow(BaseModel):
+    period: str
+    started: int
+    revenue: Decimal
+    expired: int
+
+class MembersRow(BaseModel):
+    name: Optional[str] = None
+    active: int
+    frozen: int
+    total: int
+
+
+# --- Тренеры ---
+class TrainerBase(BaseModel):
+    name: str
+    phone: Optional[str] = None
+    comment: Optional[str] = None
+class TrainerCreate(TrainerBase):
+    pass
+class TrainerUpdate(TrainerBase):
+    pass
+class TrainerOut(TrainerBase):
+    id: int
+    version: int = 1
+    class Config:
+        from_attributes = True
+
+# --- Группы ---
+class GroupBase(BaseModel):
+    name: str
+    days: Optional[str] = None
+    time_start: Optional[str] = None
+    time_end: Optional[str] = None
+    comment: Optional[str] = None
+    trainer_id: Optional[int] = None
+    capacity: Optional[int] = Field(None, ge=1)
+class GroupCreate(GroupBase):
+    pass
+class GroupUpdate(GroupBase):
+    pass
+class GroupOut(GroupBase):
+    id: int
+    version: int = 1
+    class Config:
+        from_attributes = True
+
+# --- Составы и расписание ---
+class RosterOut(BaseModel):
+    id: int
+    name: str
+    total: int
+    active: int
+    frozen: int
+    clients: List[ClientOut]
+
+class ScheduleSession(BaseModel):
+    group_id: int
+    group: str
+    time_start: Optional[str] = None
+    time_end: Optional[str] = None
+    trainer_id: Optional[int] = None
+    members: int  # активные клиенты группы
+    capacity: Optional[int] = None
+    occupancy: Optional[float] = None  # members / capacity
+
+class ScheduleDay(BaseModel):
+    weekday: int  # 0 — понедельник
+    day: str
+    members: int
+    sessions: List[ScheduleSession]
+
+# --- Периоды абонементов ---
+class PeriodBase(BaseModel):
+    label: str
+    value: str
+    months: int
+    price: float
+    trainings: int
+
+class PeriodCreate(PeriodBase):
+    pass
+class PeriodUpdate(PeriodBase):
+    pass
+class PeriodOut(PeriodBase):
+    id: int
+    version: int = 1
+    class Config:
+        from_attributes = True
+
+# --- Способы оплаты ---
+class PaymentBase(BaseModel):
+    label: str
+    value: str
+    type: str
+    banks: Optional[List[str]] = []
+
+class PaymentCreate(PaymentBase):
+    pass
+class PaymentUpdate(PaymentBase):
+    pass
+class PaymentOut(PaymentBase):
+    id: int
+    version: int = 1
+    class Config:
+        from_attributes = True
+
+# --- Настройки заморозки ---
+class FreezeSettingsBase(BaseModel):
+    maxDays: int = 30
+    reasons: List[str] = []
+    requireConfirm: bool = False
+
+class FreezeSettingsCreate(FreezeSettingsBase):
+    pass
+class FreezeSettingsUpdate(FreezeSettingsBase):
+    pass
+class FreezeSettingsOut(FreezeSettingsBase):
+    id: int
+    version: int = 1
+    class Config:
+        from_attributes = True
+
+
+# В БД списки банков и причин хранятся JSON-строкой
+def load_json_list(value):
+    if not value:
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        return []
+
+def payment_out(payment):
+    return PaymentOut(
+        id=payment.id, label=payment.label, value=payment.value, type=payment.type,
+        banks=load_json_list(payment.banks), version=payment.version,
+    )
+
+def freeze_settings_out(settings):
+    return FreezeSettingsOut(
+        id=settings.id, maxDays=settings.maxDays, requireConfirm=settings.requireConfirm,
+        reasons=load_json_list(settings.reasons), version=settings.version,
+    )
@@ -0,0 +1,253 @@
+import re
+
+from sqlalchemy import or_, select, text
+
+import models
+
+FTS_TABLE = "clients_fts"
+ARCHIVE_FTS_TABLE = "clients_archive_fts"
+RANK_LIMIT = 500
+
+# Телефон без форматирования, российские номера приводятся к виду 7XXXXXXXXXX
+_DIGITS_SQL = (
+    "replace(replace(replace(replace(replace(replace(coalesce({col}, ''),"
+    " ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', '')"
+)
+_PHONE_SQL = (
+    "CASE WHEN length({d}) = 11 AND substr({d}, 1, 1) = '8'"
+    " THEN '7' || substr({d}, 2) ELSE {d} END"
+)
+
+
+def _phone_sql(col):
+    return _PHONE_SQL.format(d=_DIGITS_SQL.format(col=col))
+
+
+def _local_phone_sql(col):
+    return f"substr({_phone_sql(col)}, -10)"
+
+
+def _fold_sql(col):
+    # unicode61 не считает «ё» буквой с диакритикой
+    return f"replace(replace({col}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+_FTS_COLUMNS = "rowid, name, surname, phone, phone_local, contract_number, comment"
+_FTS_SOURCE_COLUMNS = "id, name, surname, phone, contract_number, comment"
+
+
+def _fts_values(prefix):
+    return (
+        f"{prefix}.id, {_fold_sql(prefix + '.name')}, {_fold_sql(prefix + '.surname')}, "
+        f"{_phone_sql(prefix + '.phone')}, {_local_phone_sql(prefix + '.phone')}, "
+        f"{prefix}.contract_number, {_fold_sql(prefix + '.comment')}"
+    )
+
+
+def _fts_insert_sql(prefix, fts_table=FTS_TABLE):
+    return f"INSERT INTO {fts_table} ({_FTS_COLUMNS}) VALUES ({_fts_values(prefix)})"
+
+
+def _create_fts_sql(fts_table):
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        "name, surname, phone, phone_local, contract_number, comment, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+    )
+
+
+def setup_search(engine):
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(_create_fts_sql(FTS_TABLE)))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+            f"{_fts_insert_sql('new')}; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END"
+        ))
+        # Только при изменении полей поиска: смена статуса или счётчиков посещений
+        # не должна переписывать строку FTS. Старый вариант без списка полей заменяется
+        conn.execute(text("DROP TRIGGER IF EXISTS clients_fts_au"))
+        conn.execute(text(
+            f"CREATE TRIGGER clients_fts_au AFTER UPDATE OF {_FTS_SOURCE_COLUMNS} ON clients BEGIN "
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = old.id; {_fts_insert_sql('new')}; END"
+        ))
+        # Строки архива не правятся — только добавляются и удаляются
+        conn.execute(text(_create_fts_sql(ARCHIVE_FTS_TABLE)))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_archive_fts_ai AFTER INSERT ON clients_archive BEGIN "
+            f"{_fts_insert_sql('new', ARCHIVE_FTS_TABLE)}; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS clients_archive_fts_ad AFTER DELETE ON clients_archive BEGIN "
+            f"DELETE FROM {ARCHIVE_FTS_TABLE} WHERE rowid = old.id; END"
+        ))
+        for fts_table, source in ((FTS_TABLE, "clients"), (ARCHIVE_FTS_TABLE, "clients_archive")):
+            indexed = conn.execute(text(f"SELECT count(*) FROM {fts_table}")).scalar()
+            total = conn.execute(text(f"SELECT count(*) FROM {source}")).scalar()
+            if indexed != total:
+                rebuild_search_index(conn, fts_table, source)
+
+
+def rebuild_search_index(conn, fts_table=FTS_TABLE, source="clients"):
+    conn.execute(text(f"DELETE FROM {fts_table}"))
+    conn.execute(text(
+        f"INSERT INTO {fts_table} ({_FTS_COLUMNS}) SELECT {_fts_values(source)} FROM {source}"
+    ))
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", value)
+    if len(digits) == 11 and digits[0] == "8":
+        digits = "7" + digits[1:]
+    return digits
+
+
+def build_match_query(q):
+    # Каждое слово ищется по префиксу; номер телефона — по нормализованным цифрам
+    terms = []
+    q = q.replace("ё", "е").replace("Ё", "Е")
+    tokens = re.findall(r"[+\d][\d\s()\-]{3,}\d|\w+", q)
+    # Однобуквенные слова («Д-123») совпадают почти со всеми записями
+    if any(len(token) > 1 for token in tokens):
+        tokens = [token for token in tokens if len(token) > 1]
+    for token in tokens:
+        if re.fullmatch(r"[+\d][\d\s()\-]*", token):
+            digits = normalize_phone(token)
+            term = f'{{phone phone_local contract_number}} : "{digits}"*'
+            if digits.startswith("8") and not token.startswith("+"):
+                term += f' OR phone : "7{digits[1:]}"*'
+            terms.append(f"({term})")
+        else:
+            terms.append('"' + token.replace('"', '""') + '"*')
+    return " AND ".join(terms)
+
+
+_COUNT_SQL = text(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+_ARCHIVE_COUNT_SQL = text(f"SELECT count(*) FROM {ARCHIVE_FTS_TABLE} WHERE {ARCHIVE_FTS_TABLE} MATCH :match")
+
+
+def _ranked_sql(matches, condition="", fts_table=FTS_TABLE, source="clients"):
+    # bm25 считается по всем совпадениям; для широких запросов вроде «ива»
+    # ранжирование бессмысленно и дорого, поэтому сначала новые клиенты
+    if matches > RANK_LIMIT:
+        order = f"{fts_table}.rowid DESC"
+    else:
+        order = f"bm25({fts_table}, 10.0, 10.0, 5.0, 5.0, 5.0, 1.0)"
+    return text(
+        f"SELECT c.id FROM {fts_table} JOIN {source} c ON c.id = {fts_table}.rowid "
+        f"WHERE {fts_table} MATCH :match {condition}"
+        f"ORDER BY {order} LIMIT :limit"
+    )
+
+
+def _deleted_filter(include_deleted):
+    return "" if include_deleted else "AND (c.deleted IS NULL OR c.deleted = 0) "
+
+
+def _like_conditions(table, q):
+    return [
+        or_(*(table.c[column].ilike(f"%{token}%") for column in ("name", "surname", "phone", "contract_number", "comment")))
+        for token in q.split()
+    ]
+
+
+def _like_statement(q, limit, include_deleted):
+    stmt = select(models.Client).where(*_like_conditions(models.Client.__table__, q))
+    if not include_deleted:
+        stmt = stmt.where(or_(models.Client.deleted.is_(None), models.Client.deleted == False))  # noqa: E712
+    return stmt.limit(limit)
+
+
+def _by_ids(ids):
+    return select(models.Client).where(models.Client.id.in_(ids))
+
+
+def _in_order(ids, clients):
+    by_id = {client.id: client for client in clients}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def search_clients(db, q, limit=20, include_deleted=False):
+    match = build_match_query(q)
+    if not match:
+        return []
+    if db.get_bind().dialect.name != "sqlite":
+        return db.scalars(_like_statement(q, limit, include_deleted)).all()
+    matches = db.execute(_COUNT_SQL, {"match": match}).scalar()
+    ids = db.execute(_ranked_sql(matches, _deleted_filter(include_deleted)), {"match": match, "limit": limit}).scalars().all()
+    if not ids:
+        return []
+    return _in_order(ids, db.scalars(_by_ids(ids)))
+
+
+async def search_clients_async(db, q, limit=20, include_deleted=False):
+    match = build_match_query(q)
+    if not match:
+        return []
+    if db.get_bind().dialect.name != "sqlite":
+        return (await db.scalars(_like_statement(q, limit, include_deleted))).all()
+    matches = (await db.execute(_COUNT_SQL, {"match": match})).scalar()
+    stmt = _ranked_sql(matches, _deleted_filter(include_deleted))
+    ids = (await db.execute(stmt, {"match": match, "limit": limit})).scalars().all()
+    if not ids:
+        return []
+    return _in_order(ids, await db.scalars(_by_ids(ids)))
+
+
+# --- Архив ---
+archive = models.ClientArchive.__table__
+
+
+def _archive_params(match, limit, reason):
+    params = {"match": match, "limit": limit}
+    if reason is not None:
+        params["reason"] = reason
+    return params
+
+
+def _archive_ranked_sql(matches, reason):
+    condition = "AND c.archive_reason = :reason " if reason is not None else ""
+    return _ranked_sql(matches, condition, ARCHIVE_FTS_TABLE, archive.name)
+
+
+def _archive_like_statement(q, limit, reason):
+    stmt = select(archive).where(*_like_conditions(archive, q))
+    if reason is not None:
+        stmt = stmt.where(archive.c.archive_reason == reason)
+    return stmt.limit(limit)
+
+
+def _archived_by_ids(ids):
+    return select(archive).where(archive.c.id.in_(ids))
+
+
+def search_archive(db, q, limit=20, reason=None):
+    match = build_match_query(q)
+    if not match:
+        return []
+    if db.get_bind().dialect.name != "sqlite":
+        return db.execute(_archive_like_statement(q, limit, reason)).all()
+    matches = db.execute(_ARCHIVE_COUNT_SQL, {"match": match}).scalar()
+    ids = db.execute(_archive_ranked_sql(matches, reason), _archive_params(match, limit, reason)).scalars().all()
+    if not ids:
+        return []
+    return _in_order(ids, db.execute(_archived_by_ids(ids)))
+
+
+async def search_archive_async(db, q, limit=20, reason=None):
+    match = build_match_query(q)
+    if not match:
+        return []
+    if db.get_bind().dialect.name != "sqlite":
+        return (await db.execute(_archive_like_statement(q, limit, reason))).all()
+    matches = (await db.execute(_ARCHIVE_COUNT_SQL, {"match": match})).scalar()
+    stmt = _archive_ranked_sql(matches, reason)
+    ids = (await db.execute(stmt, _archive_params(match, limit, reason))).scalars().all()
+    if not ids:
+        return []
+    return _in_order(ids, await db.execute(_archived_by_ids(ids)))
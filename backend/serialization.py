@@ -0,0 +1,45 @@
+from decimal import Decimal
+
+import orjson
+from fastapi.responses import Response
+
+import models
+from schemas import ClientOut
+
+# Быстрый путь включается заголовком Accept: строки читаются кортежами без
+# ORM-объектов и Pydantic-моделей и кодируются orjson. Формат полей тот же,
+# что у ClientOut (даты ISO, суммы строкой).
+FAST_JSON = "application/vnd.crm+json"
+# Колоночный формат: {"fields": [...], "rows": [[...], ...]} — без повтора ключей
+COLUMNAR_JSON = "application/vnd.crm.columnar+json"
+
+CLIENT_FIELDS = list(ClientOut.model_fields)
+CLIENT_COLUMNS = [models.Client.__table__.c[name] for name in CLIENT_FIELDS]
+
+
+def fast_media_type(request):
+    accept = request.headers.get("accept", "")
+    if COLUMNAR_JSON in accept:
+        return COLUMNAR_JSON
+    if FAST_JSON in accept:
+        return FAST_JSON
+    return None
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError
+
+
+def encode_rows(rows, media_type, fields=CLIENT_FIELDS, **extra):
+    if media_type == COLUMNAR_JSON:
+        content = {"fields": fields, "rows": [tuple(row) for row in rows], **extra}
+    else:
+        items = [dict(zip(fields, row)) for row in rows]
+        content = {"items": items, **extra} if extra else items
+    return orjson.dumps(content, default=_default)
+
+
+def rows_response(rows, media_type, fields=CLIENT_FIELDS, **extra):
+    return Response(encode_rows(rows, media_type, fields, **extra), media_type=media_type, headers={"Vary": "Accept"})
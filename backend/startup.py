@@ -0,0 +1,107 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import inspect
+
+# Первый ответ после запуска процесса (пробуждение инстанса на Render) должен
+# уложиться в столько миллисекунд, иначе в лог пишется предупреждение
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "3000"))
+
+logger = logging.getLogger(__name__)
+
+
+def process_age():
+    # Сколько секунд назад запущен процесс, вместе с запуском интерпретатора и импортами
+    try:
+        with open("/proc/self/stat") as f:
+            started = int(f.read().rsplit(")", 1)[1].split()[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as f:
+            return max(0.0, float(f.read().split()[0]) - started)
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def has_schema(engine):
+    return inspect(engine).has_table("schema_migrations")
+
+
+class Startup:
+    def __init__(self, budget_ms=STARTUP_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.phases = {}
+        self.ready = False
+        self.first_response = None
+        self._origin = time.perf_counter() - process_age()
+        self._prepare = None
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return round((time.perf_counter() - self._origin) * 1000, 1)
+
+    def mark(self, phase):
+        self.phases.setdefault(phase, self.elapsed_ms())
+
+    def defer(self, prepare):
+        # Без prepare (базы клубов готовятся сами) схема считается готовой
+        self._prepare = prepare
+        self.ready = prepare is None
+
+    def prepare(self):
+        # Проверку схемы выполняет первый пришедший: фоновая задача lifespan
+        # или запрос к БД; остальные ждут блокировку. После ошибки следующий
+        # запрос пробует снова и получает ту же ошибку
+        if self.ready:
+            return
+        with self._lock:
+            if self.ready:
+                return
+            started = time.perf_counter()
+            self._prepare()
+            self.ready = True
+            self.mark("schema_ready")
+            logger.info("Schema checked", extra={"duration_ms": round((time.perf_counter() - started) * 1000, 1)})
+
+    def responded(self, path):
+        if self.first_response is not None:
+            return
+        self.first_response = {"path": path, "ms": self.elapsed_ms()}
+        # Без lifespan приложение вызывают в процессе (тесты, замеры), это не запуск сервера
+        over_budget = self.first_response["ms"] > self.budget_ms and "lifespan" in self.phases
+        level = logging.WARNING if over_budget else logging.INFO
+        logger.log(level, "First response", extra={
+            "path": path, "time_to_first_response_ms": self.first_response["ms"],
+            "budget_ms": self.budget_ms, "phases": self.phases,
+        })
+
+    def stats(self):
+        return {
+            "phases": self.phases,
+            "first_response": self.first_response,
+            "budget_ms": self.budget_ms,
+            "within_budget": self.first_response is not None and self.first_response["ms"] <= self.budget_ms,
+            "schema_ready": self.ready,
+        }
+
+
+class StartupMiddleware:
+    # Отмечает конец первого ответа процесса, дальше только передаёт запросы
+    def __init__(self, app, startup):
+        self.app = app
+        self.startup = startup
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.startup.first_response is not None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                self.startup.responded(scope["path"])
+
+        await self.app(scope, receive, send_wrapper)
+
+
+startup = Startup()
@@ -0,0 +1,240 @@
+"""Несколько клубов в одном процессе: у каждого своя база по шаблону
+TENANT_DATABASE_URL, клуб определяется по заголовку или поддомену.
+
+Базы заводятся заранее — по неизвестному имени запрос получает 404, а не
+новый файл:
+
+    python tenancy.py create club1 club2
+    python tenancy.py list
+"""
+import glob
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+
+from analytics import setup_analytics
+from changes import setup_changes
+from database import DB_MODE, make_engine
+from migrations import upgrade
+from search import setup_search
+
+# Шаблон адреса базы клуба, например sqlite:///./tenants/{tenant}.db (или
+# отдельная схема PostgreSQL через search_path). Без него база одна — DATABASE_URL
+TENANT_DATABASE_URL = os.getenv("TENANT_DATABASE_URL", "")
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant")
+# Базовый домен для поддоменов: club1.crm.example.com → club1
+TENANT_DOMAIN = os.getenv("TENANT_DOMAIN", "").lower()
+# Открытых движков не больше TENANT_MAX_ENGINES, соединений у каждого — не больше
+# TENANT_POOL_SIZE + TENANT_MAX_OVERFLOW. Первыми закрываются давно не нужные
+TENANT_MAX_ENGINES = int(os.getenv("TENANT_MAX_ENGINES", "32"))
+TENANT_IDLE_SECONDS = float(os.getenv("TENANT_IDLE_SECONDS", "600"))
+TENANT_POOL_SIZE = int(os.getenv("TENANT_POOL_SIZE", "2"))
+TENANT_MAX_OVERFLOW = int(os.getenv("TENANT_MAX_OVERFLOW", "2"))
+
+# Имя клуба годится и в имя файла, и в поддомен
+TENANT_NAME = re.compile(r"[a-z0-9][a-z0-9-]{0,62}")
+
+if TENANT_DATABASE_URL and DB_MODE != "sync":
+    raise ValueError("TENANT_DATABASE_URL requires DB_MODE=sync")
+
+
+def prepare_database(engine):
+    upgrade(engine)
+    setup_search(engine)
+    setup_analytics(engine)
+    setup_changes(engine)
+
+
+def resolve_tenant(request):
+    tenant = request.headers.get(TENANT_HEADER)
+    if not tenant and TENANT_DOMAIN:
+        host = request.headers.get("host", "").split(":")[0].lower()
+        if host.endswith("." + TENANT_DOMAIN):
+            tenant = host[:-len(TENANT_DOMAIN) - 1]
+    if not tenant:
+        raise ValueError("Tenant is required")
+    if not TENANT_NAME.fullmatch(tenant):
+        raise ValueError(f"Invalid tenant: {tenant}")
+    return tenant
+
+
+class TenantDatabase:
+    def __init__(self, tenant, engine, last_used):
+        self.tenant = tenant
+        self.engine = engine
+        # info["tenant"] — по нему сессия находит ключи кэша и журнал своего клуба
+        self.sessions = sessionmaker(autocommit=False, autoflush=False, bind=engine, info={"tenant": tenant})
+        self.last_used = last_used
+
+
+class EngineRegistry:
+    def __init__(self, url_template, max_engines=TENANT_MAX_ENGINES, idle_seconds=TENANT_IDLE_SECONDS,
+                 pool_size=TENANT_POOL_SIZE, max_overflow=TENANT_MAX_OVERFLOW, clock=time.monotonic):
+        self.url_template = url_template
+        self.max_engines = max_engines
+        self.idle_seconds = idle_seconds
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.clock = clock
+        self.on_create = []  # вызываются с каждым новым движком (метрики SQL)
+        self.on_evict = []  # вызываются с именем вытесненного клуба (журналы изменений)
+        self.opened = 0
+        self.evicted = 0
+        self._open = OrderedDict()
+        self._prepared = set()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def url(self, tenant):
+        return self.url_template.format(tenant=tenant)
+
+    def _path(self, tenant):
+        url = make_url(self.url(tenant))
+        return url.database if url.get_backend_name() == "sqlite" else None
+
+    def exists(self, tenant):
+        # Базы PostgreSQL заводятся вне приложения и считаются существующими
+        path = self._path(tenant)
+        return path is None or os.path.exists(path)
+
+    def tenants(self):
+        template = self._path("{tenant}")
+        if template is None:
+            return sorted(self._open)
+        prefix, suffix = template.split("{tenant}")
+        found = (path[len(prefix):len(path) - len(suffix)] for path in glob.glob(glob.escape(prefix) + "*" + suffix))
+        return sorted(tenant for tenant in found if TENANT_NAME.fullmatch(tenant))
+
+    def _engine(self, tenant, **pool):
+        # Под блокировкой клуба: миграции одной базы не идут из двух потоков
+        engine = make_engine(self.url(tenant), **pool)
+        for hook in self.on_create:
+            hook(engine)
+        # Схема проверяется один раз на процесс: после вытеснения клуб открывается без миграций
+        if tenant not in self._prepared:
+            prepare_database(engine)
+            self._prepared.add(tenant)
+        return engine
+
+    def _tenant_lock(self, tenant):
+        with self._lock:
+            return self._locks.setdefault(tenant, threading.Lock())
+
+    def get(self, tenant):
+        with self._lock:
+            database = self._hit(tenant)
+        if database is not None:
+            return database
+        # Открытие клуба не держит общую блокировку: остальные клубы не ждут его миграций
+        with self._tenant_lock(tenant):
+            with self._lock:
+                database = self._hit(tenant)
+            if database is not None:
+                return database
+            if not self.exists(tenant):
+                raise LookupError(f"Unknown tenant: {tenant}")
+            engine = self._engine(tenant, pool_size=self.pool_size, max_overflow=self.max_overflow)
+            database = TenantDatabase(tenant, engine, self.clock())
+            with self._lock:
+                self._open[tenant] = database
+                self.opened += 1
+            self.evict_idle()
+        return database
+
+    def _hit(self, tenant):
+        database = self._open.get(tenant)
+        if database is not None:
+            self._open.move_to_end(tenant)
+            database.last_used = self.clock()
+        return database
+
+    def _evict(self):
+        # Вызывается под блокировкой. Начало OrderedDict — давно не использованные.
+        # Соединения, взятые запросами вытесненного клуба, закрываются по возвращении
+        evicted = []
+        deadline = self.clock() - self.idle_seconds
+        while self._open:
+            tenant, database = next(iter(self._open.items()))
+            if len(self._open) <= self.max_engines and database.last_used >= deadline:
+                break
+            evicted.append(self._open.pop(tenant))
+        self.evicted += len(evicted)
+        return evicted
+
+    def evict_idle(self):
+        with self._lock:
+            evicted = self._evict()
+        for old in evicted:
+            old.engine.dispose()
+            for hook in self.on_evict:
+                hook(old.tenant)
+        return len(evicted)
+
+    def session(self, tenant):
+        return self.get(tenant).sessions()
+
+    @contextmanager
+    def borrowed(self, tenant):
+        # Для проходов по всем клубам (планировщик): открытый клуб берётся как есть,
+        # остальные — на время прохода, без места в LRU и без вытеснения работающих
+        with self._lock:
+            database = self._open.get(tenant)
+        if database is not None:
+            yield database.sessions
+            return
+        with self._tenant_lock(tenant):
+            engine = self._engine(tenant, pool_size=1, max_overflow=0)
+        try:
+            yield sessionmaker(autocommit=False, autoflush=False, bind=engine, info={"tenant": tenant})
+        finally:
+            engine.dispose()
+
+    def create(self, tenant):
+        if not TENANT_NAME.fullmatch(tenant):
+            raise ValueError(f"Invalid tenant: {tenant}")
+        path = self._path(tenant)
+        if path and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._tenant_lock(tenant):
+            self._engine(tenant, pool_size=1, max_overflow=0).dispose()
+
+    def dispose(self):
+        with self._lock:
+            databases = list(self._open.values())
+            self._open.clear()
+        for database in databases:
+            database.engine.dispose()
+
+    def stats(self):
+        with self._lock:
+            databases = list(self._open.values())
+        return {
+            "open": len(databases),
+            "max_engines": self.max_engines,
+            "opened": self.opened,
+            "evicted": self.evicted,
+            "connections": sum(database.engine.pool.checkedin() + database.engine.pool.checkedout() for database in databases),
+            "tenants": [database.tenant for database in databases],
+        }
+
+
+registry = EngineRegistry(TENANT_DATABASE_URL) if TENANT_DATABASE_URL else None
+
+
+if __name__ == "__main__":
+    if registry is None:
+        sys.exit("TENANT_DATABASE_URL is not set")
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "create":
+        for name in sys.argv[2:]:
+            registry.create(name)
+            print(f"{name}: {registry.url(name)}")
+    else:
+        print("\n".join(registry.tenants()))
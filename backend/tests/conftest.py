@@ -0,0 +1,116 @@
+"""Общие фикстуры тестов: одна временная база и копия статики на весь прогон.
+
+Модули приложения читают настройки из окружения при импорте, поэтому
+окружение задаётся здесь, до первого `import main`. Между тестами таблицы
+очищаются — каждый тест начинает с пустой базы.
+
+Запуск из каталога backend (нужен httpx для TestClient):
+    python -m pytest tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORK_DIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(WORK_DIR, "crm.db")
+STATIC_DIR = os.path.join(WORK_DIR, "static")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DB_PATH}",
+    "STATIC_DIR": STATIC_DIR,
+    "LOG_LEVEL": "WARNING",
+    "SCHEDULER": "0",
+})
+os.environ.pop("TENANT_DATABASE_URL", None)
+os.environ.pop("DB_MODE", None)
+sys.path.insert(0, BACKEND_DIR)
+
+
+def copy_static():
+    # Только текущая сборка: index.html, файлы корня и ресурсы, на которые он ссылается
+    source = os.path.join(BACKEND_DIR, "static")
+    os.makedirs(os.path.join(STATIC_DIR, "assets"))
+    for name in os.listdir(source):
+        if os.path.isfile(os.path.join(source, name)):
+            shutil.copy(os.path.join(source, name), STATIC_DIR)
+    with open(os.path.join(source, "index.html")) as f:
+        index = f.read()
+    for part in index.split('="/assets/')[1:]:
+        name = part.split('"')[0]
+        shutil.copy(os.path.join(source, "assets", name), os.path.join(STATIC_DIR, "assets"))
+
+
+copy_static()
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+import async_api  # noqa: E402
+import main  # noqa: E402
+from analytics import rebuild_analytics  # noqa: E402
+from bench.seed import seed_clients  # noqa: E402
+from database import Base, SessionLocal, engine, make_async_engine  # noqa: E402
+from refcache import reference_cache  # noqa: E402
+
+
+def reset_database():
+    # Удаление клиентов проходит через триггеры поиска и сводок; сводки и журнал
+    # изменений после этого пересчитываются с нуля
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        rebuild_analytics(conn)
+        conn.execute(text("DELETE FROM changes"))
+    for key in list(reference_cache.stats()):
+        reference_cache.invalidate(key)
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    reset_database()
+    yield
+
+
+@pytest.fixture
+def client():
+    # С lifespan: фоновая проверка схемы и подключение статики, как у uvicorn
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def async_client():
+    # Асинхронные обработчики на той же базе, без переключения DB_MODE у всего приложения
+    async_engine = make_async_engine()
+    sessions = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_api.router)
+    app.dependency_overrides[async_api.get_async_db] = get_db
+    with TestClient(app) as test_client:
+        yield test_client
+        test_client.portal.call(async_engine.dispose)
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def seed():
+    # seed(count) — клиенты прямой вставкой, минуя API (как импорт старой базы)
+    def insert(count, start_id=1, seed=0):
+        seed_clients(DB_PATH, count, start_id, seed)
+        engine.dispose()
+    return insert
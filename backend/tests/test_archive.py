@@ -0,0 +1,97 @@
+import random
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+import archive
+from analytics import verify_analytics
+from conftest import DB_PATH
+from database import SessionLocal, engine
+
+ACTIVE = 200
+HISTORY = 300
+
+
+@pytest.fixture
+def history(seed):
+    # Клиенты после ACTIVE — история: абонемент кончился 1-6 лет назад; у всех посещения
+    seed(ACTIVE + HISTORY)
+    rnd = random.Random(1)
+    today = date.today()
+    with closing(sqlite3.connect(DB_PATH)) as conn, conn:
+        conn.executemany(
+            "UPDATE clients SET status = 'Завершён', start_date = ?, end_date = ?, deleted = ? WHERE id = ?",
+            [
+                (end - timedelta(days=90), end, rnd.random() < 0.05, client_id)
+                for client_id in range(ACTIVE + 1, ACTIVE + HISTORY + 1)
+                for end in [today - timedelta(days=rnd.randint(400, 2200))]
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO visits (client_id, visit_date, checked_in_at) VALUES (?, ?, ?)",
+            [
+                (client_id, day, datetime.combine(day, datetime.min.time()))
+                for client_id in range(1, ACTIVE + HISTORY + 1)
+                for day in {today - timedelta(days=rnd.randint(0, 2000)) for _ in range(4)}
+            ],
+        )
+    engine.dispose()
+
+
+def scalar(sql, **params):
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).scalar()
+
+
+def run_archive(chunk_size=50):
+    with SessionLocal() as db:
+        return archive.run_archive(db, datetime.now(), chunk_size)
+
+
+def test_history_moves_to_archive(client, history):
+    revenue = client.get("/analytics/revenue").json()
+    visits = scalar("SELECT count(*) FROM visits")
+    total = scalar("SELECT count(*) FROM clients")
+    cutoff = archive.months_before(date.today(), archive.ARCHIVE_AFTER_MONTHS)
+    due = scalar("SELECT count(*) FROM clients WHERE deleted OR (status = 'Завершён' AND end_date < :cutoff)", cutoff=cutoff)
+    assert due >= HISTORY
+    totals = run_archive()
+    assert totals["deleted"] + totals["expired"] == due
+    assert scalar("SELECT count(*) FROM clients") == total - due
+    assert scalar("SELECT count(*) FROM clients_archive") == due
+    assert scalar("SELECT count(*) FROM visits") + scalar("SELECT count(*) FROM visits_archive") == visits
+    assert scalar("SELECT count(*) FROM visits WHERE client_id > :active", active=ACTIVE) == 0
+    # Выручка по месяцам и сводки не меняются: история остаётся в аналитике
+    assert client.get("/analytics/revenue").json() == revenue
+    with engine.connect() as conn:
+        assert verify_analytics(conn) == []
+    assert run_archive() == {"deleted": 0, "expired": 0}
+
+
+def test_restore_brings_back_visits(client, history):
+    revenue = client.get("/analytics/revenue").json()
+    run_archive()
+    archived = client.get("/clients/archive", params={"reason": "expired", "limit": 1}).json()[0]
+    restored = client.post(f"/clients/{archived['id']}/restore")
+    assert restored.status_code == 200
+    assert restored.json()["id"] == archived["id"] and restored.json()["version"] == archived["version"] + 1
+    assert client.get(f"/clients/{archived['id']}/visits").json()
+    assert client.get("/analytics/revenue").json() == revenue
+    assert client.post(f"/clients/{archived['id']}/restore").status_code == 404
+
+
+def test_delete_archives_client(client):
+    body = {"name": "Анна", "surname": "Архивная", "phone": "+7 900 000-00-00"}
+    created = client.post("/clients", json=body).json()
+    assert client.delete(f"/clients/{created['id']}").json() == {"ok": True}
+    assert client.get(f"/clients/{created['id']}").status_code == 404
+    assert client.delete(f"/clients/{created['id']}").status_code == 404
+    listed = client.get("/clients/archive", params={"reason": "deleted"}).json()
+    assert [(row["id"], row["archive_reason"], row["deleted"]) for row in listed] == [(created["id"], "deleted", True)]
+    assert [row["id"] for row in client.get("/clients/archive", params={"q": "Архивная"}).json()] == [created["id"]]
+    # id клиента в архиве новому клиенту не достаётся
+    assert client.post("/clients", json=body).json()["id"] > created["id"]
+    assert client.post(f"/clients/{created['id']}/restore").json()["deleted"] is False
@@ -0,0 +1,118 @@
+import os
+import shutil
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pytest
+
+import backup
+from backup import copy_database, create_backup, list_backups, restore_backup, run_backup, verify_backup
+from conftest import DB_PATH
+from database import SessionLocal, engine
+
+
+def count_clients(path):
+    with closing(sqlite3.connect(path)) as conn:
+        return conn.execute("SELECT count(*) FROM clients").fetchone()[0]
+
+
+@pytest.fixture
+def backups(tmp_path, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_scheduled_backups_are_opt_in(seed, backups):
+    seed(50)
+    with SessionLocal() as db:
+        assert run_backup(db, datetime.now(), 1000) == {"created": 0, "removed": 0}
+    assert list_backups(DB_PATH) == []
+
+
+def test_scheduled_backups_rotate(seed, backups, monkeypatch):
+    monkeypatch.setattr(backup, "BACKUP_INTERVAL_HOURS", 24)
+    seed(50)
+    now = datetime(2026, 1, 1, 3)
+    with SessionLocal() as db:
+        assert run_backup(db, now, 1000) == {"created": 1, "removed": 0}
+        assert run_backup(db, now + timedelta(hours=23), 1000) == {"created": 0, "removed": 0}
+        for day in range(1, backup.BACKUP_KEEP + 1):
+            created = run_backup(db, now + timedelta(days=day), 1000)
+        assert created == {"created": 1, "removed": 1}
+    backups_left = list_backups(DB_PATH)
+    assert len(backups_left) == backup.BACKUP_KEEP
+    assert backup.backup_time(backups_left[-1]) == now + timedelta(days=backup.BACKUP_KEEP)
+    assert not [name for name in os.listdir(backups) if name.endswith(".tmp")]
+
+
+def test_backup_verifies(seed, backups):
+    seed(300)
+    report = verify_backup(create_backup(DB_PATH))
+    assert report["problems"] == []
+    assert report["counts"]["clients"] == 300
+
+
+def test_verify_rejects_newer_schema(seed, backups):
+    seed(10)
+    copy = create_backup(DB_PATH)
+    with closing(sqlite3.connect(copy)) as conn, conn:
+        conn.execute("INSERT INTO schema_migrations VALUES (999, 'future', '')")
+    assert [problem for problem in verify_backup(copy)["problems"] if problem.startswith("schema version 999")]
+
+
+def test_wal_copy_is_not_restarted_by_writes(seed, tmp_path):
+    seed(3000)
+    live = str(tmp_path / "live.db")
+    shutil.copy(DB_PATH, live)
+    with closing(sqlite3.connect(live)) as conn:
+        conn.execute("PRAGMA journal_mode = wal")
+    stop = threading.Event()
+
+    def write():
+        with closing(sqlite3.connect(live, timeout=30)) as conn:
+            index = 0
+            while not stop.is_set():
+                with conn:
+                    conn.execute("UPDATE clients SET comment = ? WHERE id = ?", (f"запись {index}", index % 3000 + 1))
+                index += 1
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        with closing(sqlite3.connect(live)) as source, closing(sqlite3.connect(str(tmp_path / "copy.db"))) as target:
+            progress = copy_database(source, target, pages=8, pause=0.001)
+    finally:
+        stop.set()
+        writer.join()
+    assert progress["steps"] > 1
+    assert progress["restarts"] == 0 and not progress["single_step"]
+
+
+def test_restore_round_trip(seed, backups):
+    seed(100)
+    saved = create_backup(DB_PATH, now=datetime(2026, 1, 1))
+    seed(50, start_id=1000)
+    engine.dispose()
+    previous = restore_backup(saved, DB_PATH)
+    engine.dispose()
+    assert count_clients(DB_PATH) == 100
+    assert count_clients(previous) == 150
+    assert verify_backup(previous)["problems"] == []
+
+
+def test_scheduler_endpoint_does_not_back_up(client, seed, backups, monkeypatch):
+    # Копия снимается только фоновым проходом, не внутри HTTP-запроса
+    monkeypatch.setattr(backup, "BACKUP_INTERVAL_HOURS", 24)
+    seed(10)
+    assert set(client.post("/scheduler/run").json()) == {"ran", "transitions"}
+    assert list_backups(DB_PATH) == []
+
+
+def test_startup_stats(client):
+    client.get("/clients/page?limit=1")
+    stats = client.get("/api/startup").json()
+    assert stats["schema_ready"] is True
+    assert {"imported", "lifespan"} <= set(stats["phases"])
+    assert stats["first_response"] is not None
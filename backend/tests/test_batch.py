@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from analytics import verify_analytics
+from database import engine
+
+
+def clients_by_id(client):
+    return {row["id"]: row for row in client.get("/clients").json()}
+
+
+@pytest.fixture
+def commits():
+    counter = {"commits": 0}
+
+    def commit(*args):
+        counter["commits"] += 1
+
+    event.listen(engine, "commit", commit)
+    yield counter
+    event.remove(engine, "commit", commit)
+
+
+def test_same_patch_for_many_clients(client, seed, commits):
+    seed(300)
+    ids = list(range(1, 301, 3))
+    client.get("/clients/page?limit=1")
+    commits["commits"] = 0
+    response = client.post("/clients/batch", json={"items": [{"id": i, "paid": True} for i in ids]})
+    assert response.json() == {"updated": ids, "failed": []}
+    assert commits["commits"] == 1
+    rows = clients_by_id(client)
+    assert all(rows[i]["paid"] is True for i in ids)
+
+
+def test_different_patches(client, seed):
+    seed(100)
+    today = date.today()
+
+    def extended(client_id):
+        return (today + timedelta(days=30 + client_id)).isoformat()
+
+    before = clients_by_id(client)
+    ids = list(range(1, 101, 2))
+    response = client.post("/clients/batch", json={"items": [{"id": i, "end_date": extended(i)} for i in ids]})
+    assert response.json()["updated"] == ids
+    rows = clients_by_id(client)
+    for i in ids:
+        assert rows[i]["end_date"] == extended(i) and rows[i]["version"] == before[i]["version"] + 1
+    assert rows[2] == before[2]
+    with engine.connect() as conn:
+        assert verify_analytics(conn) == []
+
+
+def test_failures_are_reported_per_client(client, seed):
+    seed(5)
+    response = client.post("/clients/batch", json={"items": [
+        {"id": 1, "paid": True}, {"id": 1, "paid": False}, {"id": 999, "paid": True}, {"id": 2, "trainer_id": 999},
+    ]}).json()
+    assert response["updated"] == [1]
+    assert sorted(failure["id"] for failure in response["failed"]) == [1, 2, 999]
+    assert clients_by_id(client)[1]["paid"] is True
+
+
+def test_filter_skips_deleted_clients(client, seed):
+    seed(200)
+    before = clients_by_id(client)
+    ids = list(before)[:100]
+    response = client.post("/clients/batch", json={
+        "filter": {"client_ids": ids}, "patch": {"trainer": "Новый тренер"},
+    }).json()
+    expected = sorted(i for i in ids if not before[i]["deleted"])
+    assert sorted(response["updated"]) == expected and len(expected) < len(ids)
+    rows = clients_by_id(client)
+    assert all(rows[i]["trainer"] == "Новый тренер" for i in expected)
+    assert all(rows[i]["trainer"] == before[i]["trainer"] for i in ids if before[i]["deleted"])
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"items": [{"id": 1, "paid": True}], "filter": {"status": "Активен"}, "patch": {"paid": True}},
+    {"filter": {"status": "Активен"}},
+    {"filter": {}, "patch": {"paid": True}},
+    {"filter": {"status": "Активен"}, "patch": {}},
+])
+def test_invalid_batches(client, body):
+    assert client.post("/clients/batch", json=body).status_code == 400
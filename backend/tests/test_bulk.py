@@ -0,0 +1,134 @@
+import csv
+import io
+import sqlite3
+from contextlib import closing
+
+import pytest
+from openpyxl import Workbook
+from sqlalchemy import text
+
+import bulk
+from conftest import DB_PATH
+from database import SessionLocal, engine
+
+HEADER = ["name", "surname", "phone", "start_date", "trainer", "trainer_id", "group_id"]
+ROWS = [
+    ["Анна", "Смирнова", "+7 900 000-00-01", "2026-01-10", "Тренер 01", "", ""],
+    ["Борис", "", "+7 900 000-00-02", "", "", "", ""],                  # строка 3: нет фамилии
+    ["", "", "", "", "", "", ""],                                        # пустая строка пропускается
+    ["Вера", "Иванова", "+7 900 000-00-04", "не дата", "", "", ""],     # строка 5: дата
+    ["Глеб", "Петров", "+7 900 000-00-05", "", "", "999", ""],          # строка 6: нет тренера 999
+    ["Дина", "Орлова", "+7 900 000-00-06", "", "", "", "999"],          # строка 7: нет группы 999
+    ["Ева", "Козлова", "+7 900 000-00-07", "", "", "1", ""],
+]
+
+
+def csv_file(rows, header=HEADER):
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=";").writerows([header, *rows])
+    return ("clients.csv", buffer.getvalue().encode("utf-8-sig"), "text/csv")
+
+
+def xlsx_file(rows, header=HEADER):
+    workbook = Workbook()
+    workbook.active.append(header)
+    for row in rows:
+        workbook.active.append([value or None for value in row])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return ("clients.xlsx", buffer.getvalue(), "application/octet-stream")
+
+
+def errors_by_row(report):
+    return {error["row"]: [item["field"] for item in error["errors"]] for error in report["errors"]}
+
+
+@pytest.fixture
+def trainer(client):
+    return client.post("/trainers", json={"name": "Тренер 01"}).json()
+
+
+@pytest.mark.parametrize("make_file", [csv_file, xlsx_file])
+def test_import_reports_invalid_rows(client, trainer, make_file):
+    report = client.post("/clients/import", files={"file": make_file(ROWS)}).json()
+    assert report["inserted"] == 2 and report["failed"] == 4 and not report["errors_truncated"]
+    assert errors_by_row(report) == {3: ["surname"], 5: ["start_date"], 6: ["trainer_id"], 7: ["group_id"]}
+    rows = {row["name"]: row for row in client.get("/clients").json()}
+    assert set(rows) == {"Анна", "Ева"}
+    # Ссылки разрешаются так же, как при создании: по имени и по id
+    assert rows["Анна"]["trainer_id"] == trainer["id"]
+    assert rows["Ева"]["trainer"] == "Тренер 01"
+
+
+def test_import_rejects_unknown_format(client):
+    assert client.post("/clients/import", files={"file": ("clients.txt", b"name", "text/plain")}).status_code == 415
+
+
+def test_rejected_chunk_is_reported(client, monkeypatch):
+    monkeypatch.setattr(bulk, "IMPORT_CHUNK_SIZE", 2)
+    rows = [[f"Клиент {i}", "Сбой" if i == 3 else "Обычный", f"+7 900 000-00-{i:02d}", "", "", "", ""] for i in range(6)]
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TRIGGER reject_import BEFORE INSERT ON clients WHEN NEW.surname = 'Сбой' "
+            "BEGIN SELECT RAISE(ABORT, 'import rejected'); END"
+        ))
+    try:
+        report = client.post("/clients/import", files={"file": csv_file(rows)}).json()
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TRIGGER reject_import"))
+    # Пачка со строкой «Сбой» (строки 4 и 5 файла) откатывается целиком, остальные записаны
+    assert report["inserted"] == 4 and report["failed"] == 2
+    assert sorted(errors_by_row(report)) == [4, 5]
+    assert "import rejected" in report["errors"][0]["errors"][0]["message"]
+    assert sorted(row["name"] for row in client.get("/clients").json()) == [f"Клиент {i}" for i in (0, 1, 4, 5)]
+
+
+def test_csv_export_lists_all_clients(client, seed):
+    seed(120)
+    body = client.get("/clients/export").content.decode("utf-8")
+    assert body.startswith("\ufeff" + ";".join(bulk.EXPORT_COLUMNS) + "\r\n")
+    exported = list(csv.DictReader(io.StringIO(body.lstrip("\ufeff")), delimiter=";"))
+    assert [int(row["id"]) for row in exported] == sorted(row["id"] for row in client.get("/clients").json())
+
+
+def test_csv_export_round_trip(client, trainer):
+    for index in range(5):
+        client.post("/clients", json={
+            "name": f"Клиент {index}", "surname": "Круговой", "phone": f"+7 900 000-00-{index:02d}",
+            "start_date": "2026-01-10", "end_date": "2026-02-10", "payment_amount": "1500.50",
+            "paid": index % 2 == 0, "trainer_id": trainer["id"], "comment": "точка; запятая, \"кавычки\"",
+        })
+    original = client.get("/clients").json()
+    response = client.get("/clients/export")
+    report = client.post("/clients/import", files={"file": ("clients.csv", response.content, "text/csv")}).json()
+    assert report == {"inserted": 5, "failed": 0, "errors": [], "errors_truncated": False}
+    copies = client.get("/clients").json()[5:]
+
+    def fields(row):
+        return {key: value for key, value in row.items() if key not in ("id", "version")}
+
+    assert [fields(row) for row in copies] == [fields(row) for row in original]
+
+
+def test_xlsx_export(client, seed):
+    from openpyxl import load_workbook
+
+    seed(30)
+    response = client.get("/clients/export", params={"format": "xlsx"})
+    rows = list(load_workbook(io.BytesIO(response.content), read_only=True).active.iter_rows(values_only=True))
+    assert list(rows[0]) == bulk.EXPORT_COLUMNS and len(rows) == 31
+
+
+def test_export_does_not_block_writers(seed, monkeypatch):
+    # Между пачками транзакция чтения закрыта: запись из другого соединения
+    # коммитится сразу, пока клиент «медленно» скачивает файл
+    monkeypatch.setattr(bulk, "EXPORT_BATCH_SIZE", 10)
+    seed(50)
+    chunks = bulk.export_clients_csv(SessionLocal)
+    next(chunks)
+    next(chunks)
+    with closing(sqlite3.connect(DB_PATH, timeout=0.1)) as conn, conn:
+        conn.execute("UPDATE clients SET comment = 'во время экспорта' WHERE id = 50")
+    rest = "".join(chunks)
+    assert "во время экспорта" in rest and len(rest.splitlines()) == 40
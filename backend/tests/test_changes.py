@@ -0,0 +1,79 @@
+import random
+
+CLIENT = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00"}
+
+
+class Replica:
+    # Копия списков, как у вкладки: курсор до загрузки, затем пачки из /changes
+    def __init__(self, client):
+        self.client = client
+        self.cursor = client.get("/changes").json()["cursor"]
+        self.clients = {row["id"]: row for row in client.get("/clients").json()}
+        self.trainers = {row["id"]: row for row in client.get("/trainers").json()}
+
+    def sync(self, limit=1000):
+        batches = 0
+        while True:
+            batch = self.client.get("/changes", params={"since": self.cursor, "limit": limit}).json()
+            for entity, replica in (("clients", self.clients), ("trainers", self.trainers)):
+                for row in batch["upserts"].get(entity, []):
+                    replica[row["id"]] = row
+                for entity_id in batch["deletes"].get(entity, []):
+                    replica.pop(entity_id, None)
+            self.cursor = batch["cursor"]
+            batches += 1
+            if not batch["more"]:
+                return batches
+
+
+def edit(client, rnd, count):
+    ids = [row["id"] for row in client.get("/clients").json()]
+    trainers = [row["id"] for row in client.get("/trainers").json()]
+    for index in range(count):
+        op = rnd.choice(["create", "update", "update", "delete", "trainer"])
+        if op == "create":
+            ids.append(client.post("/clients", json={**CLIENT, "comment": f"новый {index}"}).json()["id"])
+        elif op == "update":
+            response = client.put(f"/clients/{rnd.choice(ids)}", json={**CLIENT, "comment": f"правка {index}"})
+        elif op == "delete":
+            response = client.delete(f"/clients/{ids.pop(rnd.randrange(len(ids)))}")
+        else:
+            response = client.put(f"/trainers/{rnd.choice(trainers)}", json={"name": f"Тренер {index}"})
+        assert op == "create" or response.status_code == 200
+
+
+def test_replica_follows_edits(client, seed):
+    seed(100)
+    for index in range(3):
+        client.post("/trainers", json={"name": f"Тренер {index}"})
+    tabs = [Replica(client) for _ in range(2)]
+    edit(client, random.Random(0), 150)
+    assert tabs[0].sync() == 1
+    # Маленький лимит: изменения приходят несколькими пачками с more
+    assert tabs[1].sync(limit=20) > 1
+    server = {row["id"]: row for row in client.get("/clients").json()}
+    trainers = {row["id"]: row for row in client.get("/trainers").json()}
+    for tab in tabs:
+        assert tab.clients == server and tab.trainers == trainers
+
+
+def test_cursor_only_without_since(client):
+    cursor = client.get("/changes").json()
+    assert cursor["upserts"] == {} and cursor["deletes"] == {}
+    client.post("/clients", json=CLIENT)
+    assert client.get("/changes").json()["cursor"] > cursor["cursor"]
+
+
+def test_rows_changed_in_one_batch_are_sent_once(client):
+    tab = Replica(client)
+    created = client.post("/clients", json=CLIENT).json()
+    for index in range(5):
+        client.put(f"/clients/{created['id']}", json={**CLIENT, "comment": f"правка {index}"})
+    batch = client.get("/changes", params={"since": tab.cursor}).json()
+    assert [row["comment"] for row in batch["upserts"]["clients"]] == ["правка 4"]
+
+
+def test_cursor_ahead_of_log_asks_for_reset(client):
+    cursor = client.get("/changes").json()["cursor"]
+    batch = client.get("/changes", params={"since": cursor + 1000}).json()
+    assert batch["reset"] is True and batch["cursor"] == cursor
@@ -0,0 +1,86 @@
+import random
+import threading
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+import main
+from database import engine
+
+CLIENT = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00", "group": "Взрослые", "total_sessions": 8}
+
+
+def mismatched_counters():
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT count(*) FROM clients c WHERE c.sessions_used != (SELECT count(*) FROM visits v WHERE v.client_id = c.id) "
+            "OR c.last_visit_date IS NOT (SELECT max(visit_date) FROM visits v WHERE v.client_id = c.id)"
+        )).scalar()
+
+
+def test_check_in_counts_once_per_day(client):
+    created = client.post("/clients", json=CLIENT).json()
+    url = f"/clients/{created['id']}/visits"
+    first = client.post(url, json={"visit_date": "2026-03-02"}).json()
+    assert first["checked_in"] is True and first["sessions_used"] == 1
+    assert first["remaining_sessions"] == 7
+    again = client.post(url, json={"visit_date": "2026-03-02"}).json()
+    assert again["checked_in"] is False and again["sessions_used"] == 1
+    client.post(url, json={"visit_date": "2026-03-05"})
+    assert [visit["visit_date"] for visit in client.get(url).json()] == ["2026-03-02", "2026-03-05"]
+    assert client.get(f"/clients/{created['id']}").json()["last_visit_date"] == "2026-03-05"
+
+    assert client.delete(f"{url}/2026-03-05").json() == {"ok": True}
+    assert client.delete(f"{url}/2026-03-05").status_code == 404
+    row = client.get(f"/clients/{created['id']}").json()
+    assert (row["sessions_used"], row["last_visit_date"]) == (1, "2026-03-02")
+    assert mismatched_counters() == 0
+
+
+def test_deleted_or_missing_client_is_404(client):
+    created = client.post("/clients", json=CLIENT).json()
+    client.delete(f"/clients/{created['id']}")
+    assert client.post(f"/clients/{created['id']}/visits").status_code == 404
+    assert client.post("/clients/999/visits").status_code == 404
+
+
+def test_concurrent_check_ins_keep_counters(client, seed):
+    seed(200)
+    with engine.connect() as conn:
+        ids = conn.execute(text("SELECT id FROM clients WHERE NOT deleted AND id <= 40")).scalars().all()
+    inserted = []
+    lock = threading.Lock()
+
+    def writer(index):
+        rnd = random.Random(index)
+        http = TestClient(main.app)
+        for _ in range(40):
+            visit_date = (date.today() - timedelta(days=rnd.randrange(10))).isoformat()
+            response = http.post(f"/clients/{rnd.choice(ids)}/visits", json={"visit_date": visit_date})
+            with lock:
+                inserted.append(response.json()["checked_in"])
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert mismatched_counters() == 0
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM visits")).scalar() == sum(inserted)
+    # Повторные отметки за ту же дату были: часть запросов ничего не добавила
+    assert not all(inserted)
+
+
+def test_group_check_in(client):
+    members = [client.post("/clients", json=CLIENT).json()["id"] for _ in range(3)]
+    other = client.post("/clients", json={**CLIENT, "group": "Дети"}).json()["id"]
+    client.post(f"/clients/{members[0]}/visits", json={"visit_date": "2026-03-02"})
+    result = client.post("/visits/batch", json={"group": "Взрослые", "visit_date": "2026-03-02"}).json()
+    assert sorted(result["checked_in"]) == members[1:] and result["skipped"] == [members[0]]
+
+    result = client.post("/visits/batch", json={"client_ids": [other, 999], "visit_date": "2026-03-02"}).json()
+    assert result["checked_in"] == [other] and result["not_found"] == [999]
+    assert client.post("/visits/batch", json={"visit_date": "2026-03-02"}).status_code == 400
+    assert mismatched_counters() == 0
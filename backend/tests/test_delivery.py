@@ -0,0 +1,96 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import STATIC_DIR
+from delivery import IMMUTABLE, REVALIDATE
+from precompress import brotli, precompress
+
+
+@pytest.fixture(scope="module", autouse=True)
+def precompressed():
+    precompress(STATIC_DIR)
+
+
+def assets():
+    with open(os.path.join(STATIC_DIR, "index.html")) as f:
+        index = f.read()
+    return [part.split('"')[0] for part in index.split('="')[1:] if part.startswith("/assets/")]
+
+
+def fetch(client, url, encoding, headers=None):
+    return client.get(url, headers={"Accept-Encoding": encoding, **(headers or {})})
+
+
+def test_assets_are_immutable_and_precompressed(client):
+    encodings = ["gzip", "br"] if brotli is not None else ["gzip"]
+    for url in assets():
+        plain = fetch(client, url, "identity")
+        assert plain.headers["cache-control"] == IMMUTABLE
+        assert "content-encoding" not in plain.headers
+        for encoding in encodings:
+            response = fetch(client, url, f"{encoding}, identity")
+            assert response.headers["content-encoding"] == encoding
+            assert response.headers["cache-control"] == IMMUTABLE
+            assert "Accept-Encoding" in response.headers["vary"]
+            assert response.content == plain.content
+            assert response.num_bytes_downloaded < plain.num_bytes_downloaded
+
+
+def test_asset_etag_revalidates(client):
+    url = assets()[0]
+    etag = fetch(client, url, "gzip").headers["etag"]
+    assert fetch(client, url, "gzip", {"If-None-Match": etag}).status_code == 304
+
+
+def test_brotli_only_when_installed(client):
+    response = fetch(client, assets()[0], "br, identity")
+    if brotli is None:
+        assert response.headers.get("content-encoding") != "br"
+    else:
+        assert response.headers["content-encoding"] == "br"
+
+
+@pytest.mark.parametrize("url", ["/", "/clients-view", "/some/spa/route"])
+def test_index_revalidates(client, url):
+    response = fetch(client, url, "gzip")
+    assert response.status_code == 200 and b'<div id="root">' in response.content
+    assert response.headers["cache-control"] == REVALIDATE
+    not_modified = fetch(client, url, "gzip", {"If-None-Match": response.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["cache-control"] == REVALIDATE
+
+
+def test_root_files_served_as_is(client):
+    response = fetch(client, "/vite.svg", "identity")
+    assert response.headers["content-type"].startswith("image/svg+xml")
+
+
+def test_api_paths_are_not_spa_routes(client):
+    assert client.get("/api/unknown").status_code == 404
+
+
+@pytest.mark.parametrize("headers", [{}, {"Accept": "application/vnd.crm.columnar+json"}])
+def test_api_responses_gzipped(client, seed, headers):
+    seed(2000)
+    for url in ("/clients", "/clients/page?limit=50"):
+        plain = fetch(client, url, "identity", headers)
+        gzipped = fetch(client, url, "gzip", headers)
+        assert gzipped.headers["content-encoding"] == "gzip"
+        assert "content-encoding" not in plain.headers
+        assert gzipped.content == plain.content
+
+
+def test_small_responses_not_compressed(client):
+    assert "content-encoding" not in fetch(client, "/api/cache", "gzip").headers
+
+
+def test_static_mounted_once_and_last():
+    # Каждый TestClient заново запускает lifespan; маршрут SPA остаётся один и последний
+    for _ in range(2):
+        with TestClient(main.app):
+            pass
+    paths = [route.path for route in main.app.routes]
+    assert paths.count("/{full_path:path}") == 1 and paths[-1] == "/{full_path:path}"
@@ -0,0 +1,58 @@
+import logging
+
+from conftest import reset_database
+
+CLIENT = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00", "group": "Взрослые"}
+
+
+def scenario(http):
+    # Статусы и тела без id: последовательность id в двух прогонах разная
+    created = http.post("/clients", json=CLIENT)
+    client_id = created.json()["id"]
+    url = f"/clients/{client_id}"
+    etag = created.headers["etag"]
+    responses = [
+        created,
+        http.post("/clients", json={**CLIENT, "trainer_id": 999}),
+        http.get(url, headers={"If-None-Match": etag}),
+        http.put(url, json={**CLIENT, "comment": "правка"}, headers={"If-Match": etag}),
+        http.put(url, json=CLIENT, headers={"If-Match": etag}),
+        http.put(url, json={**CLIENT, "group_id": 999}),
+        http.put("/clients/999999", json=CLIENT),
+        http.post(f"{url}/visits", json={"visit_date": "2026-03-02"}),
+        http.post("/clients/999999/visits"),
+        http.delete(f"{url}/visits/2026-03-02"),
+        http.delete(f"{url}/visits/2026-03-02"),
+        http.post("/visits/batch", json={"visit_date": "2026-03-02"}),
+        http.post("/visits/batch", json={"group": "Взрослые", "visit_date": "2026-03-02"}),
+        http.post("/clients/batch", json={}),
+        http.delete(url),
+        http.delete(url),
+        http.post(f"{url}/restore"),
+        http.post(f"{url}/restore"),
+    ]
+    return [(response.status_code, response.headers.get("etag"), strip_ids(response)) for response in responses]
+
+
+def strip_ids(response):
+    if not response.content:
+        return None
+    body = response.json()
+    if isinstance(body, dict):
+        return {key: value for key, value in body.items() if key not in ("id", "client_id", "checked_in", "created_at")}
+    return body
+
+
+def test_async_handlers_match_sync(client, async_client, caplog):
+    caplog.set_level(logging.INFO, logger="handlers")
+    expected = scenario(client)
+    sync_logs = [record.msg for record in caplog.records if record.name == "handlers"]
+    caplog.clear()
+    reset_database()
+    assert scenario(async_client) == expected
+    assert [status for status, _, _ in expected] == [
+        200, 400, 304, 200, 412, 400, 404, 200, 404, 200, 404, 400, 200, 400, 200, 404, 200, 404,
+    ]
+    # Один и тот же лог на обоих путях
+    assert sync_logs == ["Client created", "Client restored"]
+    assert [record.msg for record in caplog.records if record.name == "handlers"] == sync_logs
@@ -0,0 +1,73 @@
+import json
+import logging
+
+from sqlalchemy import create_engine, text
+
+from instrumentation import (
+    N_PLUS_ONE_THRESHOLD, JsonFormatter, RequestStats, _current, instrument_engine, uninstrument_engine,
+)
+
+
+def metric(client, line):
+    # Значение метрики из /metrics; счётчики общие на весь прогон, поэтому тесты сравнивают разницу
+    for row in client.get("/metrics").text.splitlines():
+        if row.startswith(line + " "):
+            return float(row.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_requests_are_counted_by_route_template(client):
+    created = client.post("/clients", json={"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00"}).json()
+    labels = 'method="GET",route="/clients/{client_id}"'
+    before = metric(client, f"crm_http_requests_total{{{labels},status=\"200\"}}")
+    missing = metric(client, f"crm_http_requests_total{{{labels},status=\"404\"}}")
+    queries = metric(client, f"crm_db_queries_per_request_count{{{labels}}}")
+    client.get(f"/clients/{created['id']}")
+    client.get(f"/clients/{created['id']}")
+    client.get("/clients/999")
+    assert metric(client, f"crm_http_requests_total{{{labels},status=\"200\"}}") == before + 2
+    assert metric(client, f"crm_http_requests_total{{{labels},status=\"404\"}}") == missing + 1
+    assert metric(client, f"crm_db_queries_per_request_count{{{labels}}}") == queries + 3
+    assert metric(client, f"crm_db_queries_per_request_sum{{{labels}}}") > 0
+
+
+def test_metrics_format(client):
+    fallback = 'crm_http_requests_total{method="GET",route="/{full_path:path}",status="404"}'
+    before = metric(client, fallback)
+    client.get("/clients/page?limit=1")
+    client.get("/api/no-such-route")
+    client.get("/api/other-route")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    types = [row for row in response.text.splitlines() if row.startswith("# TYPE ")]
+    assert "# TYPE crm_http_request_duration_seconds histogram" in types
+    assert "# TYPE crm_db_n_plus_one_total counter" in types
+    assert 'crm_http_request_duration_seconds_bucket{method="GET",route="/clients/page",le="+Inf"}' in response.text
+    # Неизвестные пути попадают в шаблон маршрута SPA, а не в отдельные метки
+    assert metric(client, fallback) == before + 2
+    assert "no-such-route" not in client.get("/metrics").text
+
+
+def test_repeated_statement_is_reported_as_n_plus_one(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    stats = RequestStats({"path": "/clients", "app": None})
+    token = _current.set(stats)
+    try:
+        with engine.connect() as conn:
+            for _ in range(N_PLUS_ONE_THRESHOLD * 2):
+                conn.execute(text("SELECT 1"))
+    finally:
+        _current.reset(token)
+        uninstrument_engine(engine)
+    assert stats.queries == N_PLUS_ONE_THRESHOLD * 2
+    # Одно предупреждение на запрос, а не на каждый повтор
+    assert stats.n_plus_one == 1
+    assert [record.msg for record in caplog.records if record.name == "instrumentation"] == ["Possible N+1 query"]
+
+
+def test_json_log_keeps_extra_fields():
+    record = logging.makeLogRecord({"name": "crm", "levelname": "INFO", "msg": "Client created %s", "args": (7,)})
+    record.client_id = 7
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "Client created 7" and entry["client_id"] == 7 and entry["level"] == "INFO"
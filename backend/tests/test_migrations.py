@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, create_mock_engine, inspect, text
+
+import models
+from analytics import verify_analytics
+from conftest import BACKEND_DIR, WORK_DIR
+from database import Base, make_engine
+from migrations import MIGRATIONS, _rebuild_table, client_archive, typed_client_columns
+from tenancy import prepare_database
+
+# База до первой миграции: строковые даты и суммы, без schema_migrations
+LEGACY_DB = os.path.join(BACKEND_DIR, "crm.db")
+
+# Колонки clients, которые добавляют миграции после первой
+ADDED_LATER = {
+    "sessions_used": 3, "last_visit_date": 3, "freeze_start": 4, "freeze_end": 4,
+    "trainer_id": 5, "group_id": 5, "version": 6,
+}
+
+
+def clients_before_migration_3():
+    # Таблица, какой её пересобирала миграция 1: без колонок следующих миграций
+    table = models.Client.__table__
+    return Table("clients", MetaData(), *(
+        Column(col.name, col.type, primary_key=col.primary_key, nullable=col.nullable)
+        for col in table.columns if col.name not in ADDED_LATER
+    ))
+
+
+def database_at(version):
+    # Копия старой базы, поднятая миграциями до version включительно, как при upgrade тех лет
+    path = os.path.join(WORK_DIR, f"schema{version}.db")
+    shutil.copy(LEGACY_DB, path)
+    engine = make_engine(f"sqlite:///{path}")
+    if version:
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE schema_migrations (version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL)"
+            ))
+        Base.metadata.create_all(bind=engine)
+        for number, name, func in MIGRATIONS[:version]:
+            func(engine)
+            if number == 1:
+                _rebuild_table(engine, clients_before_migration_3(), None)
+            with engine.begin() as conn:
+                conn.execute(text("INSERT INTO schema_migrations VALUES (:v, :n, '')"), {"v": number, "n": name})
+    return engine
+
+
+@pytest.mark.parametrize("version", range(len(MIGRATIONS)))
+def test_upgrade_from_every_version(version):
+    engine = database_at(version)
+    try:
+        with engine.connect() as conn:
+            clients = conn.execute(text("SELECT count(*) FROM clients")).scalar()
+        prepare_database(engine)
+        with engine.connect() as conn:
+            applied = [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+            assert applied == [number for number, _, _ in MIGRATIONS]
+            assert conn.execute(text("SELECT count(*) FROM clients")).scalar() == clients
+            assert verify_analytics(conn) == []
+            columns = {col["name"] for col in inspect(conn).get_columns("clients")}
+            indexes = {index["name"] for index in inspect(conn).get_indexes("clients")}
+        assert set(models.Client.__table__.c.keys()) <= columns
+        assert {index.name for index in models.Client.__table__.indexes} <= indexes
+        # Повторный запуск ничего не применяет
+        prepare_database(engine)
+    finally:
+        engine.dispose()
+
+
+@pytest.mark.parametrize("func", [typed_client_columns, client_archive])
+def test_sqlite_rebuilds_skip_other_dialects(func):
+    # Пересборка таблицы через ALTER ... RENAME — только для SQLite
+    engine = create_mock_engine("postgresql://", lambda sql, *args, **kwargs: pytest.fail(str(sql)))
+    func(engine)
@@ -0,0 +1,92 @@
+import base64
+import json
+
+import pytest
+from sqlalchemy import text
+
+from database import engine
+from pagination import decode_cursor, encode_cursor
+from queries import CLIENT_SORT_FIELDS
+
+
+@pytest.fixture
+def clients(seed):
+    # Повторы и NULL в колонках сортировки: порядок держится только на id
+    seed(230)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE clients SET end_date = NULL, start_date = NULL WHERE id % 7 = 0"))
+        conn.execute(text("UPDATE clients SET contract_number = NULL WHERE id % 3 = 0"))
+        conn.execute(text("UPDATE clients SET surname = 'Иванов', end_date = '2026-05-01' WHERE id % 11 = 0"))
+
+
+def expected_order(rows, sort, descending):
+    # NULL — наименьшие значения, при равенстве — по id
+    def key(row):
+        return (row[sort] is not None, row[sort] or "", row["id"])
+    return [row["id"] for row in sorted(rows, key=key, reverse=descending)]
+
+
+def walk(http, params, limit=17):
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = http.get("/clients/page", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        assert len(body["items"]) <= limit
+        ids.extend(row["id"] for row in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("sort", list(CLIENT_SORT_FIELDS))
+@pytest.mark.parametrize("path", ["sync", "async"])
+def test_walk_every_sort_to_the_end(request, clients, path, sort, order):
+    http = request.getfixturevalue("client" if path == "sync" else "async_client")
+    rows = http.get("/clients").json()
+    ids, pages = walk(http, {"sort": sort, "order": order})
+    # Без повторов и пропусков, в порядке сортировки
+    assert ids == expected_order(rows, sort, order == "desc")
+    assert pages == -(-len(rows) // 17)
+
+
+def test_walk_with_filter(client, clients):
+    rows = [row for row in client.get("/clients").json() if row["status"] == "Активен" and not row["deleted"]]
+    ids, _ = walk(client, {"sort": "end_date", "status": "Активен", "deleted": False}, limit=9)
+    assert ids == expected_order(rows, "end_date", False)
+
+
+def test_page_ends_exactly_at_limit(client, seed):
+    seed(20)
+    body = client.get("/clients/page", params={"limit": 20}).json()
+    assert len(body["items"]) == 20 and body["next_cursor"] is None
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("Иванов", 42)) == ("Иванов", 42)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    # Без «=» в конце: курсор идёт в адрес как есть
+    assert "=" not in encode_cursor("2026-05-01", 1)
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("id", "не-курсор"),
+    ("id", raw_cursor({"value": 1})),
+    ("id", raw_cursor(["x", "1"])),
+    ("surname", raw_cursor([None, 1])),
+    ("end_date", raw_cursor(["не дата", 1])),
+    ("end_date", encode_cursor("2026-05-01", 1)[:-3]),
+])
+def test_tampered_cursor_is_400(client, sort, cursor):
+    response = client.get("/clients/page", params={"sort": sort, "cursor": cursor})
+    assert response.status_code == 400 and response.json()["detail"] == "Invalid cursor"
+
+
+def test_unknown_sort_is_400(client):
+    assert client.get("/clients/page", params={"sort": "phone"}).status_code == 400
@@ -0,0 +1,63 @@
+import pytest
+
+from refcache import ReferenceCache, reference_cache
+
+
+@pytest.fixture
+def trainer(client):
+    return client.post("/trainers", json={"name": "Тренер"}).json()
+
+
+def test_unchanged_reference_is_304(client, trainer):
+    first = client.get("/trainers")
+    assert first.headers["cache-control"] == "no-cache"
+    again = client.get("/trainers", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+    assert reference_cache.stats()["trainers"]["hits"] >= 1
+
+
+@pytest.mark.parametrize("write", [
+    lambda client, trainer: client.post("/trainers", json={"name": "Второй"}),
+    lambda client, trainer: client.put(f"/trainers/{trainer['id']}", json={"name": "Переименован"}),
+    lambda client, trainer: client.delete(f"/trainers/{trainer['id']}"),
+])
+def test_write_changes_etag(client, trainer, write):
+    first = client.get("/trainers")
+    assert write(client, trainer).status_code == 200
+    after = client.get("/trainers", headers={"If-None-Match": first.headers["etag"]})
+    assert after.status_code == 200 and after.headers["etag"] != first.headers["etag"]
+    assert after.json() != first.json()
+
+
+def test_trainer_delete_changes_groups_etag(client, trainer):
+    client.post("/groups", json={"name": "Утро", "trainer_id": trainer["id"]})
+    groups = client.get("/groups")
+    client.delete(f"/trainers/{trainer['id']}")
+    after = client.get("/groups", headers={"If-None-Match": groups.headers["etag"]})
+    assert after.status_code == 200
+    assert [row["trainer_id"] for row in after.json()] == [None]
+
+
+def test_stale_read_is_not_cached():
+    cache = ReferenceCache(ttl=60)
+    version = cache.version("groups")
+    cache.invalidate("groups")  # справочник изменили, пока шло чтение
+    cache.put("groups", b"[]", version)
+    assert cache.get("groups") is None
+    cache.put("groups", b"[1]", cache.version("groups"))
+    assert cache.get("groups").body == b"[1]"
+
+
+def test_entries_expire(monkeypatch):
+    cache = ReferenceCache(ttl=60)
+    now = [1000.0]
+    monkeypatch.setattr("refcache.time.monotonic", lambda: now[0])
+    cache.put("periods", b"[]", cache.version("periods"))
+    assert cache.get("periods") is not None
+    now[0] += 61
+    assert cache.get("periods") is None
+    # TTL 0 — кэш выключен
+    disabled = ReferenceCache(ttl=0)
+    disabled.put("periods", b"[]", disabled.version("periods"))
+    assert disabled.get("periods") is None
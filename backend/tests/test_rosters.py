@@ -0,0 +1,114 @@
+import random
+from collections import Counter
+
+import pytest
+from sqlalchemy import text
+
+import models
+from analytics import verify_analytics
+from database import SessionLocal, engine
+from rosters import ACTIVE, fill_group_days, link_clients, parse_days
+
+GROUPS = 12
+TRAINERS = 4
+DAY_SETS = ["Пн,Ср,Пт", "Вт,Чт", "Сб,Вс", "Пн,Чт", "Вт,Пт,Сб", "Ср"]
+
+
+@pytest.fixture
+def club(seed):
+    seed(600)
+    rnd = random.Random(1)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO trainers (id, name) VALUES (:id, :name)"), [
+            {"id": index, "name": f"Тренер {index:02d}"} for index in range(1, TRAINERS + 1)
+        ])
+        conn.execute(text(
+            "INSERT INTO groups (id, name, days, time_start, time_end, trainer_id, capacity) "
+            "VALUES (:id, :name, :days, :start, :end, :trainer_id, :capacity)"
+        ), [
+            {
+                "id": index, "name": f"Группа {index:03d}", "days": rnd.choice(DAY_SETS),
+                "start": f"{8 + index % 13:02d}:00", "end": f"{9 + index % 13:02d}:30",
+                "trainer_id": 1 + index % TRAINERS, "capacity": rnd.choice([20, 30, 40]),
+            }
+            for index in range(1, GROUPS + 1)
+        ])
+        # Как в старой базе: группа и тренер только строкой
+        conn.execute(text(
+            "UPDATE clients SET \"group\" = printf('Группа %03d', id % :groups + 1), "
+            "trainer = printf('Тренер %02d', (id % :groups + 1) % :trainers + 1)"
+        ), {"groups": GROUPS, "trainers": TRAINERS})
+        conn.execute(text("DELETE FROM group_days"))
+        link_clients(conn)
+        fill_group_days(conn)
+    engine.dispose()
+
+
+def roster_by_name(client, field, name):
+    return sorted(row["id"] for row in client.get("/clients").json() if row[field] == name and not row["deleted"])
+
+
+def python_schedule():
+    with SessionLocal() as db:
+        members = Counter(
+            row.group for row in db.query(models.Client).filter(models.Client.deleted.isnot(True))
+            if row.status == ACTIVE
+        )
+        week = [[] for _ in range(7)]
+        for group in db.query(models.Group):
+            for weekday in parse_days(group.days):
+                week[weekday].append((group.time_start, group.name, members[group.name]))
+    return [sorted(day) for day in week]
+
+
+def test_string_names_are_linked(club):
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM clients WHERE group_id IS NULL OR trainer_id IS NULL")).scalar() == 0
+        assert conn.execute(text("SELECT count(*) FROM group_days")).scalar() > 0
+
+
+@pytest.mark.parametrize("url, field, name", [
+    ("/groups/7/clients", "group", "Группа 007"),
+    ("/trainers/3/clients", "trainer", "Тренер 03"),
+])
+def test_roster_matches_filter_by_name(client, club, url, field, name):
+    body = client.get(url).json()
+    expected = roster_by_name(client, field, name)
+    assert sorted(row["id"] for row in body["clients"]) == expected
+    assert body["total"] == len(expected) and body["name"] == name
+
+
+def test_unknown_roster_is_404(client):
+    assert client.get("/groups/999/clients").status_code == 404
+    assert client.get("/trainers/999/clients").status_code == 404
+
+
+def test_schedule_matches_recompute(client, club):
+    week = client.get("/schedule").json()
+    assert [sorted((s["time_start"], s["group"], s["members"]) for s in day["sessions"]) for day in week] == python_schedule()
+    for day in week:
+        assert day["members"] == sum(session["members"] for session in day["sessions"])
+
+
+def test_trainer_rename_reaches_clients(client, club):
+    total = client.get("/trainers/3/clients").json()["total"]
+    assert client.put("/trainers/3", json={"name": "Тренер 03 (старший)"}).status_code == 200
+    roster = client.get("/trainers/3/clients").json()
+    assert roster["total"] == total
+    assert {row["trainer"] for row in roster["clients"]} == {"Тренер 03 (старший)"}
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM clients WHERE trainer = 'Тренер 03'")).scalar() == 0
+        assert verify_analytics(conn) == []
+
+
+def test_trainer_delete_unlinks_groups(client):
+    trainer = client.post("/trainers", json={"name": "Тренер"}).json()
+    group = client.post("/groups", json={"name": "Утро", "days": "Пн,Ср", "trainer_id": trainer["id"]}).json()
+    client.post("/clients", json={"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00", "trainer_id": trainer["id"]})
+    # Список групп уже в кэше справочников
+    assert client.get("/groups").json()[0]["trainer_id"] == trainer["id"]
+    assert client.delete(f"/trainers/{trainer['id']}").json() == {"ok": True}
+    groups = client.get("/groups").json()
+    assert [(row["id"], row["trainer_id"], row["version"]) for row in groups] == [(group["id"], None, group["version"] + 1)]
+    row = client.get("/clients").json()[0]
+    assert (row["trainer_id"], row["trainer"]) == (None, "Тренер")
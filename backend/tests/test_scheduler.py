@@ -0,0 +1,126 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from analytics import verify_analytics
+from database import SessionLocal, engine
+from scheduler import ACTIVE, FINISHED, FROZEN, Scheduler, run_transitions
+
+STEPS_DAYS = [0, 7, 30, 90, 400]
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, days):
+        self.now += timedelta(days=days)
+
+
+def make_scheduler(clock):
+    scheduler = Scheduler(session_factory=SessionLocal, clock=clock, lease_seconds=60, chunk_size=100)
+    scheduler.add_job("status_transitions", run_transitions)
+    return scheduler
+
+
+def load_state():
+    with engine.connect() as conn:
+        return {
+            row.id: [row.status, row.end_date, row.freeze_end, row.deleted]
+            for row in conn.execute(text("SELECT id, status, end_date, freeze_end, deleted FROM clients"))
+        }
+
+
+def expected_changes(state, today):
+    # Та же логика, что и в TRANSITIONS, но по строкам в памяти
+    today = today.isoformat()
+    changes = {"thawed": 0, "expired": 0}
+    for row in state.values():
+        status, end_date, freeze_end, deleted = row
+        if deleted:
+            continue
+        if status == FROZEN and freeze_end is not None and freeze_end < today:
+            row[0] = status = ACTIVE
+            changes["thawed"] += 1
+        if status == ACTIVE and end_date is not None and end_date < today:
+            row[0] = FINISHED
+            changes["expired"] += 1
+    return changes
+
+
+def run_concurrently(schedulers):
+    results = [None] * len(schedulers)
+
+    def run(index):
+        results[index] = schedulers[index].run_once()["status_transitions"]
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(schedulers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+@pytest.fixture
+def clients(seed):
+    # В seed заморозок нет: окна до 90 дней от начала абонемента
+    seed(3000)
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE clients SET freeze_start = start_date, freeze_end = date(start_date, '+' || (id % 90) || ' days') "
+            "WHERE status = :frozen"
+        ), {"frozen": FROZEN})
+
+
+def test_one_worker_runs_each_pass(clients):
+    clock = FakeClock(datetime.now())
+    state = load_state()
+    previous = 0
+    for day in STEPS_DAYS:
+        clock.advance(day - previous)
+        previous = day
+        # Новые владельцы на каждом шаге: прежняя аренда истекла по подменённым часам
+        schedulers = [make_scheduler(clock) for _ in range(4)]
+        results = run_concurrently(schedulers)
+        ran = [result for result in results if result is not None]
+        assert len(ran) == 1, day
+        assert ran[0] == expected_changes(state, clock().date()), day
+
+        winner = schedulers[results.index(ran[0])]
+        assert winner.run_once()["status_transitions"] == {"thawed": 0, "expired": 0}
+        assert {client_id: row[0] for client_id, row in load_state().items()} == \
+            {client_id: row[0] for client_id, row in state.items()}, day
+
+    with engine.connect() as conn:
+        recorded, distinct = conn.execute(
+            text("SELECT count(*), count(DISTINCT client_id || reason) FROM status_transitions")
+        ).one()
+        assert recorded == distinct > 0
+        assert verify_analytics(conn) == []
+
+
+def test_expired_lease_is_taken_over(clients):
+    clock = FakeClock(datetime.now() + timedelta(days=1000))
+    leader, follower = make_scheduler(clock), make_scheduler(clock)
+    assert leader.run_once()["status_transitions"] is not None
+    assert follower.run_once()["status_transitions"] is None
+    clock.advance(1)
+    assert follower.run_once()["status_transitions"] is not None
+    assert leader.run_once()["status_transitions"] is None
+
+
+def test_scheduler_run_endpoint(client, clients):
+    response = client.post("/scheduler/run").json()
+    assert response["ran"] is True
+    assert set(response["transitions"]) == {"thawed", "expired"}
+    assert sum(response["transitions"].values()) > 0
+    assert client.post("/scheduler/run").json()["transitions"] == {"thawed": 0, "expired": 0}
+    # Архив и резервная копия в запросе не запускаются
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT name FROM scheduler_leases")).scalars().all() == ["status_transitions"]
@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import text
+
+from database import engine
+
+CLIENT = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00"}
+
+
+def found(client, q, **params):
+    response = client.get("/clients/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return [row["id"] for row in response.json()]
+
+
+def archived(client, q, **params):
+    return [row["id"] for row in client.get("/clients/archive", params={"q": q, **params}).json()]
+
+
+def create(client, **fields):
+    return client.post("/clients", json={**CLIENT, **fields}).json()["id"]
+
+
+def index_matches_table():
+    with engine.connect() as conn:
+        return conn.execute(text(
+            "SELECT (SELECT count(*) FROM clients_fts) = (SELECT count(*) FROM clients) "
+            "AND (SELECT count(*) FROM clients_archive_fts) = (SELECT count(*) FROM clients_archive)"
+        )).scalar() == 1
+
+
+@pytest.mark.parametrize("q", ["Фёдор", "федор", "ФЕДОР", "Фед", "алеш", "Алёшин Фёдор", "фе ал"])
+def test_cyrillic_and_yo(client, q):
+    fedor = create(client, name="Фёдор", surname="Алёшин", comment="Пришёл по рекомендации")
+    create(client, name="Фаина", surname="Иванова")
+    assert found(client, q) == [fedor]
+
+
+def test_comment_and_contract_number(client):
+    target = create(client, contract_number="Д-2024-117", comment="Пришёл по рекомендации")
+    create(client)
+    assert found(client, "пришел") == [target]
+    assert found(client, "2024") == [target]
+
+
+@pytest.mark.parametrize("q", [
+    "+7 (912) 345-67-89", "89123456789", "79123456789", "8 912 345", "+7912", "912 345-67", "9123456789",
+])
+def test_phone_prefixes(client, q):
+    target = create(client, phone="+7 (912) 345-67-89")
+    create(client, phone="8 (913) 111-22-33")
+    assert found(client, q) == [target]
+
+
+@pytest.mark.parametrize("q", [
+    '"', '""', "Анна AND", "OR", "NOT Смирнова", "NEAR(Анна", "Анна*", "*", "^Анна", "name:Анна",
+    "(Анна", "Анна)", "-Смирнова", "+", "{phone}", "'; DROP TABLE clients; --",
+])
+def test_fts_operators_are_plain_text(client, q):
+    create(client)
+    # Спецсимволы FTS5 не превращаются в синтаксис запроса и не дают 500
+    found(client, q)
+
+
+def test_operator_words_match_as_words(client):
+    target = create(client, comment="NEAR the door")
+    create(client)
+    assert found(client, "near") == [target]
+    assert found(client, "NEAR(") == [target]
+
+
+def test_deleted_flag_needs_include_deleted(client):
+    kept = create(client)
+    hidden = create(client)
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE clients SET deleted = 1 WHERE id = :id"), {"id": hidden})
+    assert found(client, "Смирнова") == [kept]
+    assert sorted(found(client, "Смирнова", include_deleted=True)) == [kept, hidden]
+
+
+def test_archived_clients_are_searched_separately(client):
+    kept = create(client)
+    gone = create(client, surname="Смирнова-Архивная")
+    client.delete(f"/clients/{gone}")
+    assert found(client, "Смирнова") == [kept]
+    assert found(client, "Смирнова", include_deleted=True) == [kept]
+    assert archived(client, "Смирнова") == [gone]
+    assert archived(client, "Смирнова", reason="deleted") == [gone]
+    assert archived(client, "Смирнова", reason="expired") == []
+    client.post(f"/clients/{gone}/restore")
+    assert sorted(found(client, "Смирнова")) == [kept, gone]
+    assert archived(client, "Смирнова") == []
+    assert index_matches_table()
+
+
+def test_index_follows_updates(client):
+    target = create(client)
+    client.put(f"/clients/{target}", json={**CLIENT, "surname": "Кузнецова", "phone": "+7 999 555-44-33"})
+    assert found(client, "Смирнова") == []
+    assert found(client, "Кузнецова") == [target]
+    assert found(client, "89995554433") == [target]
+    assert found(client, "9000000") == []
+    # Смена полей вне поиска строку индекса не трогает, но и не ломает
+    client.post("/clients/batch", json={"items": [{"id": target, "paid": True}]})
+    assert found(client, "Кузнецова") == [target]
+    assert index_matches_table()
+
+
+def test_more_specific_match_ranks_first(client, seed):
+    seed(50)
+    loose = create(client, name="Мария", comment="Смирнова порекомендовала")
+    exact = create(client, name="Мария", surname="Смирнова")
+    assert found(client, "Мария Смирнова")[:2] == [exact, loose]
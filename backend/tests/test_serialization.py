@@ -0,0 +1,40 @@
+from decimal import Decimal
+
+import pytest
+
+from serialization import COLUMNAR_JSON, FAST_JSON, encode_rows
+
+
+def columnar_items(body):
+    return [dict(zip(body["fields"], row)) for row in body["rows"]]
+
+
+def test_fast_list_matches_pydantic(client, seed):
+    seed(300)
+    expected = client.get("/clients").json()
+    fast = client.get("/clients", headers={"Accept": FAST_JSON})
+    assert fast.headers["content-type"] == FAST_JSON and "Accept" in fast.headers["vary"]
+    assert fast.json() == expected
+    columnar = client.get("/clients", headers={"Accept": COLUMNAR_JSON}).json()
+    assert columnar_items(columnar) == expected
+
+
+@pytest.mark.parametrize("params", [
+    {"limit": 40},
+    {"limit": 40, "sort": "end_date", "order": "desc"},
+    {"limit": 40, "status": "Активен", "deleted": False},
+])
+def test_fast_page_matches_pydantic(client, seed, params):
+    seed(300)
+    expected = client.get("/clients/page", params=params).json()
+    fast = client.get("/clients/page", params=params, headers={"Accept": FAST_JSON}).json()
+    assert fast == expected
+    columnar = client.get("/clients/page", params=params, headers={"Accept": COLUMNAR_JSON}).json()
+    assert columnar_items(columnar) == expected["items"]
+    assert columnar["next_cursor"] == expected["next_cursor"]
+
+
+def test_decimals_are_strings():
+    rows = [(1, Decimal("1500.50"))]
+    assert encode_rows(rows, FAST_JSON, fields=["id", "price"]) == b'[{"id":1,"price":"1500.50"}]'
+    assert encode_rows(rows, COLUMNAR_JSON, fields=["id", "price"]) == b'{"fields":["id","price"],"rows":[[1,"1500.50"]]}'
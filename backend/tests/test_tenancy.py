@@ -0,0 +1,167 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+from starlette.requests import Request
+
+import main
+import tenancy
+from bench.seed import seed_clients
+from scheduler import ACTIVE, Scheduler, run_transitions
+from tenancy import EngineRegistry, resolve_tenant
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def registry(tmp_path, clock):
+    registry = EngineRegistry(f"sqlite:///{tmp_path}/{{tenant}}.db", max_engines=2, idle_seconds=60, clock=clock)
+    for tenant in ("club1", "club2", "club3"):
+        registry.create(tenant)
+    yield registry
+    registry.dispose()
+
+
+@pytest.fixture
+def tenant_app(registry, monkeypatch):
+    # Приложение в режиме клубов: обработчики берут реестр из модуля main
+    monkeypatch.setattr(main, "registry", registry)
+    monkeypatch.setattr(main, "tenant_feeds", {})
+
+
+def request_for(headers):
+    return Request({"type": "http", "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()]})
+
+
+def test_create_and_list(registry, tmp_path):
+    assert registry.tenants() == ["club1", "club2", "club3"]
+    with pytest.raises(ValueError):
+        registry.create("../club")
+    (tmp_path / "Not-A-Club.db").touch()
+    assert registry.tenants() == ["club1", "club2", "club3"]
+
+
+def test_unknown_tenant(registry):
+    with pytest.raises(LookupError):
+        registry.get("club9")
+    assert registry.stats()["open"] == 0
+
+
+def test_least_recently_used_is_evicted(registry):
+    for tenant in ("club1", "club2", "club1", "club3"):
+        registry.get(tenant)
+    stats = registry.stats()
+    assert stats["tenants"] == ["club1", "club3"]
+    assert (stats["opened"], stats["evicted"]) == (3, 1)
+
+
+def test_idle_engines_are_closed(registry, clock):
+    registry.get("club1")
+    clock.now = 30
+    registry.get("club2")
+    clock.now = 70
+    assert registry.evict_idle() == 1
+    assert registry.stats()["tenants"] == ["club2"]
+
+
+def test_connections_stay_within_pool(registry):
+    limit = registry.pool_size + registry.max_overflow
+    peak = {"connections": 0, "open": 0}
+    lock = threading.Lock()
+
+    def worker(seed):
+        for index in range(60):
+            with registry.session(f"club{(seed + index) % 3 + 1}") as db:
+                db.execute(text("SELECT count(*) FROM clients")).scalar()
+            stats = registry.stats()
+            with lock:
+                peak["connections"] = max(peak["connections"], stats["connections"])
+                peak["open"] = max(peak["open"], stats["open"])
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak["open"] <= registry.max_engines + len(threads)
+    assert peak["connections"] <= peak["open"] * limit
+
+
+def test_resolve_tenant(monkeypatch):
+    assert resolve_tenant(request_for({"X-Tenant": "club1"})) == "club1"
+    monkeypatch.setattr(tenancy, "TENANT_DOMAIN", "crm.example.com")
+    assert resolve_tenant(request_for({"Host": "club2.crm.example.com:443"})) == "club2"
+    for headers in ({}, {"Host": "crm.example.com"}, {"X-Tenant": "Club_1"}):
+        with pytest.raises(ValueError):
+            resolve_tenant(request_for(headers))
+
+
+def test_clubs_are_isolated(client, tenant_app):
+    body = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00"}
+    assert client.post("/clients", json=body, headers={"X-Tenant": "club1"}).status_code == 200
+    assert client.post("/trainers", json={"name": "Тренер"}, headers={"X-Tenant": "club1"}).status_code == 200
+    assert len(client.get("/clients", headers={"X-Tenant": "club1"}).json()) == 1
+    assert client.get("/clients", headers={"X-Tenant": "club2"}).json() == []
+    # Кэш справочников у каждого клуба свой
+    assert len(client.get("/trainers", headers={"X-Tenant": "club1"}).json()) == 1
+    assert client.get("/trainers", headers={"X-Tenant": "club2"}).json() == []
+    assert client.get("/clients", headers={"X-Tenant": "club9"}).status_code == 404
+    assert client.get("/clients").status_code == 400
+
+
+def test_evicted_club_feed_is_stopped(registry, clock, tenant_app):
+    registry.on_evict.append(main.drop_tenant_feed)
+
+    async def scenario():
+        idle, busy = main.tenant_feed("club1"), main.tenant_feed("club2")
+        tab = busy.stream(None)
+        await anext(tab)
+        registry.get("club1")
+        registry.get("club2")
+        clock.now = 100
+        assert registry.evict_idle() == 2
+        for _ in range(3):
+            await asyncio.sleep(0)
+        # Обе записи забыты, но журнал с открытой вкладкой работает до её закрытия
+        assert main.tenant_feeds == {}
+        assert idle._task is None and busy._task is not None
+        await tab.aclose()
+        assert busy._task is None
+        assert main.tenant_feed("club2") is not busy
+        await main.tenant_feed("club2").stop()
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_runs_in_every_club(registry, tmp_path):
+    for index, tenant in enumerate(registry.tenants()):
+        seed_clients(registry._path(tenant), 200, seed=index)
+    (tmp_path / "broken.db").write_bytes(b"not a database" * 100)
+    now = datetime.now() + timedelta(days=1000)
+    scheduler = Scheduler(clock=lambda: now, lease_seconds=60)
+    scheduler.add_job("status_transitions", run_transitions)
+    scheduler.registry = registry
+    # Ошибка в базе одного клуба не останавливает проход по остальным
+    scheduler.run_all()
+    for tenant in ("club1", "club2", "club3"):
+        with registry.session(tenant) as db:
+            due = db.execute(
+                text("SELECT count(*) FROM clients WHERE status = :active AND end_date < :today AND deleted IS NOT 1"),
+                {"active": ACTIVE, "today": now.date()},
+            ).scalar()
+            assert due == 0, tenant
+            assert db.execute(text("SELECT count(*) FROM status_transitions")).scalar() > 0, tenant
+    assert registry.stats()["open"] <= registry.max_engines
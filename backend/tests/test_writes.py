@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import event
+
+from database import engine
+
+CLIENT = {"name": "Анна", "surname": "Смирнова", "phone": "+7 900 000-00-00", "trainer": "Тренер", "group": "Взрослые"}
+
+
+class StatementCounter:
+    def __init__(self, client):
+        self.client = client
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def request(self, method, url, body, **headers):
+        self.count = 0
+        response = self.client.request(method, url, json=body, headers=headers)
+        return response, self.count
+
+
+@pytest.fixture
+def counter(client):
+    # Первый запрос к БД дожидается проверки схемы: её запросы в счёт не идут
+    client.get("/clients/page?limit=1")
+    counter = StatementCounter(client)
+    event.listen(engine, "after_cursor_execute", counter)
+    yield counter
+    event.remove(engine, "after_cursor_execute", counter)
+
+
+def expect(counter, method, url, body, limit, **headers):
+    response, statements = counter.request(method, url, body, **headers)
+    assert response.status_code == 200, response.text
+    assert 0 < statements <= limit, (method, url, statements)
+    return response
+
+
+def test_client_writes_are_single_statements(counter):
+    created = expect(counter, "POST", "/clients", CLIENT, 1).json()
+    updated = expect(counter, "PUT", f"/clients/{created['id']}", {**created, "comment": "правка"}, 1, **{"If-Match": '"1"'})
+    assert updated.json()["version"] == 2 and updated.headers["etag"] == '"2"'
+    expect(counter, "PUT", f"/clients/{created['id']}", {**created, "trainer": "Тренер 2"}, 1)
+
+
+def test_reference_writes_are_single_statements(counter):
+    period = expect(counter, "POST", "/periods", {"label": "Месяц", "value": "1m", "months": 1, "price": 3000, "trainings": 12}, 1).json()
+    expect(counter, "PUT", f"/periods/{period['id']}", {**period, "price": 3500}, 1)
+    payment = expect(counter, "POST", "/payments", {"label": "Карта", "value": "card", "type": "card", "banks": ["Сбер"]}, 1).json()
+    expect(counter, "PUT", f"/payments/{payment['id']}", {**payment, "label": "Банковская карта"}, 1)
+
+
+def test_roster_writes_sync_client_names(counter):
+    # Тренеры и группы дополнительно сверяют имена у клиентов и дни занятий
+    trainer = counter.client.post("/trainers", json={"name": "Тренер"}).json()
+    group = counter.client.post("/groups", json={"name": "Взрослые", "days": "Пн,Ср", "trainer_id": trainer["id"]}).json()
+    created = counter.client.post("/clients", json=CLIENT).json()
+    expect(counter, "PUT", f"/trainers/{trainer['id']}", {"name": "Тренер Иванов"}, 3)
+    expect(counter, "PUT", f"/groups/{group['id']}", {**group, "days": "Вт,Чт"}, 6)
+    assert counter.client.get(f"/clients/{created['id']}").json()["trainer"] == "Тренер Иванов"
+
+
+def test_stale_if_match_costs_one_extra_select(counter):
+    # 412 — ещё один SELECT, только на неуспешном пути
+    created = counter.client.post("/clients", json=CLIENT).json()
+    counter.client.put(f"/clients/{created['id']}", json={**created, "comment": "правка"})
+    response, statements = counter.request("PUT", f"/clients/{created['id']}", created, **{"If-Match": '"1"'})
+    assert response.status_code == 412 and statements == 2
+    assert response.headers["etag"] == '"2"'
+
+
+def test_missing_row_is_404(counter):
+    response, _ = counter.request("PUT", "/clients/999", CLIENT, **{"If-Match": '"1"'})
+    assert response.status_code == 404
+
+
+def test_if_match_prevents_lost_updates(client):
+    # Два писателя прочитали одну версию: второй получает 412, перечитывает и повторяет
+    created = client.post("/clients", json={**CLIENT, "total_sessions": 0}).json()
+    first = client.put(f"/clients/{created['id']}", json={**created, "total_sessions": 1}, headers={"If-Match": '"1"'})
+    stale = client.put(f"/clients/{created['id']}", json={**created, "total_sessions": 1}, headers={"If-Match": '"1"'})
+    assert first.status_code == 200 and stale.status_code == 412
+    fresh = client.get(f"/clients/{created['id']}")
+    retried = client.put(
+        f"/clients/{created['id']}", json={**fresh.json(), "total_sessions": fresh.json()["total_sessions"] + 1},
+        headers={"If-Match": fresh.headers["etag"]},
+    )
+    assert retried.status_code == 200 and retried.json()["total_sessions"] == 2
+
+
+def test_not_modified_by_etag(client):
+    created = client.post("/clients", json=CLIENT)
+    response = client.get(f"/clients/{created.json()['id']}", headers={"If-None-Match": created.headers["etag"]})
+    assert response.status_code == 304
@@ -0,0 +1,159 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import case, delete, func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+import models
+
+# SQLite с 3.32 принимает до 32766 параметров; крупные пачки не выглядят как N+1
+UPDATE_CHUNK_SIZE = 5000
+
+visits = models.Visit.__table__
+clients = models.Client.__table__
+
+COUNTER_COLUMNS = (clients.c.sessions_used, clients.c.total_sessions, clients.c.last_visit_date)
+
+
+def _insert(db):
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    return dialect.insert(visits)
+
+
+def _not_deleted():
+    return clients.c.deleted.isnot(True)
+
+
+def _increment_counters(where, visit_date):
+    # last_visit_date не откатывается назад, если отмечают прошедшую дату
+    return update(clients).where(where).values(
+        sessions_used=clients.c.sessions_used + 1,
+        last_visit_date=case(
+            (clients.c.last_visit_date >= visit_date, clients.c.last_visit_date),
+            else_=visit_date,
+        ),
+    )
+
+
+def _check_in_statements(db, client_id, visit_date):
+    source = select(
+        clients.c.id, literal(visit_date, visits.c.visit_date.type), literal(datetime.now(timezone.utc), visits.c.checked_in_at.type),
+    ).where(clients.c.id == client_id, _not_deleted())
+    insert_visit = _insert(db).from_select(["client_id", "visit_date", "checked_in_at"], source).on_conflict_do_nothing(
+        index_elements=["client_id", "visit_date"],
+    )
+    counters = _increment_counters(clients.c.id == client_id, visit_date).returning(*COUNTER_COLUMNS)
+    current = select(*COUNTER_COLUMNS).where(clients.c.id == client_id, _not_deleted())
+    return insert_visit, counters, current
+
+
+def check_in_result(client_id, visit_date, inserted, row):
+    sessions_used, total_sessions, last_visit_date = row
+    return {
+        "client_id": client_id,
+        "visit_date": visit_date,
+        "checked_in": inserted,
+        "sessions_used": sessions_used,
+        "remaining_sessions": total_sessions - sessions_used if total_sessions else None,
+        "last_visit_date": last_visit_date,
+    }
+
+
+def check_in(db, client_id, visit_date):
+    # Запись посещения и счётчики — одна транзакция; повторная отметка за
+    # ту же дату ничего не меняет. None — клиента нет или он удалён.
+    insert_visit, counters, current = _check_in_statements(db, client_id, visit_date)
+    inserted = db.execute(insert_visit).rowcount == 1
+    row = db.execute(counters if inserted else current).one_or_none()
+    db.commit()
+    return None if row is None else check_in_result(client_id, visit_date, inserted, row)
+
+
+async def check_in_async(db, client_id, visit_date):
+    insert_visit, counters, current = _check_in_statements(db, client_id, visit_date)
+    inserted = (await db.execute(insert_visit)).rowcount == 1
+    row = (await db.execute(counters if inserted else current)).one_or_none()
+    await db.commit()
+    return None if row is None else check_in_result(client_id, visit_date, inserted, row)
+
+
+def _remove_statements(client_id, visit_date):
+    remove = delete(visits).where(visits.c.client_id == client_id, visits.c.visit_date == visit_date)
+    last_visit = select(func.max(visits.c.visit_date)).where(visits.c.client_id == client_id).scalar_subquery()
+    counters = update(clients).where(clients.c.id == client_id).values(
+        sessions_used=case((clients.c.sessions_used > 0, clients.c.sessions_used - 1), else_=0),
+        last_visit_date=last_visit,
+    )
+    return remove, counters
+
+
+def remove_visit(db, client_id, visit_date):
+    remove, counters = _remove_statements(client_id, visit_date)
+    removed = db.execute(remove).rowcount == 1
+    if removed:
+        db.execute(counters)
+    db.commit()
+    return removed
+
+
+async def remove_visit_async(db, client_id, visit_date):
+    remove, counters = _remove_statements(client_id, visit_date)
+    removed = (await db.execute(remove)).rowcount == 1
+    if removed:
+        await db.execute(counters)
+    await db.commit()
+    return removed
+
+
+def _group_statements(db, visit_date, group, client_ids):
+    members = select(clients.c.id).where(_not_deleted())
+    if group is not None:
+        # Вся группа — только активные абонементы
+        members = members.where(clients.c.group == group, clients.c.status == "Активен")
+    if client_ids is not None:
+        members = members.where(clients.c.id.in_(client_ids))
+    source = members.add_columns(
+        literal(visit_date, visits.c.visit_date.type), literal(datetime.now(timezone.utc), visits.c.checked_in_at.type),
+    )
+    insert_visits = _insert(db).from_select(["client_id", "visit_date", "checked_in_at"], source).on_conflict_do_nothing(
+        index_elements=["client_id", "visit_date"],
+    ).returning(visits.c.client_id)
+    return members, insert_visits
+
+
+def _group_result(visit_date, client_ids, eligible, checked_in):
+    checked_in = sorted(checked_in)
+    inserted = set(checked_in)
+    eligible = set(eligible)
+    return {
+        "visit_date": visit_date,
+        "checked_in": checked_in,
+        "skipped": sorted(eligible - inserted),
+        "not_found": sorted(set(client_ids) - eligible) if client_ids is not None else [],
+    }
+
+
+def chunks(values):
+    for start in range(0, len(values), UPDATE_CHUNK_SIZE):
+        yield values[start:start + UPDATE_CHUNK_SIZE]
+
+
+def check_in_group(db, visit_date, group=None, client_ids=None):
+    # Одна вставка INSERT ... SELECT на всю группу, счётчики — пачками по id.
+    # Сначала запись: чтение до неё в SQLite мешало бы взять блокировку записи.
+    members, insert_visits = _group_statements(db, visit_date, group, client_ids)
+    checked_in = db.execute(insert_visits).scalars().all()
+    eligible = db.execute(members).scalars().all()
+    for chunk in chunks(checked_in):
+        db.execute(_increment_counters(clients.c.id.in_(chunk), visit_date))
+    db.commit()
+    return _group_result(visit_date, client_ids, eligible, checked_in)
+
+
+async def check_in_group_async(db, visit_date, group=None, client_ids=None):
+    members, insert_visits = _group_statements(db, visit_date, group, client_ids)
+    checked_in = (await db.execute(insert_visits)).scalars().all()
+    eligible = (await db.execute(members)).scalars().all()
+    for chunk in chunks(checked_in):
+        await db.execute(_increment_counters(clients.c.id.in_(chunk), visit_date))
+    await db.commit()
+    return _group_result(visit_date, client_ids, eligible, checked_in)
@@ -0,0 +1,50 @@
+from sqlalchemy import insert, select, update
+
+# Запись — один INSERT/UPDATE ... RETURNING (SQLite 3.35+, PostgreSQL): ответ
+# строится из возвращённой строки, без SELECT до правки и refresh после коммита
+
+
+# --- Версии и ETag ---
+def etag(version):
+    return f'"{version}"'
+
+
+def expected_versions(if_match):
+    # None — без условия: заголовка нет или «*» (строка должна лишь существовать).
+    # Слабые метки W/"..." для If-Match не совпадают ни с чем (RFC 9110)
+    if if_match is None:
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        if tag.startswith('"') and tag.endswith('"') and tag[1:-1].isdigit():
+            versions.add(int(tag[1:-1]))
+    return versions
+
+
+# --- Запросы ---
+def insert_statement(table, values):
+    return insert(table).values(values).returning(*table.c)
+
+
+def update_statement(table, row_id, values, versions=None):
+    stmt = (
+        update(table)
+        .where(table.c.id == row_id)
+        .values({**values, "version": table.c.version + 1})
+        .returning(*table.c)
+    )
+    if versions is not None:
+        stmt = stmt.where(table.c.version.in_(versions))
+    return stmt
+
+
+def row_statement(table, row_id):
+    return select(*table.c).where(table.c.id == row_id)
+
+
+def version_statement(table, row_id):
+    # Только когда UPDATE не вернул строку: отличить 404 от 412
+    return select(table.c.version).where(table.c.id == row_id)
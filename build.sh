@@ -13,3 +13,7 @@ npm run build
 # Copy build files to backend static directory
 mkdir -p ../backend/static
 cp -r dist/* ../backend/static/
+
+# Precompressed .gz/.br copies for static delivery
+cd ../backend
+python precompress.py static
@@ -341,12 +341,17 @@ const ClientModal = ({
         total_sessions: Number(form.totalSessions || 0), // Убеждаемся что это number
         has_discount: Boolean(form.hasDiscount), // Убеждаемся что это boolean
         discount_reason: form.discountReason || "",
-        trainer: form.trainer || ""
+        trainer: form.trainer || "",
+        freeze_start: freezeData?.start || "",
+        freeze_end: freezeData?.end || ""
       };
       
-      // Если редактируем, добавляем ID
+      // Если редактируем, добавляем ID и версию, с которой открыли карточку (для If-Match)
       if (form.id) {
         clientData.id = form.id;
+        if (form.version) {
+          clientData.version = form.version;
+        }
       }
       
       console.log('[CRM] Отправляем ТОЛЬКО совместимые поля:', clientData);
@@ -5,6 +5,7 @@ import ClientModal, { empty } from "./ClientModal";
 import * as XLSX from "xlsx";
 import { saveAs } from "file-saver";
 import { API_ENDPOINTS } from "../config/api";
+import { applyChanges, fetchChangesCursor, subscribeChanges } from "../utils";
 
 const ClientPanel = ({
 	periods = [],
@@ -24,16 +25,26 @@ const ClientPanel = ({
 	const [loading, setLoading] = useState(false);
 	const [error, setError] = useState(null);
 
+	const [changesCursor, setChangesCursor] = useState(null);
+
 	// Загрузка клиентов с сервера
 	const fetchClients = () => {
 		setLoading(true);
 		setError(null);
-		fetch(API_ENDPOINTS.CLIENTS)
+		let cursor = null;
+		fetchChangesCursor()
+			.then((value) => {
+				cursor = value;
+				return fetch(API_ENDPOINTS.CLIENTS);
+			})
 			.then((res) => {
 				if (!res.ok) throw new Error(res.statusText);
 				return res.json();
 			})
-			.then(setClients)
+			.then((data) => {
+				setClients(data);
+				setChangesCursor(cursor);
+			})
 			.catch((e) => {
 				setClients([]);
 				setError(e.message);
@@ -46,6 +57,18 @@ const ClientPanel = ({
 		fetchClients();
 	}, []);
 
+	// Правки из других вкладок приходят пачками вместо повторной загрузки списка
+	useEffect(() => {
+		if (changesCursor === null) return undefined;
+		return subscribeChanges(changesCursor, (batch) => {
+			if (batch.reset) {
+				fetchClients();
+				return;
+			}
+			setClients((prev) => applyChanges(prev, batch, "clients"));
+		});
+	}, [changesCursor]);
+
 	// Добавление/редактирование клиента - УПРОЩЕННАЯ ЛОГИКА
 	const handleSave = async (clientData) => {
 		console.log("[CRM] handleSave получил данные:", clientData);
@@ -58,9 +81,13 @@ const ClientPanel = ({
 			let response;
 			if (clientData.id) {
 				// Редактирование существующего клиента
+				// If-Match: сервер отклонит правку (412), если карточку уже изменили в другой вкладке
 				response = await fetch(`${API_ENDPOINTS.CLIENTS}/${clientData.id}`, {
 					method: "PUT",
-					headers: { "Content-Type": "application/json" },
+					headers: {
+						"Content-Type": "application/json",
+						...(clientData.version ? { "If-Match": `"${clientData.version}"` } : {}),
+					},
 					body: JSON.stringify(clientData),
 				});
 			} else {
@@ -73,6 +100,9 @@ const ClientPanel = ({
 			}
 			
 			console.log("[CRM] Ответ сервера:", response.status, response.statusText);
+			if (response.status === 412) {
+				throw new Error("Клиента уже изменили в другой вкладке. Закройте карточку и откройте её снова — там будут актуальные данные.");
+			}
 			if (!response.ok) {
 				const errorText = await response.text();
 				console.error("[CRM] Ошибка сервера:", errorText);
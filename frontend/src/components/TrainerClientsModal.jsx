@@ -1,21 +1,32 @@
-import React, { useState } from "react";
+import React, { useEffect, useState } from "react";
+import { API_ENDPOINTS } from "../config/api";
 
 // Модальное окно со списком клиентов тренера
 const TrainerClientsModal = ({ trainer, clients = [], onClose, onAssignTrainer, groups = [] }) => {
+  // Состав тренера с сервера (по trainer_id); без сервера — поиск по группам тренера
+  const [roster, setRoster] = useState(null);
+  useEffect(() => {
+    fetch(`${API_ENDPOINTS.TRAINERS}/${trainer.id}/clients`)
+      .then((res) => (res.ok ? res.json() : null))
+      .then(setRoster)
+      .catch(() => setRoster(null));
+  }, [trainer.id]);
+
   // Получаем только существующие группы тренера
-  const trainerGroups = (trainer.groups || [])
-    .map(gid => groups.find(g => g.value === gid))
-    .filter(Boolean);
+  const trainerGroups = roster
+    ? [...new Set(roster.clients.map((c) => c.group).filter(Boolean))].map((name) => ({ value: name, name }))
+    : (trainer.groups || [])
+      .map(gid => groups.find(g => g.value === gid))
+      .filter(Boolean);
 
   // Если у тренера несколько групп — фильтр по группе
-  const [selectedGroup, setSelectedGroup] = useState(
-    trainerGroups.length > 0 ? trainerGroups[0].value : ""
-  );
+  const [selectedGroup, setSelectedGroup] = useState("");
+  const currentGroup = selectedGroup || (trainerGroups.length > 0 ? trainerGroups[0].value : "");
 
   // Фильтруем клиентов по выбранной группе тренера
-  const filteredClients = clients.filter(
-    c => c.group === selectedGroup
-  );
+  const filteredClients = roster
+    ? roster.clients.filter(c => !selectedGroup || c.group === selectedGroup)
+    : clients.filter(c => c.group === currentGroup);
 
   const hasClients = filteredClients && filteredClients.length > 0;
 
@@ -33,14 +44,20 @@ const TrainerClientsModal = ({ trainer, clients = [], onClose, onAssignTrainer,
           </button>
         </div>
         <div className="p-6">
+          {roster && (
+            <div className="mb-4 text-sm text-gray-600">
+              Всего: {roster.total}, активных: {roster.active}, в заморозке: {roster.frozen}
+            </div>
+          )}
           {trainerGroups.length > 1 && (
             <div className="mb-4">
               <label className="block text-sm font-medium text-gray-700 mb-1">Группа:</label>
               <select
                 className="w-full px-3 py-2 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
-                value={selectedGroup}
+                value={roster ? selectedGroup : currentGroup}
                 onChange={e => setSelectedGroup(e.target.value)}
               >
+                {roster && <option value="">Все группы</option>}
                 {trainerGroups.map(g => (
                   <option key={g.value} value={g.value}>{g.name}</option>
                 ))}
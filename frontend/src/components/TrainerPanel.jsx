@@ -4,6 +4,7 @@ import TrainerClientsModal from "./TrainerClientsModal";
 import TrainerScheduleModal from "./TrainerScheduleModal";
 import TrainerModal from "./TrainerModal";
 import { API_ENDPOINTS } from "../config/api";
+import { applyChanges, fetchChangesCursor, subscribeChanges } from "../utils";
 
 const TrainerPanel = ({ clients = [], setClients, groups = [], onAssignTrainer }) => {
   const [trainers, setTrainers] = useState([]);
@@ -14,10 +15,21 @@ const TrainerPanel = ({ clients = [], setClients, groups = [], onAssignTrainer }
   const [editTrainer, setEditTrainer] = useState(null);
 
   useEffect(() => {
-    fetch(API_ENDPOINTS.TRAINERS)
-      .then((res) => res.json())
-      .then(setTrainers)
-      .catch(() => setTrainers([]));
+    let unsubscribe = () => {};
+    fetchChangesCursor().then((cursor) =>
+      fetch(API_ENDPOINTS.TRAINERS)
+        .then((res) => res.json())
+        .then((data) => {
+          setTrainers(data);
+          if (cursor !== null) {
+            unsubscribe = subscribeChanges(cursor, (batch) =>
+              setTrainers((prev) => applyChanges(prev, batch, "trainers"))
+            );
+          }
+        })
+        .catch(() => setTrainers([]))
+    );
+    return () => unsubscribe();
   }, []);
 
   const handleSaveTrainer = (trainer) => {
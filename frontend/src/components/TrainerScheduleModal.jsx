@@ -1,18 +1,43 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
+import { API_ENDPOINTS } from "../config/api";
 
 // Модальное окно с расписанием тренера
 const TrainerScheduleModal = ({ trainer, onClose, groups = [] }) => {
+  // Неделя тренера с сервера (/schedule); без сервера — по группам из справочника
+  const [week, setWeek] = useState(null);
+  useEffect(() => {
+    fetch(`${API_ENDPOINTS.SCHEDULE}?trainer_id=${trainer.id}`)
+      .then((res) => (res.ok ? res.json() : null))
+      .then(setWeek)
+      .catch(() => setWeek(null));
+  }, [trainer.id]);
+
   // Показываем только существующие группы из справочника
   const trainerGroups = (trainer.groups || [])
     .map(gid => groups.find(g => g.value === gid))
     .filter(Boolean);
 
   // Для каждой группы показываем реальные дни и время
-  const schedule = trainerGroups.map((group) => ({
-    group: group.name,
-    days: group.days && group.days.length ? group.days : [],
-    time: group.timeStart && group.timeEnd ? `${group.timeStart}–${group.timeEnd}` : "",
-  }));
+  const schedule = week
+    ? Object.values(
+      week.flatMap((day) => day.sessions.map((session) => ({ ...session, day: day.day })))
+        .reduce((byGroup, session) => {
+          const item = byGroup[session.group_id] || {
+            group: session.group,
+            days: [],
+            time: session.time_start && session.time_end ? `${session.time_start}–${session.time_end}` : "",
+            members: session.members,
+          };
+          item.days.push(session.day);
+          byGroup[session.group_id] = item;
+          return byGroup;
+        }, {})
+    )
+    : trainerGroups.map((group) => ({
+      group: group.name,
+      days: group.days && group.days.length ? group.days : [],
+      time: group.timeStart && group.timeEnd ? `${group.timeStart}–${group.timeEnd}` : "",
+    }));
 
   return (
     <div className="fixed inset-0 bg-black bg-opacity-50 flex items-center justify-center z-50 p-4">
@@ -44,6 +69,11 @@ const TrainerScheduleModal = ({ trainer, onClose, groups = [] }) => {
                         {item.time}
                       </span>
                     )}
+                    {item.members !== undefined && (
+                      <span className="px-2 py-1 bg-gray-200 text-gray-700 text-xs rounded">
+                        {item.members} активных
+                      </span>
+                    )}
                   </div>
                 </li>
               ))}
@@ -7,7 +7,9 @@ export const API_ENDPOINTS = {
   GROUPS: `${BASE_URL}/groups`,
   PERIODS: `${BASE_URL}/periods`,
   PAYMENTS: `${BASE_URL}/payments`,
-  FREEZE_SETTINGS: `${BASE_URL}/freezeSettings`
+  FREEZE_SETTINGS: `${BASE_URL}/freezeSettings`,
+  CHANGES: `${BASE_URL}/changes`,
+  SCHEDULE: `${BASE_URL}/schedule`
 };
 
 export const API_URLS = {
@@ -1,6 +1,54 @@
+import { API_ENDPOINTS } from "../config/api";
+
 // Заглушка для utils
 export const exampleUtil = () => {};
 
+/**
+ * Текущий курсор журнала изменений. Берётся до загрузки списков:
+ * правки между запросами просто придут ещё раз
+ * @returns {Promise<number|null>} null, если сервер недоступен (mock-режим)
+ */
+export function fetchChangesCursor() {
+  return fetch(API_ENDPOINTS.CHANGES)
+    .then((res) => (res.ok ? res.json() : null))
+    .then((changes) => (changes ? changes.cursor : null))
+    .catch(() => null);
+}
+
+/**
+ * Подписка на изменения с сервера (Server-Sent Events)
+ * @param {number} since - курсор из fetchChangesCursor
+ * @param {function} onChanges - получает пачку {cursor, upserts, deletes, reset}
+ * @returns {function} отписка
+ */
+export function subscribeChanges(since, onChanges) {
+  const source = new EventSource(`${API_ENDPOINTS.CHANGES}/stream?since=${since}`);
+  source.addEventListener("changes", (event) => onChanges(JSON.parse(event.data)));
+  return () => source.close();
+}
+
+/**
+ * Применяет пачку изменений к списку сущностей
+ * @param {Array} list - текущий список
+ * @param {object} batch - пачка из subscribeChanges
+ * @param {string} entity - clients, trainers, groups, periods или payments
+ * @returns {Array} тот же список, если сущность не менялась
+ */
+export function applyChanges(list, batch, entity) {
+  const upserts = batch.upserts[entity] || [];
+  const deletes = new Set(batch.deletes[entity] || []);
+  if (!upserts.length && !deletes.size) return list;
+  const updated = new Map(upserts.map((row) => [row.id, row]));
+  const next = (list || [])
+    .filter((row) => !deletes.has(row.id))
+    .map((row) => {
+      const fresh = updated.get(row.id);
+      updated.delete(row.id);
+      return fresh || row;
+    });
+  return [...next, ...updated.values()];
+}
+
 /**
  * Проверяет, считается ли клиент "оплаченным" по логике CRM
  * @param {object} client - объект клиента